@@ -7,31 +7,109 @@
 #include <DGtal/io/viewers/Viewer3D.h>
 #include <CLI11.hpp>
 
+#include <dirent.h>
+#include <sys/resource.h>
+#include <unistd.h>
+
+#include <algorithm>
+#include <atomic>
 #include <chrono>
+#include <fstream>
+#include <future>
 #include <iostream>
+#include <mutex>
+#include <sstream>
+#include <thread>
+#include <vector>
 
 using namespace DGtal;
 using namespace Z3i;
 using namespace std::chrono;
 
-int main(int argc, char **argv) {
-    std::string inputFileName, outputPrefix = "output";
+struct Options {
     double imageSize = 100.0;
     int maxScan = 50;
+    std::string projection = "sweep";
+    bool checkParity = false;
+    bool parallelDirections = true;
+};
 
-    CLI::App app{"Profile image generator"};
-    app.add_option("-i,--input", inputFileName, "Input OFF mesh file")->required();
-    app.add_option("-o,--output", outputPrefix, "Output image prefix");
-    CLI11_PARSE(app, argc, argv);
+// Durées des étapes d'un maillage (mêmes numéros que les messages "[k] ... done in")
+const char *STAGE_NAMES[6] = {"Mesh loading", "Normalization", "Voxelization", "PCA",
+                              "Profile image generation", "Saving images"};
+
+struct MeshResult {
+    std::string input;
+    bool ok = false;
+    std::string error;
+    double stages[6] = {0, 0, 0, 0, 0, 0};
+    double total = 0;
+    unsigned int parityErrors = 0;
+    double processPeakMemory = 0;
+};
+
+static double
+elapsed(high_resolution_clock::time_point a, high_resolution_clock::time_point b) {
+    return duration_cast<duration<double>>(b - a).count();
+}
+
+// Pic de mémoire résidente du processus depuis son lancement (Mo) : ne
+// redescend jamais et couvre, en mode batch, tous les maillages déjà traités
+// ou en cours sur les autres threads
+static double
+processPeakMemoryMB() {
+    struct rusage usage;
+    getrusage(RUSAGE_SELF, &usage);
+    return usage.ru_maxrss / 1024.0;
+}
+
+// Mémoire résidente actuelle du processus (Mo), lue dans /proc/self/statm ;
+// 0 si indisponible
+static double
+currentMemoryMB() {
+    std::ifstream statm("/proc/self/statm");
+    long pages = 0, resident = 0;
+    if (!(statm >> pages >> resident)) return 0;
+    return resident * static_cast<double>(sysconf(_SC_PAGESIZE)) / 1048576.0;
+}
+
+// Profils m, s, t d'un maillage écrits dans <outputPrefix>_{m,s,t}.pgm ;
+// les messages de progression sont écrits dans log.
+MeshResult
+processMesh(const std::string &inputFileName, const std::string &outputPrefix, const Options &opt,
+            std::ostream &log) {
+    MeshResult res;
+    res.input = inputFileName;
+    const double imageSize = opt.imageSize;
+    const int maxScan = opt.maxScan;
 
     auto t0 = high_resolution_clock::now();
+    // Mémoire résidente à la fin de chaque étape et variation pendant l'étape
+    // (mesures du processus : en mode batch à plusieurs threads, elles
+    // incluent les maillages traités en parallèle)
+    double rss = currentMemoryMB();
+    auto memory = [&rss]() {
+        double now = currentMemoryMB();
+        std::ostringstream out;
+        out << "RSS " << now << " MB, " << std::showpos << now - rss << std::noshowpos << " MB";
+        rss = now;
+        return out.str();
+    };
 
     // 1. Lecture du maillage
     Mesh<RealPoint> mesh;
-    MeshReader<RealPoint>::importOFFFile(inputFileName, mesh);
+    bool loaded = false;
+    try {
+        loaded = MeshReader<RealPoint>::importOFFFile(inputFileName, mesh);
+    } catch (const std::exception &e) {
+        res.error = e.what();
+    }
+    if (!loaded || mesh.nbVertex() == 0) {
+        if (res.error.empty()) res.error = "cannot read " + inputFileName;
+        return res;
+    }
     auto t1 = high_resolution_clock::now();
-    std::cout << "[1] Mesh loading done in "
-              << duration_cast<duration<double>>(t1 - t0).count() << " s\n";
+    log << "[1] Mesh loading done in " << elapsed(t0, t1) << " s (" << memory() << ")\n";
 
     // 2. Normalisation
     auto bbox = mesh.getBoundingBox();
@@ -44,53 +122,228 @@ int main(int argc, char **argv) {
         *it *= scale;
     }
     auto t2 = high_resolution_clock::now();
-    std::cout << "[2] Normalization done in "
-              << duration_cast<duration<double>>(t2 - t1).count() << " s\n";
+    log << "[2] Normalization done in " << elapsed(t1, t2) << " s (" << memory() << ")\n";
 
     // 3. Voxelisation
+    // Le volume d'occupation est gardé sur 1 bit par voxel (BitVolume) ; le
+    // DigitalSet du voxeliseur est libéré dès la copie faite
     Image3D::Domain domain(mesh.getBoundingBox().first - Point::diagonal(maxScan),
                            mesh.getBoundingBox().second + Point::diagonal(maxScan));
-    DigitalSet set(domain);
-    MeshVoxelizer<DigitalSet, 26> voxelizer;
-    voxelizer.voxelize(set, mesh, 1.0);
-    
-    Image3D volImage(domain);
-    for (auto p : set) volImage.setValue(p, 1);
-    
+    BitVolume volImage(domain);
+    {
+        DigitalSet set(domain);
+        MeshVoxelizer<DigitalSet, 26> voxelizer;
+        voxelizer.voxelize(set, mesh, 1.0);
+        for (auto p : set) volImage.setValue(p, 1);
+    }
+
     auto t3 = high_resolution_clock::now();
-    std::cout << "[3] Voxelization done in "
-              << duration_cast<duration<double>>(t3 - t2).count() << " s\n";
+    log << "[3] Voxelization done in " << elapsed(t2, t3) << " s (" << memory() << ")\n";
+    log << "[Info] Volume: " << volImage.count() << " voxels, " << volImage.memoryBytes() / 1048576.0
+        << " MB (dense image: " << domain.size() * sizeof(Image3D::Value) / 1048576.0 << " MB)\n";
 
     // 4. PCA
     auto dir = getMainDirsFromVoxels(volImage);
     auto t4 = high_resolution_clock::now();
-    std::cout << "[4] PCA done in "
-              << duration_cast<duration<double>>(t4 - t3).count() << " s\n";
+    log << "[4] PCA done in " << elapsed(t3, t4) << " s (" << memory() << ")\n";
 
     // 5. Génération des images de profils
     Image2D::Domain domain2D(Z2i::Point(0, 0), Z2i::Point(imageSize - 1, imageSize - 1));
-    
-    
-    auto im0 = compute2D_profile(std::get<0>(dir).getNormalized(), imageSize, volImage, domain2D, maxScan);
 
-    auto im1 = compute2D_profile(std::get<1>(dir).getNormalized(), imageSize, volImage, domain2D, maxScan);
+    RealPoint dirs[3] = {std::get<0>(dir).getNormalized(), std::get<1>(dir).getNormalized(),
+                         std::get<2>(dir).getNormalized()};
+    auto profile = [&](const RealPoint &normal, const std::string &mode) {
+        if (mode == "direct")
+            return compute2D_profile_direct(normal, imageSize, volImage, volImage, domain2D, maxScan);
+        return compute2D_profile(normal, imageSize, volImage, domain2D, maxScan);
+    };
+    // Les trois directions ne font que lire volImage : s et t sont calculées
+    // en parallèle de m
+    std::launch policy = opt.parallelDirections ? std::launch::async : std::launch::deferred;
+    auto f1 = std::async(policy, profile, dirs[1], opt.projection);
+    auto f2 = std::async(policy, profile, dirs[2], opt.projection);
+    auto im0 = profile(dirs[0], opt.projection);
+
+    auto im1 = f1.get();
 
-    auto im2 = compute2D_profile(std::get<2>(dir).getNormalized(), imageSize, volImage, domain2D, maxScan);
+    auto im2 = f2.get();
 
     auto t5 = high_resolution_clock::now();
-    std::cout << "[5] Profile image generation done in "
-              << duration_cast<duration<double>>(t5 - t4).count() << " s\n";
+    log << "[5] Profile image generation done in " << elapsed(t4, t5) << " s (" << opt.projection << ", "
+        << memory() << ")\n";
+
+    // Comparaison pixel à pixel avec l'autre projection
+    if (opt.checkParity) {
+        const std::string other = opt.projection == "sweep" ? "direct" : "sweep";
+        const Image2D *images[3] = {&im0, &im1, &im2};
+        const char *views[3] = {"m", "s", "t"};
+        for (int d = 0; d < 3; ++d) {
+            auto ta = high_resolution_clock::now();
+            auto im = profile(dirs[d], other);
+            auto tb = high_resolution_clock::now();
+            unsigned int n = countDifferentPixels(*images[d], im);
+            res.parityErrors += n;
+            log << "[Parity] " << views[d] << ": " << n << " differing pixels ("
+                << other << " in " << elapsed(ta, tb) << " s)\n";
+        }
+    }
 
     // 6. Sauvegarde des images
     PGMWriter<Image2D>::exportPGM(outputPrefix + "_m.pgm", im0);
     PGMWriter<Image2D>::exportPGM(outputPrefix + "_s.pgm", im1);
     PGMWriter<Image2D>::exportPGM(outputPrefix + "_t.pgm", im2);
     auto t6 = high_resolution_clock::now();
-    std::cout << "[6] Saving images done in "
-              << duration_cast<duration<double>>(t6 - t5).count() << " s\n";
+    log << "[6] Saving images done in " << elapsed(t5, t6) << " s (" << memory() << ")\n";
+
+    res.processPeakMemory = processPeakMemoryMB();
+    log << "Total time: " << elapsed(t0, t6) << " s (process peak RSS " << res.processPeakMemory << " MB)\n";
 
-    std::cout << "Total time: "
-              << duration_cast<duration<double>>(t6 - t0).count() << " s\n";
+    const high_resolution_clock::time_point marks[7] = {t0, t1, t2, t3, t4, t5, t6};
+    for (int s = 0; s < 6; ++s) res.stages[s] = elapsed(marks[s], marks[s + 1]);
+    res.total = elapsed(t0, t6);
+    res.ok = true;
+    return res;
+}
+
+static std::string
+baseName(const std::string &path) {
+    std::string name = path.substr(path.find_last_of('/') + 1);
+    size_t dot = name.rfind('.');
+    return dot == std::string::npos ? name : name.substr(0, dot);
+}
+
+// Tâches du mode batch : couples (maillage, préfixe de sortie).
+// Fichier liste : une ligne "maillage.off [préfixe]" par maillage ;
+// répertoire : tous ses fichiers .off. Sans préfixe, <outputDir>/<nom>.
+static bool
+readJobs(const std::string &listFile, const std::string &inputDir, const std::string &outputDir,
+         std::vector<std::pair<std::string, std::string>> &jobs) {
+    if (!listFile.empty()) {
+        std::ifstream in(listFile);
+        if (!in) {
+            std::cerr << "Cannot open list file " << listFile << "\n";
+            return false;
+        }
+        std::string line;
+        while (std::getline(in, line)) {
+            std::istringstream fields(line);
+            std::string mesh, prefix;
+            if (!(fields >> mesh) || mesh[0] == '#') continue;
+            if (!(fields >> prefix)) prefix = outputDir + "/" + baseName(mesh);
+            jobs.emplace_back(mesh, prefix);
+        }
+    }
+    if (!inputDir.empty()) {
+        DIR *dir = opendir(inputDir.c_str());
+        if (dir == nullptr) {
+            std::cerr << "Cannot open directory " << inputDir << "\n";
+            return false;
+        }
+        std::vector<std::string> names;
+        while (struct dirent *entry = readdir(dir)) {
+            std::string name = entry->d_name;
+            if (name.size() > 4 && name.compare(name.size() - 4, 4, ".off") == 0) names.push_back(name);
+        }
+        closedir(dir);
+        std::sort(names.begin(), names.end());
+        for (const auto &name : names)
+            jobs.emplace_back(inputDir + "/" + name, outputDir + "/" + baseName(name));
+    }
+    return true;
+}
+
+int main(int argc, char **argv) {
+    std::string inputFileName, outputPrefix = "output";
+    std::string listFile, inputDir;
+    unsigned int threads = std::max(1u, std::thread::hardware_concurrency());
+    bool sequentialDirections = false;
+    Options opt;
+
+    CLI::App app{"Profile image generator"};
+    auto inputOpt = app.add_option("-i,--input", inputFileName, "Input OFF mesh file");
+    auto listOpt = app.add_option("-l,--list", listFile,
+                                  "Batch mode: file with one 'mesh.off [output_prefix]' line per mesh");
+    auto dirOpt = app.add_option("-d,--inputDir", inputDir, "Batch mode: process every .off file of a directory");
+    app.add_option("-o,--output", outputPrefix,
+                   "Output image prefix (batch mode: output directory for meshes without a prefix)");
+    app.add_option("-r,--res", opt.imageSize, "Profile image size in pixels (default 100)");
+    app.add_option("-p,--projection", opt.projection,
+                   "Profile extraction: sweep (plane by plane) or direct (one pass over the voxels)")
+        ->check(CLI::IsMember({"sweep", "direct"}));
+    app.add_flag("--checkParity", opt.checkParity,
+                 "Compute the profiles with both projections and report the differing pixels");
+    app.add_option("-j,--threads", threads, "Batch mode: meshes processed in parallel (default: all cores)");
+    app.add_flag("--sequentialDirections", sequentialDirections,
+                 "Compute the three profiles of a mesh one after the other");
+    inputOpt->excludes(listOpt)->excludes(dirOpt);
+    CLI11_PARSE(app, argc, argv);
+    opt.parallelDirections = !sequentialDirections;
+
+    // Un seul maillage : sortie inchangée
+    if (!inputFileName.empty()) {
+        MeshResult res = processMesh(inputFileName, outputPrefix, opt, std::cout);
+        if (!res.ok) {
+            std::cerr << "Error: " << res.error << "\n";
+            return 1;
+        }
+        return res.parityErrors == 0 ? 0 : 2;
+    }
+    if (listFile.empty() && inputDir.empty()) {
+        std::cerr << "One of --input, --list or --inputDir is required\n" << app.help();
+        return 1;
+    }
+
+    std::vector<std::pair<std::string, std::string>> jobs;
+    if (!readJobs(listFile, inputDir, outputPrefix, jobs)) return 1;
+    threads = std::max(1u, std::min<unsigned int>(threads, jobs.size()));
+    std::cout << "[Batch] " << jobs.size() << " meshes on " << threads << " threads\n";
+
+    // Pool de threads : chaque thread prend le maillage suivant ; les messages
+    // d'un maillage sont affichés d'un bloc quand il est terminé
+    auto tStart = high_resolution_clock::now();
+    std::vector<MeshResult> results(jobs.size());
+    std::atomic<size_t> next(0);
+    std::mutex outputMutex;
+    auto worker = [&]() {
+        for (size_t i = next++; i < jobs.size(); i = next++) {
+            std::ostringstream log;
+            try {
+                results[i] = processMesh(jobs[i].first, jobs[i].second, opt, log);
+            } catch (const std::exception &e) {
+                results[i].input = jobs[i].first;
+                results[i].error = e.what();
+            }
+            std::lock_guard<std::mutex> lock(outputMutex);
+            std::cout << "== " << jobs[i].first << " -> " << jobs[i].second << "\n" << log.str();
+            if (!results[i].ok) std::cout << "Error: " << results[i].error << "\n";
+        }
+    };
+    std::vector<std::thread> pool;
+    for (unsigned int t = 0; t < threads; ++t) pool.emplace_back(worker);
+    for (auto &t : pool) t.join();
+    double wall = elapsed(tStart, high_resolution_clock::now());
+
+    // Bilan : somme et moyenne de chaque étape sur les maillages traités
+    double sums[6] = {0, 0, 0, 0, 0, 0}, total = 0;
+    unsigned int done = 0, parityErrors = 0;
+    for (const auto &res : results) {
+        if (!res.ok) continue;
+        ++done;
+        for (int s = 0; s < 6; ++s) sums[s] += res.stages[s];
+        total += res.total;
+        parityErrors += res.parityErrors;
+    }
+    std::cout << "[Batch] " << done << " meshes processed, " << jobs.size() - done << " failed\n";
+    for (int s = 0; s < 6; ++s)
+        std::cout << "[Batch] " << STAGE_NAMES[s] << ": " << sums[s] << " s total, "
+                  << (done ? sums[s] / done : 0) << " s per mesh\n";
+    std::cout << "[Batch] Mesh time: " << total << " s total, wall time: " << wall << " s\n";
+    std::cout << "[Batch] Process peak RSS (all threads): " << processPeakMemoryMB() << " MB\n";
+    if (threads > 1)
+        std::cout << "[Batch] Per-mesh RSS values are process-wide and include the meshes processed in parallel; "
+                     "use -j 1 for per-stage figures\n";
+    if (opt.checkParity) std::cout << "[Batch] Parity: " << parityErrors << " differing pixels\n";
 
-    return 0;
+    if (done != jobs.size()) return 1;
+    return parityErrors == 0 ? 0 : 2;
 }
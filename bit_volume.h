@@ -0,0 +1,115 @@
+#pragma once
+
+#include <DGtal/helpers/StdDefs.h>
+
+#include <cstddef>
+#include <cstdint>
+#include <iterator>
+#include <vector>
+
+using namespace DGtal;
+using namespace Z3i;
+
+// Volume d'occupation binaire : 1 bit par voxel du domaine (au lieu des
+// 4 octets d'ImageContainerBySTLVector<Domain, unsigned int>), rangés dans
+// l'ordre de parcours du domaine DGtal (x, puis y, puis z).
+// Même interface de lecture que l'image dense (domain(), operator(),
+// setValue) ; le parcours (begin/end) donne les voxels occupés dans l'ordre
+// du domaine, en sautant les mots vides.
+class BitVolume {
+public:
+    typedef Z3i::Domain Domain;
+    typedef Z3i::Point Point;
+    typedef unsigned int Value;
+
+    explicit BitVolume(const Domain &aDomain)
+        : myDomain(aDomain), myLower(aDomain.lowerBound()),
+          myExtent(aDomain.upperBound() - aDomain.lowerBound() + Point::diagonal(1)),
+          myBits(((size_t)myExtent[0] * myExtent[1] * myExtent[2] + 63) / 64, 0) {}
+
+    const Domain &domain() const { return myDomain; }
+
+    Value operator()(const Point &p) const {
+        size_t i = index(p);
+        return (myBits[i >> 6] >> (i & 63)) & 1u;
+    }
+
+    void setValue(const Point &p, Value v) {
+        size_t i = index(p);
+        if (v != 0) myBits[i >> 6] |= uint64_t(1) << (i & 63);
+        else myBits[i >> 6] &= ~(uint64_t(1) << (i & 63));
+    }
+
+    // Nombre de voxels occupés
+    size_t count() const {
+        size_t n = 0;
+        for (uint64_t w : myBits) n += __builtin_popcountll(w);
+        return n;
+    }
+
+    // Taille du volume en mémoire (octets)
+    size_t memoryBytes() const { return myBits.size() * sizeof(uint64_t); }
+
+    class ConstIterator {
+    public:
+        typedef std::forward_iterator_tag iterator_category;
+        typedef Point value_type;
+        typedef std::ptrdiff_t difference_type;
+        typedef const Point *pointer;
+        typedef Point reference;
+
+        ConstIterator(const BitVolume *vol, size_t word) : myVol(vol), myWord(word), myRemaining(0) {
+            if (myWord < myVol->myBits.size()) {
+                myRemaining = myVol->myBits[myWord];
+                skipEmpty();
+            }
+        }
+        Point operator*() const { return myVol->point(myWord * 64 + __builtin_ctzll(myRemaining)); }
+        ConstIterator &operator++() {
+            myRemaining &= myRemaining - 1;
+            skipEmpty();
+            return *this;
+        }
+        bool operator==(const ConstIterator &o) const { return myWord == o.myWord && myRemaining == o.myRemaining; }
+        bool operator!=(const ConstIterator &o) const { return !(*this == o); }
+
+    private:
+        void skipEmpty() {
+            while (myRemaining == 0 && ++myWord < myVol->myBits.size()) myRemaining = myVol->myBits[myWord];
+            if (myRemaining == 0) myWord = myVol->myBits.size();
+        }
+        const BitVolume *myVol;
+        size_t myWord;
+        uint64_t myRemaining;
+    };
+
+    ConstIterator begin() const { return ConstIterator(this, 0); }
+    ConstIterator end() const { return ConstIterator(this, myBits.size()); }
+
+private:
+    size_t index(const Point &p) const {
+        return (size_t)(p[0] - myLower[0])
+               + (size_t)myExtent[0] * ((size_t)(p[1] - myLower[1]) + (size_t)myExtent[1] * (p[2] - myLower[2]));
+    }
+
+    Point point(size_t i) const {
+        Point p;
+        p[0] = myLower[0] + (Point::Component)(i % myExtent[0]);
+        i /= myExtent[0];
+        p[1] = myLower[1] + (Point::Component)(i % myExtent[1]);
+        p[2] = myLower[2] + (Point::Component)(i / myExtent[1]);
+        return p;
+    }
+
+    Domain myDomain;
+    Point myLower;
+    Point myExtent;
+    std::vector<uint64_t> myBits;
+};
+
+// Appelle f(p) pour chaque voxel occupé, dans l'ordre du domaine
+template <typename TFunction>
+void
+forEachVoxel(const BitVolume &volume, TFunction f) {
+    for (auto it = volume.begin(); it != volume.end(); ++it) f(*it);
+}
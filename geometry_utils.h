@@ -4,6 +4,8 @@
 #include <DGtal/math/linalg/EigenDecomposition.h>
 #include <DGtal/io/readers/MeshReader.h>
 
+#include "bit_volume.h"
+
 using namespace DGtal;
 using namespace Z3i;
 using Image3D = ImageContainerBySTLVector<Z3i::Domain, unsigned int>;
@@ -20,32 +22,39 @@ getCoVarianceMatFrom(const Matrix3x3Point &m) {
     return res;
 }
 
+// Appelle f(p) pour chaque voxel non nul de l'image dense, dans l'ordre du domaine
+template <typename TFunction>
+void
+forEachVoxel(const Image3D &volImage, TFunction f) {
+    for (const auto &p : volImage.domain())
+        if (volImage(p) != 0) f(p);
+}
+
+// Directions principales des voxels occupés (Image3D ou BitVolume : même
+// ordre de parcours, donc mêmes sommes et mêmes directions)
+template <typename TVolume>
 std::tuple<RealPoint, RealPoint, RealPoint> 
-getMainDirsFromVoxels(const Image3D &volImage) {
+getMainDirsFromVoxels(const TVolume &volImage) {
     Matrix3x3Point cov;
     unsigned int count = 0;
     RealPoint centroid = RealPoint::zero;
 
-    for (const auto &p : volImage.domain()) {
-        if (volImage(p) != 0) {
-            centroid += RealPoint(p);
-            ++count;
-        }
-    }
-    if (count == 0) return {RealPoint::zero, RealPoint::zero, RealPoint::zero};
+    forEachVoxel(volImage, [&](const Point &p) {
+        centroid += RealPoint(p);
+        ++count;
+    });
+    if (count == 0) return std::make_tuple(RealPoint::zero, RealPoint::zero, RealPoint::zero);
     centroid /= count;
 
-    for (const auto &p : volImage.domain()) {
-        if (volImage(p) != 0) {
-            RealPoint d = RealPoint(p) - centroid;
-            cov[0] += d[0] * d[0];
-            cov[1] += d[0] * d[1];
-            cov[2] += d[0] * d[2];
-            cov[4] += d[1] * d[1];
-            cov[5] += d[1] * d[2];
-            cov[8] += d[2] * d[2];
-        }
-    }
+    forEachVoxel(volImage, [&](const Point &p) {
+        RealPoint d = RealPoint(p) - centroid;
+        cov[0] += d[0] * d[0];
+        cov[1] += d[0] * d[1];
+        cov[2] += d[0] * d[2];
+        cov[4] += d[1] * d[1];
+        cov[5] += d[1] * d[2];
+        cov[8] += d[2] * d[2];
+    });
     cov[3] = cov[1]; cov[6] = cov[2]; cov[7] = cov[5];
     cov /= count;
 
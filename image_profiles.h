@@ -6,6 +6,11 @@
 #include <DGtal/kernel/BasicPointFunctors.h>
 #include <DGtal/io/writers/PGMWriter.h>
 
+#include <algorithm>
+#include <climits>
+#include <cmath>
+#include <vector>
+
 using namespace DGtal;
 using namespace Z3i;
 
@@ -17,9 +22,24 @@ using ImageAdapterExtractor = DGtal::ConstImageAdapter<
     Image3D::Value,
     DGtal::functors::Identity>;
 
+// Lecture d'un volume (Image3D ou BitVolume) dans le plan courant de
+// l'embedder, comme ImageAdapterExtractor : valeur du voxel associé au
+// pixel, 0 hors du volume.
+template <typename TVolume>
+struct VolumeSlice {
+    const TVolume &volume;
+    const DGtal::functors::Point2DEmbedderIn3D<Z3i::Domain> &embedder;
+
+    typename TVolume::Value operator()(const Z2i::Point &p) const {
+        Z3i::Point q = embedder(p);
+        return volume.domain().isInside(q) ? volume(q) : 0;
+    }
+};
+
+template <typename TVolume>
 Image2D 
 compute2D_profile(const RealPoint &normalDir, double widthImageScan,
-                  const Image3D &meshVolImage,
+                  const TVolume &meshVolImage,
                   const Image2D::Domain &aDomain2D)
 {
     // Étape 1 : récupérer les bornes du domaine
@@ -46,8 +66,7 @@ compute2D_profile(const RealPoint &normalDir, double widthImageScan,
     DGtal::functors::Point2DEmbedderIn3D<Z3i::Domain> embedder(
         meshVolImage.domain(), center, normalDir, widthImageScan);
 
-    DGtal::functors::Identity idV;
-    ImageAdapterExtractor extractedImage(meshVolImage, aDomain2D, embedder, idV);
+    VolumeSlice<TVolume> extractedImage{meshVolImage, embedder};
 
     int k = 0;
     bool firstFound = false;
@@ -55,7 +74,7 @@ compute2D_profile(const RealPoint &normalDir, double widthImageScan,
     // Étape 7 : balayage progressif
     while (k < maxScan || !firstFound) {
         embedder.shiftOriginPoint(normalDir);
-        for (auto it = extractedImage.domain().begin(); it != extractedImage.domain().end(); ++it) {
+        for (auto it = aDomain2D.begin(); it != aDomain2D.end(); ++it) {
             if (result(*it) == 0 && extractedImage(*it) != 0) {
                 result.setValue(*it, 255);
                 if (!firstFound) firstFound = true;
@@ -68,9 +87,10 @@ compute2D_profile(const RealPoint &normalDir, double widthImageScan,
 }
 
 
+template <typename TVolume>
 Image2D 
 compute2D_profile(const RealPoint &normalDir, double widthImageScan,
-                                  const Image3D &meshVolImage,
+                                  const TVolume &meshVolImage,
                                   const Image2D::Domain &aDomain2D, int maxScan) {
     Point ptC = (meshVolImage.domain().lowerBound() + meshVolImage.domain().upperBound()) / 2;
     Point center = moveCenterAlongDirection(ptC, -normalDir, maxScan);
@@ -81,15 +101,14 @@ compute2D_profile(const RealPoint &normalDir, double widthImageScan,
     DGtal::functors::Point2DEmbedderIn3D<Z3i::Domain> embedder(
         meshVolImage.domain(), center, normalDir, widthImageScan);
         
-    DGtal::functors::Identity idV;
-    ImageAdapterExtractor extractedImage(meshVolImage, aDomain2D, embedder, idV);
+    VolumeSlice<TVolume> extractedImage{meshVolImage, embedder};
 
     int k = 0;
     bool firstFound = false;
 
     while (k < maxScan || !firstFound) {
         embedder.shiftOriginPoint(normalDir);
-        for (auto it = extractedImage.domain().begin(); it != extractedImage.domain().end(); ++it) {
+        for (auto it = aDomain2D.begin(); it != aDomain2D.end(); ++it) {
             if (result(*it) == 0 && extractedImage(*it) != 0) {
                 result.setValue(*it, 255);
                 if (!firstFound) firstFound = true;
@@ -101,9 +120,10 @@ compute2D_profile(const RealPoint &normalDir, double widthImageScan,
     return result;
 }
 
+template <typename TVolume>
 Image2D 
 compute2D_profile(const RealPoint &normalDir, Z3i::RealPoint secDir, double widthImageScan,
-                                  const Image3D &meshVolImage,
+                                  const TVolume &meshVolImage,
                                   const Image2D::Domain &aDomain2D, int maxScan){
 
     Point ptC = (meshVolImage.domain().lowerBound() + meshVolImage.domain().upperBound()) / 2;
@@ -117,17 +137,15 @@ compute2D_profile(const RealPoint &normalDir, Z3i::RealPoint secDir, double widt
     //embedder 3D to 2D (loop over 3d volume by image loop)
     DGtal::functors::Point2DEmbedderIn3D<DGtal::Z3i::Domain >  embedder(
         meshVolImage.domain(), center, normalDir, secDir, widthImageScan);
-    //identity (but we can make rotate or translate here)
-    DGtal::functors::Identity idV;
-    //extractor 3d to 2D
-    ImageAdapterExtractor extractedImage(meshVolImage, aDomain2D, embedder, idV);
+    //lecture du volume dans le plan (3D vers 2D)
+    VolumeSlice<TVolume> extractedImage{meshVolImage, embedder};
 
     int k = 0;
     bool firstFound = false;
 
     while (k < maxScan || !firstFound) {
         embedder.shiftOriginPoint(normalDir);
-        for (auto it = extractedImage.domain().begin(); it != extractedImage.domain().end(); ++it) {
+        for (auto it = aDomain2D.begin(); it != aDomain2D.end(); ++it) {
             if (result(*it) == 0 && extractedImage(*it) != 0) {
                 result.setValue(*it, 255);
                 if (!firstFound) firstFound = true;
@@ -138,4 +156,131 @@ compute2D_profile(const RealPoint &normalDir, Z3i::RealPoint secDir, double widt
  
 
     return result;
-}
\ No newline at end of file
+}
+
+
+// -----------------------------------------------------------------------------
+// Projection directe (--projection direct)
+// -----------------------------------------------------------------------------
+// Au pas j du balayage, l'embedder associe au pixel (x, y) le voxel
+//     p_j(x, y) = A_j(x) + B(y),
+// avec A_j(x) = floor(x * axe1 + origine_j) et B(y) = floor(y * axe2) (les
+// deux termes sont arrondis séparément par Point2DEmbedderIn3D). Au lieu de
+// parcourir tout le plan à chaque pas, chaque voxel occupé est inversé : les
+// (x, y, j) candidats sont ceux dont la position continue est à moins d'un
+// arrondi du voxel (au plus 4 valeurs par coordonnée), puis vérifiés
+// exactement sur les tables A et B lues sur l'embedder lui-même. Le pixel
+// reçoit le premier pas j où il touche un voxel ; on garde, comme le
+// balayage, les pas jusqu'à (premier pas touché) + maxScan - 1.
+// Coût : nombre de voxels x 64 au lieu de (pas de balayage) x imageSize^2.
+
+template <typename TEmbedder, typename TVoxels>
+Image2D
+project2D_profile(const TEmbedder &embedder, const RealPoint &normalDir,
+                  const TVoxels &voxels, const Image2D::Domain &aDomain2D, int maxScan)
+{
+    const Z2i::Point lo2 = aDomain2D.lowerBound();
+    const Z2i::Point up2 = aDomain2D.upperBound();
+    const int width = up2[0] - lo2[0] + 1;
+    const int height = up2[1] - lo2[1] + 1;
+
+    // Étape 1 : repère du plan lu sur l'embedder (origine entière au pas 0,
+    // axes par deux points lointains, à 1e-6 près)
+    const int far = 1 << 20;
+    const Point origin = embedder(Z2i::Point(0, 0), false);
+    const RealPoint axis1 = RealPoint(embedder(Z2i::Point(far, 0), false) - origin) / double(far);
+    const RealPoint axis2 = RealPoint(embedder(Z2i::Point(0, far), false) - origin) / double(far);
+    const RealPoint step = normalDir / normalDir.dot(normalDir);
+
+    // Position continue - voxel dans [0, 2[ par composante : intervalle des
+    // projections de cet écart sur chaque axe (marge pour les axes approchés)
+    auto spread = [](const RealPoint &u, double &lo, double &hi) {
+        lo = -0.05; hi = 0.05;
+        for (int i = 0; i < 3; ++i) (u[i] < 0 ? lo : hi) += 2 * u[i];
+    };
+    double lo1, hi1, lo2d, hi2d, loj, hij;
+    spread(axis1, lo1, hi1);
+    spread(axis2, lo2d, hi2d);
+    spread(step, loj, hij);
+
+    // Étape 2 : pas maximal utile
+    int maxStep = 0;
+    for (const auto &v : voxels) {
+        RealPoint d = RealPoint(v - origin);
+        maxStep = std::max(maxStep, (int)std::floor(d.dot(step) + hij));
+    }
+
+    // Étape 3 : tables exactes A_j(x) (embedder décalé j fois, comme le balayage) et B(y)
+    std::vector<Point> A((size_t)(maxStep + 1) * width);
+    TEmbedder shifted = embedder;
+    for (int j = 1; j <= maxStep; ++j) {
+        shifted.shiftOriginPoint(normalDir);
+        for (int x = 0; x < width; ++x)
+            A[(size_t)j * width + x] = shifted(Z2i::Point(lo2[0] + x, 0), false);
+    }
+    std::vector<Point> B(height);
+    for (int y = 0; y < height; ++y)
+        B[y] = embedder(Z2i::Point(0, lo2[1] + y), false) - origin;
+
+    // Étape 4 : premier pas touché de chaque pixel
+    std::vector<int> firstStep((size_t)width * height, INT_MAX);
+    int first = INT_MAX;
+    for (const auto &v : voxels) {
+        RealPoint d = RealPoint(v - origin);
+        double t1 = d.dot(axis1) - lo2[0], t2 = d.dot(axis2) - lo2[1], tj = d.dot(step);
+        int x0 = std::max(0, (int)std::ceil(t1 + lo1)), x1 = std::min(width - 1, (int)std::floor(t1 + hi1));
+        int y0 = std::max(0, (int)std::ceil(t2 + lo2d)), y1 = std::min(height - 1, (int)std::floor(t2 + hi2d));
+        int j0 = std::max(1, (int)std::ceil(tj + loj)), j1 = std::min(maxStep, (int)std::floor(tj + hij));
+        for (int j = j0; j <= j1; ++j)
+            for (int x = x0; x <= x1; ++x) {
+                const Point &a = A[(size_t)j * width + x];
+                for (int y = y0; y <= y1; ++y) {
+                    if (a + B[y] != v) continue;
+                    int &s = firstStep[(size_t)y * width + x];
+                    s = std::min(s, j);
+                    first = std::min(first, j);
+                }
+            }
+    }
+
+    // Étape 5 : silhouette (pixels touchés avant la fin du balayage)
+    Image2D result(aDomain2D);
+    const long last = first == INT_MAX ? -1 : (long)first + std::max(maxScan, 1) - 1;
+    for (int y = 0; y < height; ++y)
+        for (int x = 0; x < width; ++x)
+            result.setValue(Z2i::Point(lo2[0] + x, lo2[1] + y),
+                            firstStep[(size_t)y * width + x] <= last ? 255 : 0);
+    return result;
+}
+
+// Même silhouette que compute2D_profile(normalDir, widthImageScan, meshVolImage,
+// aDomain2D, maxScan), à partir des voxels occupés de meshVolImage
+// (DigitalSet, BitVolume ou conteneur de points).
+template <typename TVolume, typename TVoxels>
+Image2D
+compute2D_profile_direct(const RealPoint &normalDir, double widthImageScan,
+                         const TVolume &meshVolImage, const TVoxels &voxels,
+                         const Image2D::Domain &aDomain2D, int maxScan)
+{
+    // Les points du plan hors du volume lisent le point par défaut (0, 0, 0)
+    // de l'embedder : s'il est occupé, seul le balayage donne le même résultat
+    const Point defaultPoint(0, 0, 0);
+    if (meshVolImage.domain().isInside(defaultPoint) && meshVolImage(defaultPoint) != 0)
+        return compute2D_profile(normalDir, widthImageScan, meshVolImage, aDomain2D, maxScan);
+
+    Point ptC = (meshVolImage.domain().lowerBound() + meshVolImage.domain().upperBound()) / 2;
+    Point center = moveCenterAlongDirection(ptC, -normalDir, maxScan);
+    DGtal::functors::Point2DEmbedderIn3D<Z3i::Domain> embedder(
+        meshVolImage.domain(), center, normalDir, widthImageScan);
+    return project2D_profile(embedder, normalDir, voxels, aDomain2D, maxScan);
+}
+
+// Nombre de pixels différents entre deux silhouettes de même domaine.
+inline unsigned int
+countDifferentPixels(const Image2D &a, const Image2D &b)
+{
+    unsigned int n = 0;
+    for (auto it = a.domain().begin(); it != a.domain().end(); ++it)
+        if ((a(*it) != 0) != (b(*it) != 0)) ++n;
+    return n;
+}
@@ -0,0 +1,248 @@
+"""
+Étude d'ablation des groupes de caractéristiques LIP.
+
+Les groupes sont déduits de la description des colonnes : schéma
+caracs_schema.json écrit avec les caracs, ou à défaut feature_layout et les
+options --stats, --mode... Une vue (m, s, t), une signature
+(LIP0 à LIP5, toutes vues), une statistique, la circularité ou l'orientation
+merit. Pour chaque groupe, une forêt aléatoire est apprise :
+    - keep : sur les seules colonnes du groupe ;
+    - drop : sur toutes les colonnes sauf celles du groupe (leave-one-group-out).
+Une forêt sur toutes les colonnes sert de référence. --columns et
+--exclude_columns restreignent l'étude à une partie des colonnes (par nom).
+
+Les matrices d'apprentissage et de test sont écrites une fois en float32
+dans des fichiers .npy temporaires ; les groupes sont répartis sur des
+processus (joblib) qui les ouvrent en mémoire mappée, sans copie de la
+matrice complète par processus.
+
+Usage :
+    python ablation.py EXP/defaut --use_orientation_merit --modes keep drop -j 8 -o ablation.csv
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import classification_report
+
+import lip_profiling
+import lip_store
+import make_custom_feature_file
+
+MODES = ("keep", "drop")
+GROUP_KINDS = ("view", "lip", "stat", "extra")
+
+
+def add_layout_arguments(parser):
+    """
+    Ajoute les options décrivant le vecteur de caractéristiques (mêmes noms
+    que make_custom_feature_file.py et run_pipeline.py).
+    """
+    parser.add_argument("--use_circularity", action="store_true", help="Features include circularity")
+    parser.add_argument("--use_orientation_merit", action="store_true", help="Features include orientation merit")
+    parser.add_argument("--stats", type=str, nargs="+", default=["max", "min", "median"],
+                        help="Statistiques locales (max, min, median, mean, std)")
+    parser.add_argument("--mode", type=str, default="default",
+                        choices=["default", "ref_by_LIP0", "ref_by_LIP0_fft"], help="Mode de local_features")
+    parser.add_argument("--n_representatives", type=int, default=10,
+                        help="Représentants par signature du mode ref_by_LIP0_fft")
+
+
+def layout_from_args(args):
+    return make_custom_feature_file.feature_layout(args.stats, args.mode, args.use_circularity,
+                                                   args.use_orientation_merit, args.n_representatives)
+
+
+def feature_groups(layout, kinds=GROUP_KINDS):
+    """
+    Groupes de colonnes d'une description feature_layout.
+
+    Parameters:
+        layout (list): Description des colonnes.
+        kinds (tuple): Types de groupes : "view" (view:m), "lip" (lip:LIP0),
+                       "stat" (stat:max) et "extra" (circularity,
+                       orientation_merit).
+
+    Returns:
+        dict: Nom du groupe -> indices des colonnes (ndarray).
+    """
+    groups = {}
+    for i, column in enumerate(layout):
+        if column["lip"] is None:
+            if "extra" in kinds:
+                groups.setdefault(column["stat"], []).append(i)
+            continue
+        if "view" in kinds:
+            groups.setdefault("view:" + column["view"], []).append(i)
+        if "lip" in kinds:
+            groups.setdefault(f"lip:LIP{column['lip']}", []).append(i)
+        if "stat" in kinds:
+            groups.setdefault("stat:" + column["stat"], []).append(i)
+    return {name: np.array(indices) for name, indices in groups.items()}
+
+
+def _evaluate(train_path, test_path, y_train, y_test, columns, params, n_jobs, random_state, profile):
+    """
+    Apprend et évalue une forêt sur les colonnes données (exécuté dans un
+    processus du pool, matrices ouvertes en mémoire mappée).
+    """
+    if profile is not None and not lip_profiling.enabled():
+        lip_profiling.configure(*profile)
+    X_train = np.load(train_path, mmap_mode="r")
+    X_test = np.load(test_path, mmap_mode="r")
+    model = RandomForestClassifier(**params, random_state=random_state, n_jobs=n_jobs)
+    with lip_profiling.stage("fit", n=len(y_train), columns=len(columns)):
+        model.fit(np.ascontiguousarray(X_train[:, columns]), y_train)
+    with lip_profiling.stage("predict", n=len(y_test), columns=len(columns)):
+        y_pred = model.predict(np.ascontiguousarray(X_test[:, columns]))
+    return y_pred, lip_profiling.drain()
+
+
+def run_ablation(X_train, y_train, X_test, y_test, groups, params=None, modes=MODES, n_jobs=-1,
+                 model_jobs=1, random_state=42, class_names=None, profile=None):
+    """
+    Évalue la référence puis chaque groupe dans chaque mode, en parallèle.
+
+    Parameters:
+        X_train, X_test (ndarray): Caractéristiques (converties en float32).
+        y_train, y_test (ndarray): Labels.
+        groups (dict): Nom -> indices des colonnes (voir feature_groups).
+        params (dict): Hyperparamètres de RandomForestClassifier.
+        modes (tuple): "keep" et/ou "drop".
+        n_jobs (int): Groupes évalués en parallèle.
+        model_jobs (int): Processus par forêt.
+        class_names (list): Noms des classes (ordre des labels triés).
+        profile (tuple): Paramètres de lip_profiling.configure des processus
+                    du pool (chronométrage de fit et predict).
+
+    Returns:
+        list: Un dict par évaluation : "group", "mode", "n_features",
+        "accuracy", "macro_f1" et le F1 de chaque classe.
+    """
+    params = dict(params or {})
+    y_train = np.asarray(y_train).ravel()
+    y_test = np.asarray(y_test).ravel()
+    n_features = np.shape(X_train)[1]
+    tasks = [("all", "baseline", np.arange(n_features))]
+    for name, columns in groups.items():
+        if "keep" in modes:
+            tasks.append((name, "keep", columns))
+        if "drop" in modes and len(columns) < n_features:
+            tasks.append((name, "drop", np.setdiff1d(np.arange(n_features), columns)))
+
+    with tempfile.TemporaryDirectory(prefix="lip_ablation_") as tmp:
+        train_path = os.path.join(tmp, "train.npy")
+        test_path = os.path.join(tmp, "test.npy")
+        np.save(train_path, np.asarray(X_train, dtype=np.float32))
+        np.save(test_path, np.asarray(X_test, dtype=np.float32))
+        outputs = Parallel(n_jobs=n_jobs)(
+            delayed(_evaluate)(train_path, test_path, y_train, y_test, columns, params, model_jobs, random_state,
+                              profile)
+            for _, _, columns in tasks)
+
+    labels = np.unique(np.concatenate([y_train, y_test]))
+    names = [str(c) for c in (class_names if class_names is not None else labels)]
+    results = []
+    for (group, mode, columns), (y_pred, timings) in zip(tasks, outputs):
+        lip_profiling.merge(timings)
+        report = classification_report(y_test, y_pred, labels=labels, target_names=names, output_dict=True,
+                                        zero_division=0.0)
+        entry = {"group": group, "mode": mode, "n_features": int(len(columns)),
+                 "accuracy": float(np.mean(y_pred == y_test)), "macro_f1": report["macro avg"]["f1-score"]}
+        entry.update({name: report[name]["f1-score"] for name in names})
+        results.append(entry)
+    return results
+
+
+def plot_results(results, class_names, output_path):
+    """
+    Carte des F1 par classe (une ligne par groupe et mode).
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    rows = [f"{r['mode']}:{r['group']}" for r in results]
+    values = np.array([[r[name] for name in class_names] for r in results])
+    fig, ax = plt.subplots(figsize=(max(8, 0.6 * len(class_names) + 4), max(4, 0.35 * len(rows) + 2)))
+    im = ax.imshow(values, cmap="YlGnBu", vmin=0, vmax=1, aspect="auto")
+    ax.set_xticks(range(len(class_names)), class_names, rotation=45, ha="right")
+    ax.set_yticks(range(len(rows)), rows)
+    for i in range(values.shape[0]):
+        for j in range(values.shape[1]):
+            ax.text(j, i, f"{values[i, j]:.2f}", ha="center", va="center", fontsize=7)
+    fig.colorbar(im, ax=ax)
+    ax.set_title("Ablation Study - F1-score par classe")
+    fig.tight_layout()
+    fig.savefig(output_path)
+    plt.close(fig)
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Étude d'ablation parallèle des groupes de caractéristiques LIP.")
+    parser.add_argument("exp_dir", type=str, help="Répertoire contenant {train,test}_{caracs,labels}.{npy,txt}")
+    add_layout_arguments(parser)
+    make_custom_feature_file.add_column_arguments(parser)
+    parser.add_argument("--groups", type=str, nargs="+", default=list(GROUP_KINDS), choices=GROUP_KINDS,
+                        help="Types de groupes évalués")
+    parser.add_argument("--modes", type=str, nargs="+", default=list(MODES), choices=MODES,
+                        help="keep : groupe seul ; drop : tout sauf le groupe")
+    parser.add_argument("-p", "--params", type=str, help="Hyperparamètres (JSON de train_randomForest2.py / rf_search.py)")
+    parser.add_argument("-c", "--classes", type=str, nargs="+", help="Noms des classes, dans l'ordre des labels")
+    parser.add_argument("-j", "--jobs", type=int, default=-1, help="Groupes évalués en parallèle")
+    parser.add_argument("--model_jobs", type=int, default=1, help="Processus par forêt")
+    parser.add_argument("-o", "--output", type=str, default="ablation.csv", help="Résultats (CSV)")
+    parser.add_argument("--plot", type=str, help="Carte des F1 par classe (PNG)")
+    lip_profiling.add_arguments(parser)
+    args = parser.parse_args(argv)
+    lip_profiling.configure_from_args(args)
+
+    with lip_profiling.stage("read"):
+        data = {}
+        for subset in ("train", "test"):
+            caracs = lip_store.read_caracs(args.exp_dir, subset)
+            data[subset] = (caracs["features"], caracs["labels"])
+    n_features = data["train"][0].shape[1]
+    try:
+        index, layout = make_custom_feature_file.columns_from_args(args, args.exp_dir, n_features)
+    except ValueError as e:
+        parser.error(str(e))
+    if layout is None:
+        # Pas de schéma : description déduite des options
+        layout = layout_from_args(args)
+        if len(layout) != n_features:
+            parser.error(f"{n_features} colonnes dans les caracs, {len(layout)} attendues "
+                         "avec ces options (--stats, --mode, --use_circularity, --use_orientation_merit)")
+    else:
+        data = {subset: (X[:, index], y) for subset, (X, y) in data.items()}
+
+    params = {}
+    if args.params:
+        with open(args.params) as f:
+            params = {k: v for k, v in json.load(f).items() if not k.startswith("_")}
+
+    results = run_ablation(*data["train"], *data["test"], feature_groups(layout, args.groups), params,
+                           args.modes, args.jobs, args.model_jobs, class_names=args.classes,
+                           profile=(args.profile, args.profile_sample, args.profile_mode, args.profile_dir)
+                           if args.profile else None)
+    names = [k for k in results[0] if k not in ("group", "mode", "n_features", "accuracy", "macro_f1")]
+    with open(args.output, "w") as f:
+        f.write(",".join(["group", "mode", "n_features", "accuracy", "macro_f1"] + names) + "\n")
+        for r in results:
+            f.write(",".join(str(r[k]) for k in ["group", "mode", "n_features", "accuracy", "macro_f1"] + names) + "\n")
+    for r in results:
+        print(f"[Info] {r['mode']:<9}{r['group']:<22}{r['n_features']:>5} colonnes  "
+              f"accuracy {r['accuracy']:.4f}  macro F1 {r['macro_f1']:.4f}")
+    if args.plot:
+        plot_results(results, names, args.plot)
+    lip_profiling.report()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
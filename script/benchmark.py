@@ -0,0 +1,411 @@
+"""
+Banc de mesure des étapes Python de la chaîne LIP, pour détecter les
+régressions de performance d'une version à l'autre.
+
+Étapes mesurées (temps, débit par objet, pic de mémoire de l'étape) :
+    load            lecture des images de profil (cv2.imread)
+    radon_operator  construction de l'opérateur du backend "matrix"
+    radon           transformée de Radon (un résultat par backend)
+    lip_extraction  calcul des 6 LIP par colonne (compute_lip_signatures)
+    normalisation   décalage / retournement (normalize_signatures)
+    lip_signatures  chaîne complète de lip_signatures_batch (un résultat par
+                    backend)
+    lip_signatures_coarse_to_fine  même chaîne avec recherche grossière-fine
+                    de l'orientation (--coarse)
+    circularity     circularité des trois profils (circularity_batch)
+    fft_representatives  sélection des représentants du mode ref_by_LIP0_fft
+    aggregation     vecteurs de caractéristiques (dataset_feature_matrix)
+    rf_train / rf_predict  forêt aléatoire sur les vecteurs obtenus
+    imProfile:<étape>  étapes C++ relevées dans la sortie d'imProfile (--meshes)
+
+Les backends mesurés sont ceux de --backends ("skimage" par défaut, comme
+lip_sign.py) : l'opérateur du backend "matrix" n'est construit, et écrit dans
+son cache disque, que si ce backend est demandé.
+
+Les images sont des silhouettes générées (disques, ellipses, polygones) pour
+chaque taille de --sizes et chaque nombre d'angles de --angles, ainsi que les
+profils fournis (--examples, par défaut ../visu) ou produits par imProfile à
+partir de maillages (--meshes). Les résultats sont écrits en JSON et
+peuvent être comparés à un run précédent avec --compare.
+
+Usage :
+    python benchmark.py -o bench.json
+    python benchmark.py --sizes 100 200 400 --angles 90 180 360 -n 64 -o bench.json
+    python benchmark.py --meshes ../examples/*.off --imProfile ./imProfile -o bench.json
+    python benchmark.py --compare bench_ref.json -o bench.json
+"""
+
+import argparse
+import glob
+import json
+import os
+import platform
+import re
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+import scipy
+import skimage
+
+import lip_sign
+import make_custom_feature_file
+import radon_backend
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+VIEWS = ("m", "s", "t")
+SHAPES = ("disk", "ellipse", "polygon")
+
+
+def process_peak_rss_mb():
+    """
+    Pic de mémoire résidente du processus depuis son lancement, en Mo
+    (ru_maxrss est en Ko sous Linux, en octets sous macOS). Ce maximum ne
+    redescend jamais : c'est celui de toutes les étapes déjà exécutées, pas
+    celui de l'étape en cours (voir traced_peak_mb).
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024. * 1024.) if sys.platform == "darwin" else peak / 1024.
+
+
+def traced_peak_mb(fn):
+    """
+    Exécute fn sous tracemalloc et renvoie son résultat et le pic, en Mo, des
+    allocations faites pendant l'appel (objets Python et tableaux NumPy, donc
+    SciPy, scikit-image et cv2 ; pas les allocations internes des bibliothèques
+    C), mémoire déjà allouée avant l'appel exclue.
+    """
+    tracemalloc.start()
+    try:
+        out = fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return out, peak / (1024. * 1024.)
+
+
+def synthetic_silhouettes(n_objects, size, seed=0):
+    """
+    Génère des silhouettes binaires (0/255) dont l'emprise est proportionnelle
+    à la taille d'image, comme les profils d'imProfile.
+
+    Parameters:
+        n_objects (int): Nombre d'objets (trois vues chacun).
+        size (int): Taille des images (size x size).
+        seed (int): Graine du générateur.
+
+    Returns:
+        tuple: (images [n_objects, 3, size, size] uint8, classes [n_objects],
+                indice de la forme de la vue m dans SHAPES)
+    """
+    rng = np.random.default_rng(seed)
+    imgs = np.zeros((n_objects, len(VIEWS), size, size), dtype=np.uint8)
+    classes = np.empty(n_objects, dtype=np.int64)
+    center = size // 2
+    for i in range(n_objects):
+        classes[i] = i % len(SHAPES)
+        for v in range(len(VIEWS)):
+            shape = SHAPES[(classes[i] + v) % len(SHAPES)]
+            c = (center + int(rng.integers(-size // 20, size // 20 + 1)),
+                 center + int(rng.integers(-size // 20, size // 20 + 1)))
+            if shape == "disk":
+                cv2.circle(imgs[i, v], c, int(size * rng.uniform(0.15, 0.35)), 255, -1)
+            elif shape == "ellipse":
+                axes = (int(size * rng.uniform(0.1, 0.35)), int(size * rng.uniform(0.1, 0.35)))
+                cv2.ellipse(imgs[i, v], c, axes, float(rng.uniform(0, 180)), 0, 360, 255, -1)
+            else:
+                points = (rng.uniform(0.2, 0.8, size=(int(rng.integers(3, 9)), 2)) * size).astype(np.int32)
+                cv2.fillPoly(imgs[i, v], [cv2.convexHull(points)], 255)
+    return imgs, classes
+
+
+def find_example_profiles(directories):
+    """
+    Cherche les triplets <nom>_{m,s,t}.{pgm,png} dans les répertoires donnés.
+
+    Returns:
+        list: Triplets de chemins (un par objet).
+    """
+    triplets = []
+    for directory in directories:
+        for ext in ("pgm", "png"):
+            for file_m in sorted(glob.glob(os.path.join(directory, "*_m." + ext))):
+                prefix = file_m[:-len("_m." + ext)]
+                files = [prefix + "_" + v + "." + ext for v in VIEWS]
+                if all(os.path.isfile(f) for f in files):
+                    triplets.append(files)
+    return triplets
+
+
+def run_imProfile(meshes, imProfile, output_dir):
+    """
+    Génère les profils des maillages avec imProfile et relève les temps
+    affichés pour chaque étape ("[k] <étape> done in <t> s").
+
+    Returns:
+        tuple: (triplets de chemins produits, {étape: [temps par maillage]})
+    """
+    pattern = re.compile(r"^\[\d+\]\s*(.+?) done in ([0-9.eE+-]+) s")
+    triplets, timings = [], {}
+    for mesh in meshes:
+        prefix = os.path.join(output_dir, os.path.splitext(os.path.basename(mesh))[0])
+        try:
+            result = subprocess.run([imProfile, "-i", mesh, "-o", prefix],
+                                    stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        except OSError as e:
+            print(f"[Warning] imProfile non exécutable : {e}", file=sys.stderr)
+            return triplets, timings
+        files = [prefix + "_" + v + ".pgm" for v in VIEWS]
+        if result.returncode != 0 or not all(os.path.isfile(f) for f in files):
+            print(f"[Warning] échec d'imProfile sur {mesh} : "
+                  f"{result.stderr.decode(errors='replace').strip()}", file=sys.stderr)
+            continue
+        for line in result.stdout.decode(errors="replace").splitlines():
+            match = pattern.match(line.strip())
+            if match:
+                timings.setdefault(match.group(1), []).append(float(match.group(2)))
+        triplets.append(files)
+    return triplets, timings
+
+
+class Benchmark:
+    """
+    Chronométrage des étapes et accumulation des résultats.
+
+    Parameters:
+        repeat (int): Nombre d'exécutions de chaque étape (le meilleur temps est gardé).
+    """
+
+    def __init__(self, repeat=3):
+        self.repeat = repeat
+        self.results = []
+
+    def add(self, stage, seconds, n_objects, stage_peak_mb=None, **context):
+        record = dict(context, stage=stage, n_objects=n_objects, seconds=seconds,
+                      ms_per_object=1000. * seconds / max(n_objects, 1),
+                      objects_per_s=n_objects / seconds if seconds > 0 else None,
+                      stage_peak_mb=stage_peak_mb, process_peak_rss_mb=process_peak_rss_mb())
+        self.results.append(record)
+        label = stage + (f" ({context['backend']})" if context.get("backend") else "")
+        where = f"{context.get('source')} {context.get('image_size')}px {context.get('angles')} angles"
+        peak = f"{stage_peak_mb:10.1f} Mo" if stage_peak_mb is not None else ""
+        print(f"[Info] {label:<28} {where:<32} {record['ms_per_object']:10.3f} ms/objet{peak}")
+        return record
+
+    def run(self, stage, fn, n_objects, **context):
+        """
+        Exécute fn repeat fois, enregistre le meilleur temps et renvoie le
+        résultat de la dernière exécution. Une exécution de plus, hors
+        chronométrage, mesure le pic de mémoire de l'étape (traced_peak_mb).
+        """
+        best = None
+        for _ in range(self.repeat):
+            start = time.perf_counter()
+            out = fn()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        out, stage_peak = traced_peak_mb(fn)
+        self.add(stage, best, n_objects, stage_peak, **context)
+        return out
+
+
+def bench_lip_stages(bench, paths, source, m, ANGLE=180., backends=("skimage",), chunk_size=64, coarse=0):
+    """
+    Mesure les étapes Python sur des objets dont les trois profils sont sur disque.
+
+    Parameters:
+        paths (list): Triplets de chemins des profils.
+        source (str): Origine des images ("synthetic", "examples", "meshes").
+        m (int): Nombre d'angles.
+        backends (tuple): Backends de Radon mesurés (radon, lip_signatures).
+        coarse (int): Angles de la recherche grossière-fine (0 : non mesurée).
+
+    Returns:
+        tuple: (signatures [N, 3, m, 6], images [N, 3, H, W])
+    """
+    n = len(paths)
+    flat = [p for triplet in paths for p in triplet]
+    context = dict(source=source, image_size=cv2.imread(flat[0], 0).shape[-1], angles=m)
+    imgs = bench.run("load", lambda: np.stack([cv2.imread(p, 0) for p in flat]), n, **context)
+    THETA = np.arange(0.0, ANGLE, ANGLE / m)
+
+    sinograms = None
+    for name in backends:
+        if name == "matrix":
+            # Instance sans cache disque : l'opérateur est reconstruit à chaque exécution
+            def build_operator():
+                return radon_backend.MatrixRadon(cache_dir=None).operator(imgs.shape[1:], THETA)
+            bench.run("radon_operator", build_operator, n, backend=name, **context)
+            backend = radon_backend.MatrixRadon(cache_dir=None)
+            backend.operator(imgs.shape[1:], THETA)
+        else:
+            backend = radon_backend.get_radon_backend(name)
+
+        def radon_all():
+            return [backend.batch(imgs[s:s + chunk_size], THETA)[:, radon_backend.rho_window(imgs[s:s + chunk_size])]
+                    for s in range(0, len(imgs), chunk_size)]
+        sinograms = bench.run("radon", radon_all, n, backend=name, **context)
+
+    def extract():
+        return np.concatenate([
+            lip_sign.compute_lip_signatures(sino.transpose(1, 0, 2).reshape(sino.shape[1], -1))
+            .reshape(len(sino), m, 6) for sino in sinograms])
+    raw = bench.run("lip_extraction", extract, n, **context)
+
+    lips = bench.run("normalisation",
+                     lambda: lip_sign.normalize_signatures(raw)[0], n, **context)
+    lips = lips.reshape(n, len(VIEWS), m, 6)
+
+    for name in backends:
+        if name == "matrix":
+            # Opérateur du backend partagé construit (ou lu sur disque) hors mesure
+            radon_backend.get_radon_backend(name).operator(imgs.shape[1:], THETA)
+        bench.run("lip_signatures", lambda: lip_sign.lip_signatures_batch(imgs, ANGLE, m, name, chunk_size), n,
+                  backend=name, **context)
+        if coarse:
+            if name == "matrix":
+                # Première exécution hors mesure : opérateurs des fenêtres et des phases
+                lip_sign.lip_signatures_batch(imgs, ANGLE, m, name, chunk_size, coarse=coarse)
+            bench.run("lip_signatures_coarse_to_fine",
+                      lambda: lip_sign.lip_signatures_batch(imgs, ANGLE, m, name, chunk_size, coarse=coarse), n,
+                      backend=name, coarse=coarse, **context)
+    bench.run("circularity", lambda: make_custom_feature_file.circularity_batch(imgs), n, **context)
+    bench.run("fft_representatives",
+              lambda: make_custom_feature_file.batch_select_lip_representative_indices(lips[..., 0].reshape(-1, m)),
+              n, **context)
+    return lips, imgs.reshape(n, len(VIEWS), *imgs.shape[1:])
+
+
+def bench_classifier(bench, lips, classes, **context):
+    """
+    Mesure l'agrégation des caractéristiques puis l'apprentissage et la
+    prédiction d'une forêt aléatoire (moitié des objets pour chaque).
+    """
+    from sklearn.ensemble import RandomForestClassifier
+
+    n = len(lips)
+    features = bench.run("aggregation",
+                         lambda: make_custom_feature_file.dataset_feature_matrix(lips, use_orientation_merit=True),
+                         n, **context)
+    train = np.arange(n) % 2 == 0
+    model = RandomForestClassifier(n_estimators=100, random_state=42)
+    bench.run("rf_train", lambda: model.fit(features[train], classes[train]), int(train.sum()), **context)
+    bench.run("rf_predict", lambda: model.predict(features[~train]), int((~train).sum()), **context)
+
+
+def write_synthetic(imgs, directory):
+    """
+    Écrit les silhouettes générées en PGM (comme imProfile) et renvoie les triplets de chemins.
+    """
+    paths = []
+    for i, views in enumerate(imgs):
+        triplet = [os.path.join(directory, f"synthetic_{i:04d}_{v}.pgm") for v in VIEWS]
+        for path, img in zip(triplet, views):
+            cv2.imwrite(path, img)
+        paths.append(triplet)
+    return paths
+
+
+def environment(args):
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=SCRIPT_DIR,
+                                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL).stdout.decode().strip()
+    except OSError:
+        commit = ""
+    return {"date": time.strftime("%Y-%m-%dT%H:%M:%S"), "commit": commit or None,
+            "python": platform.python_version(), "numpy": np.__version__, "scipy": scipy.__version__,
+            "skimage": skimage.__version__, "opencv": cv2.__version__, "platform": platform.platform(),
+            "cpu_count": os.cpu_count(), "args": vars(args)}
+
+
+def compare(results, baseline_path):
+    """
+    Affiche, pour chaque mesure présente dans les deux runs, le rapport des
+    temps par objet (courant / référence).
+    """
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+
+    def key(r):
+        return (r["stage"], r.get("source"), r.get("image_size"), r.get("angles"), r.get("backend"))
+    reference = {key(r): r for r in baseline["results"]}
+    print(f"\n{'étape':<24}{'source':<11}{'taille':>7}{'angles':>7}  {'réf. ms':>10}{'ms':>10}{'ratio':>8}")
+    for r in results:
+        ref = reference.get(key(r))
+        if ref is None or not ref["ms_per_object"]:
+            continue
+        label = r["stage"] + (f"/{r['backend']}" if r.get("backend") else "")
+        print(f"{label:<24}{r.get('source') or '':<11}{r.get('image_size') or '':>7}{r.get('angles') or '':>7}  "
+              f"{ref['ms_per_object']:10.3f}{r['ms_per_object']:10.3f}{r['ms_per_object'] / ref['ms_per_object']:8.2f}")
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Banc de mesure des étapes de la chaîne LIP.")
+    parser.add_argument("-o", "--output", type=str, default="benchmark.json", help="Fichier JSON des résultats")
+    parser.add_argument("-n", "--objects", type=int, default=32, help="Nombre d'objets synthétiques par taille")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 200, 400],
+                        help="Tailles d'image (imageSize) des silhouettes synthétiques")
+    parser.add_argument("--angles", type=int, nargs="+", default=[180], help="Nombres d'angles de Radon")
+    parser.add_argument("--coarse", type=int, default=0,
+                        help="Mesure aussi la recherche grossière-fine de l'orientation sur N angles")
+    parser.add_argument("--backends", type=str, nargs="+", default=["skimage"],
+                        choices=sorted(radon_backend.RADON_BACKENDS),
+                        help="Backends de Radon mesurés (l'opérateur de \"matrix\" n'est construit que s'il est demandé)")
+    parser.add_argument("--repeat", type=int, default=3, help="Exécutions par étape (meilleur temps gardé)")
+    parser.add_argument("--examples", type=str, nargs="*", default=[os.path.join(SCRIPT_DIR, "..", "visu")],
+                        help="Répertoires de profils <nom>_{m,s,t}.{pgm,png} existants")
+    parser.add_argument("--meshes", type=str, nargs="*", default=[], help="Maillages .off passés à imProfile")
+    parser.add_argument("--imProfile", type=str, default=os.path.join(SCRIPT_DIR, "imProfile"),
+                        help="Chemin vers l'exécutable imProfile (avec --meshes)")
+    parser.add_argument("--no_rf", action="store_true", help="Ne pas mesurer l'agrégation et la forêt aléatoire")
+    parser.add_argument("--compare", type=str, help="Run de référence (JSON) à comparer")
+    parser.add_argument("--seed", type=int, default=0, help="Graine des silhouettes synthétiques")
+    args = parser.parse_args(argv)
+
+    bench = Benchmark(args.repeat)
+    with tempfile.TemporaryDirectory(prefix="lip_bench_") as tmp:
+        for size in args.sizes:
+            imgs, classes = synthetic_silhouettes(args.objects, size, args.seed)
+            directory = os.path.join(tmp, f"synthetic_{size}")
+            os.makedirs(directory)
+            paths = write_synthetic(imgs, directory)
+            for m in args.angles:
+                lips, _ = bench_lip_stages(bench, paths, "synthetic", m, backends=args.backends, coarse=args.coarse)
+                if not args.no_rf:
+                    bench_classifier(bench, lips, classes, source="synthetic", image_size=size, angles=m)
+
+        example_sources = [("examples", find_example_profiles(args.examples))]
+        if args.meshes:
+            mesh_dir = os.path.join(tmp, "meshes")
+            os.makedirs(mesh_dir)
+            triplets, timings = run_imProfile(args.meshes, args.imProfile, mesh_dir)
+            for stage, values in timings.items():
+                bench.add("imProfile:" + stage, float(np.mean(values)), 1, source="meshes")
+            example_sources.append(("meshes", triplets))
+        for source, triplets in example_sources:
+            if not triplets:
+                continue
+            # Les profils réels peuvent avoir des tailles différentes : une mesure par taille
+            by_size = {}
+            for triplet in triplets:
+                by_size.setdefault(cv2.imread(triplet[0], 0).shape, []).append(triplet)
+            for group in by_size.values():
+                for m in args.angles:
+                    bench_lip_stages(bench, group, source, m, backends=args.backends, coarse=args.coarse)
+
+    report = {"environment": environment(args), "results": bench.results}
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"[Info] {len(bench.results)} mesures écrites dans {args.output}")
+
+    if args.compare:
+        compare(bench.results, args.compare)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
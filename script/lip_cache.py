@@ -0,0 +1,178 @@
+"""
+Cache incrémental, adressé par contenu, des étapes de la chaîne LIP.
+
+Chaque entrée est identifiée par une clef SHA-256 calculée à partir du nom de
+l'étape, du contenu des fichiers d'entrée et des paramètres qui influencent le
+résultat (nombre d'angles, statistiques, mode, options...). Une étape dont la
+clef est déjà présente n'est pas recalculée.
+
+Organisation sur disque :
+    cache_dir/<etape>/<clef>/...   fichiers de l'entrée
+    cache_dir/manifest.json        taille et dernier accès de chaque entrée
+
+Les workers ne lisent et n'écrivent que les répertoires d'entrée (écriture
+atomique par renommage) ; seul le processus principal met à jour le manifest
+et applique l'éviction par taille (LRU).
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+
+MANIFEST = "manifest.json"
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """
+    Empreinte SHA-256 du contenu d'un fichier.
+    """
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def data_digest(data):
+    """
+    Empreinte SHA-256 de données en mémoire (octets ou tableau NumPy).
+    """
+    return hashlib.sha256(bytes(memoryview(data))).hexdigest()
+
+
+def make_key(stage, digests, params=None):
+    """
+    Clef d'une entrée de cache.
+
+    Parameters:
+        stage (str): Nom de l'étape (ex. "profiles", "lip", "features").
+        digests (list): Empreintes des entrées (fichiers ou clefs amont).
+        params (dict): Paramètres qui influencent le résultat.
+
+    Returns:
+        str: Clef hexadécimale.
+    """
+    h = hashlib.sha256()
+    h.update(stage.encode())
+    for digest in digests:
+        h.update(digest.encode())
+    h.update(json.dumps(params or {}, sort_keys=True).encode())
+    return h.hexdigest()
+
+
+class LipCache:
+    """
+    Cache d'étapes sur disque.
+
+    Parameters:
+        cache_dir (str): Répertoire racine du cache.
+        force (bool): Ignore les entrées existantes (elles sont recalculées
+                      et remplacées).
+    """
+
+    def __init__(self, cache_dir, force=False):
+        self.cache_dir = cache_dir
+        self.force = force
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def entry_dir(self, stage, key):
+        return os.path.join(self.cache_dir, stage, key)
+
+    def get(self, stage, key):
+        """
+        Retourne le répertoire de l'entrée si elle existe (et que force n'est
+        pas demandé), None sinon.
+        """
+        path = self.entry_dir(stage, key)
+        if self.force or not os.path.isdir(path):
+            return None
+        return path
+
+    def put(self, stage, key, files=None, data=None):
+        """
+        Ajoute une entrée de façon atomique.
+
+        Parameters:
+            files (dict): nom dans l'entrée -> chemin du fichier à copier.
+            data (dict): nom dans l'entrée -> contenu (bytes ou str) à écrire.
+
+        Returns:
+            str: Répertoire de l'entrée.
+        """
+        os.makedirs(os.path.join(self.cache_dir, stage), exist_ok=True)
+        tmp = tempfile.mkdtemp(dir=os.path.join(self.cache_dir, stage), prefix=".tmp-")
+        for name, src in (files or {}).items():
+            shutil.copyfile(src, os.path.join(tmp, name))
+        for name, content in (data or {}).items():
+            mode = "wb" if isinstance(content, bytes) else "w"
+            with open(os.path.join(tmp, name), mode) as f:
+                f.write(content)
+        path = self.entry_dir(stage, key)
+        if os.path.isdir(path):
+            # Ancienne entrée (--force) : déplacée avant suppression pour ne
+            # pas entrer en concurrence avec un autre worker sur la même clef
+            trash = tempfile.mkdtemp(dir=os.path.join(self.cache_dir, stage), prefix=".old-")
+            try:
+                os.replace(path, os.path.join(trash, key))
+            except OSError:
+                pass
+            shutil.rmtree(trash, ignore_errors=True)
+        try:
+            os.replace(tmp, path)
+        except OSError:
+            # Entrée écrite en parallèle par un autre worker
+            shutil.rmtree(tmp, ignore_errors=True)
+        return path
+
+    def load_manifest(self):
+        path = os.path.join(self.cache_dir, MANIFEST)
+        if not os.path.isfile(path):
+            return {}
+        with open(path) as f:
+            return json.load(f)
+
+    def update_manifest(self, used_entries, max_size=None):
+        """
+        Met à jour le manifest avec les entrées utilisées pendant le run puis
+        évince les entrées les moins récemment utilisées tant que la taille
+        totale dépasse max_size (en octets).
+
+        Parameters:
+            used_entries (iterable): Couples (stage, key) lus ou écrits.
+            max_size (int): Taille maximale du cache, None pour illimitée.
+
+        Returns:
+            list: Entrées évincées.
+        """
+        manifest = self.load_manifest()
+        now = time.time()
+        for stage, key in used_entries:
+            path = self.entry_dir(stage, key)
+            if not os.path.isdir(path):
+                continue
+            size = sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+            manifest[stage + "/" + key] = {"stage": stage, "size": size, "last_access": now}
+
+        # Entrées disparues du disque
+        manifest = {name: entry for name, entry in manifest.items()
+                    if os.path.isdir(os.path.join(self.cache_dir, name))}
+
+        evicted = []
+        if max_size is not None:
+            total = sum(entry["size"] for entry in manifest.values())
+            for name in sorted(manifest, key=lambda n: manifest[n]["last_access"]):
+                if total <= max_size:
+                    break
+                shutil.rmtree(os.path.join(self.cache_dir, name), ignore_errors=True)
+                total -= manifest[name]["size"]
+                evicted.append(name)
+                del manifest[name]
+
+        tmp = os.path.join(self.cache_dir, MANIFEST + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump(manifest, f, indent=1, sort_keys=True)
+        os.replace(tmp, os.path.join(self.cache_dir, MANIFEST))
+        return evicted
@@ -0,0 +1,257 @@
+"""
+Instrumentation optionnelle des scripts LIP : chronomètres par étape,
+compteurs et profilage (cProfile / tracemalloc) d'un échantillon d'objets.
+
+Désactivée par défaut (les chronomètres ne coûtent alors qu'un appel de
+fonction). Activation par l'option --profile des scripts ou par variables
+d'environnement :
+    LIP_PROFILE=table                 tableau récapitulatif sur stderr en fin de run
+    LIP_PROFILE=jsonl:<fichier>       une ligne JSON par mesure, puis une ligne de synthèse
+    LIP_PROFILE_SAMPLE=N              profile un objet sur N (0 : aucun)
+    LIP_PROFILE_MODE=cprofile|tracemalloc
+    LIP_PROFILE_DIR=<répertoire>      fichiers .prof de cProfile (défaut : .)
+
+Utilisation dans le code :
+    with lip_profiling.stage("radon", n=len(imgs)):
+        ...
+    lip_profiling.count("cache_hit:lip")
+    with lip_profiling.profile_object(name, index):
+        ...traitement d'un objet...
+
+Les mesures s'accumulent dans le processus qui les produit. Avec un pool de
+processus, chaque worker renvoie drain() avec ses résultats et le processus
+principal appelle merge() : seul ce dernier écrit le fichier JSON lines et la
+synthèse (report()).
+"""
+
+import contextlib
+import cProfile
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+SAMPLE_MODES = ("cprofile", "tracemalloc")
+
+_config = {"format": None, "path": None, "sample": 0, "mode": "cprofile", "profile_dir": "."}
+# Réglages valides lus dans les variables LIP_PROFILE* (défauts des options)
+_env = {"spec": None, "sample": 0, "mode": "cprofile", "profile_dir": "."}
+_pending = []
+_stats = {}
+_counters = {}
+_output = None
+
+
+def configure(spec=None, sample=0, mode="cprofile", profile_dir="."):
+    """
+    Active ou désactive l'instrumentation.
+
+    Parameters:
+        spec (str): "table", "jsonl:<fichier>" ou None / "" pour désactiver.
+        sample (int): Profile un objet sur sample (0 : aucun).
+        mode (str): "cprofile" ou "tracemalloc".
+        profile_dir (str): Répertoire des fichiers .prof.
+    """
+    global _output
+    if mode not in SAMPLE_MODES:
+        raise ValueError(f"Mode de profilage '{mode}' non reconnu. Utilisez {' ou '.join(SAMPLE_MODES)}.")
+    if _output is not None:
+        _output.close()
+        _output = None
+    fmt, path = None, None
+    if spec:
+        fmt, _, path = spec.partition(":")
+        if fmt not in ("table", "jsonl"):
+            raise ValueError(f"Sortie de profilage '{spec}' non reconnue. Utilisez table ou jsonl:<fichier>.")
+        if fmt == "jsonl" and not path:
+            raise ValueError("jsonl nécessite un fichier : jsonl:<fichier>.")
+    _config.update(format=fmt, path=path or None, sample=int(sample or 0), mode=mode, profile_dir=profile_dir)
+    _pending.clear()
+    _stats.clear()
+    _counters.clear()
+
+
+def configure_from_env():
+    """
+    Configure l'instrumentation depuis les variables LIP_PROFILE*. Appelée à
+    l'import : une valeur invalide (ex. LIP_PROFILE=jsonl:) ne doit pas
+    empêcher l'import du module, elle est signalée sur stderr et
+    l'instrumentation reste désactivée.
+    """
+    settings = {"spec": os.environ.get("LIP_PROFILE"), "sample": os.environ.get("LIP_PROFILE_SAMPLE", 0),
+                "mode": os.environ.get("LIP_PROFILE_MODE", "cprofile"),
+                "profile_dir": os.environ.get("LIP_PROFILE_DIR", ".")}
+    try:
+        configure(**settings)
+        settings["sample"] = int(settings["sample"] or 0)
+    except ValueError as e:
+        print(f"[Warning] Variables LIP_PROFILE* ignorées, profilage désactivé : {e}", file=sys.stderr)
+        settings = {"spec": None, "sample": 0, "mode": "cprofile", "profile_dir": settings["profile_dir"]}
+        configure(**settings)
+    _env.update(settings)
+
+
+def add_arguments(parser):
+    """
+    Ajoute les options --profile, --profile_sample, --profile_mode et
+    --profile_dir à un parser argparse (valeurs par défaut : variables
+    d'environnement LIP_PROFILE* si elles sont valides, voir
+    configure_from_env).
+    """
+    parser.add_argument("--profile", type=str, default=_env["spec"],
+                        help="Chronométrage des étapes : table ou jsonl:<fichier>")
+    parser.add_argument("--profile_sample", type=int, default=_env["sample"],
+                        help="Profile un objet sur N (cProfile ou tracemalloc)")
+    parser.add_argument("--profile_mode", type=str, default=_env["mode"],
+                        choices=SAMPLE_MODES, help="Profilage des objets échantillonnés")
+    parser.add_argument("--profile_dir", type=str, default=_env["profile_dir"],
+                        help="Répertoire des fichiers .prof")
+
+
+def configure_from_args(args):
+    configure(args.profile, args.profile_sample, args.profile_mode, args.profile_dir)
+
+
+def enabled():
+    return _config["format"] is not None
+
+
+@contextlib.contextmanager
+def stage(name, **fields):
+    """
+    Chronomètre une étape. Les champs supplémentaires (objet, taille du lot...)
+    sont recopiés dans la ligne JSON de la mesure.
+    """
+    if _config["format"] is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _pending.append(dict(fields, stage=name, seconds=time.perf_counter() - start, pid=os.getpid()))
+
+
+def count(name, n=1):
+    """
+    Incrémente un compteur (ex. entrées de cache réutilisées).
+    """
+    if _config["format"] is not None:
+        _pending.append({"counter": name, "value": n, "pid": os.getpid()})
+
+
+@contextlib.contextmanager
+def profile_object(name, index):
+    """
+    Profile le traitement d'un objet s'il fait partie de l'échantillon
+    (index multiple de LIP_PROFILE_SAMPLE) : fichier <profile_dir>/<name>.prof
+    avec cProfile, pic et principales allocations avec tracemalloc.
+    """
+    sample = _config["sample"]
+    if _config["format"] is None or sample <= 0 or index % sample:
+        yield
+        return
+    if _config["mode"] == "cprofile":
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            os.makedirs(_config["profile_dir"], exist_ok=True)
+            path = os.path.join(_config["profile_dir"], name + ".prof")
+            profiler.dump_stats(path)
+            _pending.append({"profile": "cprofile", "object": name, "file": path, "pid": os.getpid()})
+    else:
+        started = not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        try:
+            yield
+        finally:
+            _, peak = tracemalloc.get_traced_memory()
+            top = tracemalloc.take_snapshot().statistics("lineno")[:10]
+            if started:
+                tracemalloc.stop()
+            _pending.append({"profile": "tracemalloc", "object": name, "peak_mb": peak / 2 ** 20,
+                             "top": [{"where": str(s.traceback), "size_kb": s.size / 1024.} for s in top],
+                             "pid": os.getpid()})
+
+
+def drain():
+    """
+    Retourne et oublie les mesures du processus courant (à renvoyer au
+    processus principal depuis un worker).
+    """
+    records = list(_pending)
+    _pending.clear()
+    return records
+
+
+def merge(records):
+    """
+    Intègre des mesures (de ce processus ou d'un worker) à la synthèse et les
+    écrit dans le fichier JSON lines.
+    """
+    global _output
+    if _config["format"] is None or not records:
+        return
+    if _config["format"] == "jsonl":
+        if _output is None:
+            _output = open(_config["path"], "a")
+        for record in records:
+            _output.write(json.dumps(record) + "\n")
+        _output.flush()
+    for record in records:
+        if "stage" in record:
+            s = _stats.setdefault(record["stage"], {"count": 0, "total": 0., "min": float("inf"), "max": 0.})
+            s["count"] += 1
+            s["total"] += record["seconds"]
+            s["min"] = min(s["min"], record["seconds"])
+            s["max"] = max(s["max"], record["seconds"])
+        elif "counter" in record:
+            _counters[record["counter"]] = _counters.get(record["counter"], 0) + record["value"]
+
+
+def flush():
+    merge(drain())
+
+
+def summary():
+    """
+    Synthèse du run : par étape nombre d'appels, temps total, moyen, min et max.
+    """
+    stages = {name: dict(s, mean=s["total"] / s["count"]) for name, s in _stats.items()}
+    return {"stages": stages, "counters": dict(_counters)}
+
+
+def report(file=sys.stderr):
+    """
+    Écrit la synthèse : tableau (format table) ou dernière ligne du fichier
+    JSON lines (format jsonl). Sans effet si l'instrumentation est désactivée.
+    """
+    global _output
+    if _config["format"] is None:
+        return
+    flush()
+    result = summary()
+    if _config["format"] == "jsonl":
+        if _output is None:
+            _output = open(_config["path"], "a")
+        _output.write(json.dumps({"summary": result}) + "\n")
+        _output.close()
+        _output = None
+        return
+    total = sum(s["total"] for s in result["stages"].values()) or 1.
+    print(f"\n{'étape':<22}{'appels':>8}{'total (s)':>12}{'moyen (ms)':>12}{'min (ms)':>10}{'max (ms)':>10}{'%':>7}",
+          file=file)
+    for name, s in sorted(result["stages"].items(), key=lambda item: -item[1]["total"]):
+        print(f"{name:<22}{s['count']:>8}{s['total']:>12.3f}{1000 * s['mean']:>12.3f}"
+              f"{1000 * s['min']:>10.3f}{1000 * s['max']:>10.3f}{100 * s['total'] / total:>7.1f}", file=file)
+    for name, value in sorted(result["counters"].items()):
+        print(f"{name:<22}{value:>8}", file=file)
+
+
+configure_from_env()
@@ -0,0 +1,447 @@
+"""
+Service d'inférence LIP : un processus de longue durée qui garde en mémoire
+le modèle joblib et le backend de Radon (opérateurs déjà construits) et
+classe des objets sans fichiers intermédiaires : images de profil (ou
+maillage via imProfile) -> signatures LIP -> vecteur de caractéristiques ->
+probabilités des classes.
+
+Les requêtes reçues en même temps (plusieurs clients, ou plusieurs lignes
+envoyées sans attendre les réponses) sont regroupées en micro-lots : un seul
+appel à lip_signatures_batch, dataset_feature_matrix et predict_proba par lot
+et par taille d'image. Une requête invalide (vues manquantes ou de tailles
+différentes) est rejetée seule, avant le micro-lot ; si un micro-lot échoue,
+ses requêtes sont reprises une par une. Le décodage des requêtes (images,
+imProfile pour les requêtes mesh) se fait avant, dans un pool de threads
+(--decode_workers) : une requête mesh ne bloque pas les autres clients.
+
+Protocole JSON lines (une requête par ligne, une réponse par ligne dans
+l'ordre des requêtes d'une même connexion) :
+    {"id": 1, "views": [m, s, t]}
+        chaque vue : {"pgm": "<octets PGM/PNG en base64>"}, {"path": "x.pgm"}
+        ou un tableau [H][W] de valeurs 0-255
+    {"id": 2, "mesh": "objet.off"}             (nécessite --imProfile)
+Réponse :
+    {"id": 1, "label": "chair", "probabilities": {"bed": 0.1, ...}, "seconds": 0.012}
+    {"id": 2, "error": "..."}
+
+Usage :
+    python lip_service.py model.joblib --classes bed chair sofa < requests.jsonl
+    python lip_service.py model.joblib --socket 127.0.0.1:8765
+    python lip_service.py model.joblib --socket /tmp/lip.sock
+
+API Python :
+    service = LipService("model.joblib", classes=[...])
+    service.predict([(img_m, img_s, img_t)])          # probabilités [N, classes]
+    service.submit({"views": [...]}).result()         # réponse (micro-lot)
+
+Les options de caractéristiques (--stats, --mode, --use_circularity,
+--use_orientation_merit, --angles...) doivent être celles du jeu
+d'apprentissage du modèle (run_pipeline.py / make_custom_feature_file.py) ; les
+colonnes retenues par train_randomForest2.py --columns (lip_columns_ du
+modèle) sont sélectionnées automatiquement.
+"""
+
+import argparse
+import base64
+import json
+import os
+import queue
+import socketserver
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import cv2
+import joblib
+import numpy as np
+
+import lip_profiling
+import lip_sign
+import make_custom_feature_file
+
+VIEWS = ("m", "s", "t")
+
+
+def decode_view(value):
+    """
+    Image de profil d'une requête.
+
+    Parameters:
+        value: ndarray ou liste imbriquée [H, W] (valeurs 0-255), octets
+               PGM/PNG, ou dict {"pgm": base64} / {"path": chemin}.
+
+    Returns:
+        ndarray: Image uint8 [H, W] (comme cv2.imread(path, 0)).
+    """
+    if isinstance(value, (bytes, bytearray)):
+        img = cv2.imdecode(np.frombuffer(value, dtype=np.uint8), cv2.IMREAD_GRAYSCALE)
+    elif isinstance(value, dict):
+        if "pgm" in value:
+            return decode_view(base64.b64decode(value["pgm"]))
+        if "path" not in value:
+            raise ValueError("vue attendue : {\"pgm\": base64}, {\"path\": ...} ou tableau")
+        img = cv2.imread(value["path"], 0)
+    else:
+        img = np.asarray(value)
+        if img.dtype != np.uint8:
+            img = np.clip(img, 0, 255).astype(np.uint8)
+    if img is None or img.ndim != 2:
+        raise ValueError("image de profil illisible")
+    return img
+
+
+def check_views(views):
+    """
+    Vérifie qu'un objet a trois vues (m, s, t) de même taille.
+    """
+    if len(views) != len(VIEWS):
+        raise ValueError("trois vues (m, s, t) attendues")
+    shape = views[0].shape
+    if any(view.shape != shape for view in views):
+        raise ValueError("les trois vues doivent avoir la même taille")
+
+
+class LipService:
+    """
+    Classifieur LIP résident.
+
+    Parameters:
+        model_path (str): Modèle joblib (RandomForestClassifier de
+                          train_randomForest2.py).
+        classes (list): Noms des classes, dans l'ordre des labels (ordre
+                        alphabétique des catégories de run_pipeline.py) ;
+                        défaut : labels du modèle.
+        ANGLE, m, radon, coarse, fine, tie_rtol: Paramètres de lip_signatures_batch.
+        stats, mode, use_circularity, use_orientation_merit: Paramètres de
+                        dataset_feature_matrix.
+        imProfile (str): Exécutable imProfile pour les requêtes "mesh".
+        batch_size (int): Taille maximale d'un micro-lot.
+        max_wait (float): Attente maximale (s) pour compléter un micro-lot.
+        decode_workers (int): Threads de décodage des requêtes (images,
+                        imProfile), hors du thread des micro-lots.
+    """
+
+    def __init__(self, model_path, classes=None, ANGLE=180., m=180, radon="skimage", coarse=0, fine=180,
+                 stats=("max", "min", "median"), mode="default", use_circularity=False,
+                 use_orientation_merit=False, imProfile=None, batch_size=32, max_wait=0.005, tie_rtol=0.,
+                 decode_workers=4):
+        self.model = joblib.load(model_path)
+        self.labels = list(self.model.classes_)
+        self.classes = classes
+        self.ANGLE, self.m, self.radon, self.coarse, self.fine = ANGLE, m, radon, coarse, fine
+        self.tie_rtol = tie_rtol
+        self.stats, self.mode = tuple(stats), mode
+        self.use_circularity, self.use_orientation_merit = use_circularity, use_orientation_merit
+        self.imProfile = imProfile
+        self.batch_size, self.max_wait = batch_size, max_wait
+        self.columns = self.model_columns()
+        self._queue = queue.Queue()
+        self._decoders = ThreadPoolExecutor(max_workers=decode_workers, thread_name_prefix="lip-decode")
+        self._worker = None
+        self._lock = threading.Lock()
+
+    def model_columns(self):
+        """
+        Colonnes du vecteur de caractéristiques attendues par le modèle :
+        lip_columns_ (modèle de train_randomForest2.py --columns) résolu sur
+        feature_layout, toutes les colonnes sinon.
+
+        Returns:
+            Index de l'axe des colonnes (voir column_index).
+        """
+        layout = make_custom_feature_file.feature_layout(self.stats, self.mode, self.use_circularity,
+                                                         self.use_orientation_merit)
+        names = [column["name"] for column in layout]
+        columns = slice(None)
+        n_features = len(names)
+        if hasattr(self.model, "lip_columns_"):
+            missing = [name for name in self.model.lip_columns_ if name not in names]
+            if missing:
+                raise ValueError("colonnes du modèle absentes des caractéristiques ({}) : vérifier --stats, "
+                                 "--mode, --use_circularity, --use_orientation_merit".format(" ".join(missing)))
+            columns = make_custom_feature_file.column_index([names.index(name) for name in self.model.lip_columns_])
+            n_features = len(self.model.lip_columns_)
+        expected = getattr(self.model, "n_features_in_", n_features)
+        if expected != n_features:
+            raise ValueError(f"{n_features} caractéristiques, le modèle en attend {expected}")
+        return columns
+
+    def class_name(self, label):
+        if self.classes is not None and 0 <= int(label) < len(self.classes):
+            return self.classes[int(label)]
+        return label.item() if isinstance(label, np.generic) else label
+
+    def warmup(self, shape):
+        """
+        Prépare le backend de Radon (opérateurs du backend "matrix") pour des
+        images de taille shape, à partir d'un objet fictif.
+        """
+        img = np.zeros(shape, dtype=np.uint8)
+        cv2.circle(img, (shape[1] // 2, shape[0] // 2), min(shape) // 4, 255, -1)
+        self.predict([(img, img, img)])
+
+    def features(self, objects):
+        """
+        Vecteurs de caractéristiques d'objets [(img_m, img_s, img_t), ...],
+        identiques aux lignes des caracs .npy, c'est-à-dire avant l'arrondi à
+        6 décimales des fichiers texte (les objets sont regroupés par taille
+        d'image).
+
+        Returns:
+            ndarray: Matrice [N, n_features].
+        """
+        groups = {}
+        for i, views in enumerate(objects):
+            check_views(views)
+            groups.setdefault(views[0].shape, []).append(i)
+        features = [None] * len(objects)
+        for members in groups.values():
+            imgs = np.stack([view for i in members for view in objects[i]])
+            lips, _, _, _ = lip_sign.lip_signatures_batch(imgs, self.ANGLE, self.m, self.radon,
+                                                         coarse=self.coarse, fine=self.fine, tie_rtol=self.tie_rtol)
+            circularities = None
+            if self.use_circularity:
+                with lip_profiling.stage("circularity", n=len(imgs)):
+                    circularities = make_custom_feature_file.circularity_batch(imgs).reshape(len(members), 3)
+            matrix = make_custom_feature_file.dataset_feature_matrix(
+                lips.reshape(len(members), 3, self.m, 6), use_circularity=self.use_circularity,
+                use_orientation_merit=self.use_orientation_merit, stats=self.stats, mode=self.mode,
+                circularities=circularities)
+            for i, row in zip(members, matrix):
+                features[i] = row
+        return np.stack(features)
+
+    def predict(self, objects):
+        """
+        Probabilités des classes (colonnes dans l'ordre de self.labels).
+
+        Parameters:
+            objects (list): Triplets d'images de profil (m, s, t).
+
+        Returns:
+            ndarray: Probabilités [N, classes].
+        """
+        features = self.features(objects)[:, self.columns]
+        with lip_profiling.stage("predict", n=len(features)):
+            return self.model.predict_proba(features)
+
+    def views_from_mesh(self, mesh):
+        """
+        Images de profil d'un maillage, produites par imProfile dans un
+        répertoire temporaire.
+        """
+        if not self.imProfile:
+            raise ValueError("requête mesh sans exécutable imProfile (--imProfile)")
+        with tempfile.TemporaryDirectory(prefix="lip_service_") as tmp:
+            prefix = os.path.join(tmp, "object")
+            with lip_profiling.stage("profiles"):
+                result = subprocess.run([self.imProfile, "-i", mesh, "-o", prefix],
+                                        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+            views = [cv2.imread(prefix + "_" + view + ".pgm", 0) for view in VIEWS]
+            if result.returncode != 0 or any(view is None for view in views):
+                raise ValueError("échec de la génération des images ({})".format(
+                    result.stderr.decode(errors="replace").strip()))
+        return views
+
+    def decode_request(self, request):
+        """
+        Triplet d'images d'une requête JSON ("views" ou "mesh"), validé (voir
+        check_views) avant d'entrer dans un micro-lot.
+        """
+        if "views" in request:
+            with lip_profiling.stage("decode"):
+                views = tuple(decode_view(view) for view in request["views"])
+        elif "mesh" in request:
+            views = tuple(self.views_from_mesh(request["mesh"]))
+        else:
+            raise ValueError("requête sans \"views\" ni \"mesh\"")
+        check_views(views)
+        return views
+
+    def response(self, request, probabilities, start):
+        best = int(np.argmax(probabilities))
+        return {"id": request.get("id"), "label": self.class_name(self.labels[best]),
+                "probabilities": {str(self.class_name(label)): float(p)
+                                  for label, p in zip(self.labels, probabilities)},
+                "seconds": time.perf_counter() - start}
+
+    def submit(self, request):
+        """
+        Décode une requête dans le pool de décodage (images, ou imProfile pour
+        une requête mesh), puis l'ajoute au prochain micro-lot : le thread des
+        micro-lots ne fait que Radon, caractéristiques et prédiction.
+
+        Returns:
+            Future: Réponse (dict) de la requête.
+        """
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="lip-service", daemon=True)
+                self._worker.start()
+        future = Future()
+        start = time.perf_counter()
+        decoding = self._decoders.submit(self.decode_request, request)
+        decoding.add_done_callback(lambda decoded: self._enqueue(request, future, start, decoded))
+        return future
+
+    def _enqueue(self, request, future, start, decoded):
+        try:
+            views = decoded.result()
+        except Exception as e:
+            future.set_result({"id": request.get("id"), "error": str(e)})
+            return
+        self._queue.put((request, future, start, views))
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get(timeout=max(deadline - time.perf_counter(), 0)))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            items = self._next_batch()
+            # Un micro-lot par taille d'image : une erreur n'atteint que les
+            # requêtes de même taille
+            groups = {}
+            for item in items:
+                groups.setdefault(item[3][0].shape, []).append(item)
+            for group in groups.values():
+                self._answer(group)
+
+    def _answer(self, items):
+        try:
+            with lip_profiling.stage("batch", n=len(items)):
+                probabilities = self.predict([views for _, _, _, views in items])
+        except Exception as e:
+            if len(items) > 1:
+                # Requête fautive inconnue : chaque requête est reprise seule
+                for item in items:
+                    self._answer([item])
+                return
+            request, future, _, _ = items[0]
+            future.set_result({"id": request.get("id"), "error": str(e)})
+            return
+        for (request, future, start, _), p in zip(items, probabilities):
+            future.set_result(self.response(request, p, start))
+
+
+def serve_lines(service, infile, outfile):
+    """
+    Traite un flux de requêtes JSON lines : chaque ligne est soumise dès sa
+    lecture (micro-lots) et les réponses sont écrites dans l'ordre des requêtes.
+    """
+    pending = queue.Queue()
+
+    def write_responses():
+        while True:
+            future = pending.get()
+            if future is None:
+                return
+            outfile.write(json.dumps(future.result()) + "\n")
+            outfile.flush()
+
+    writer = threading.Thread(target=write_responses, daemon=True)
+    writer.start()
+    for line in infile:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            request = json.loads(line)
+        except ValueError as e:
+            future = Future()
+            future.set_result({"id": None, "error": "JSON invalide : " + str(e)})
+        else:
+            future = service.submit(request)
+        pending.put(future)
+    pending.put(None)
+    writer.join()
+
+
+def make_server(service, address):
+    """
+    Serveur JSON lines sur "hôte:port" (TCP) ou sur un chemin (socket Unix),
+    un thread par connexion, micro-lots partagés entre connexions.
+    """
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            serve_lines(service, (line.decode() for line in self.rfile), _SocketWriter(self.wfile))
+
+    host, _, port = address.rpartition(":")
+    if host and port.isdigit():
+        socketserver.ThreadingTCPServer.allow_reuse_address = True
+        return socketserver.ThreadingTCPServer((host, int(port)), Handler)
+    if os.path.exists(address):
+        os.remove(address)
+    return socketserver.ThreadingUnixStreamServer(address, Handler)
+
+
+class _SocketWriter:
+    def __init__(self, wfile):
+        self.wfile = wfile
+
+    def write(self, text):
+        self.wfile.write(text.encode())
+
+    def flush(self):
+        self.wfile.flush()
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Service d'inférence LIP (JSON lines sur stdin ou socket).")
+    parser.add_argument("model_path", type=str, help="Modèle (.joblib)")
+    parser.add_argument("-c", "--classes", type=str, nargs="+", help="Noms des classes, dans l'ordre des labels")
+    parser.add_argument("--socket", type=str, help="hôte:port ou chemin de socket Unix (défaut : stdin/stdout)")
+    parser.add_argument("--imProfile", type=str,
+                        default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "imProfile"),
+                        help="Chemin vers l'exécutable imProfile (requêtes mesh)")
+    parser.add_argument("--use_circularity", action="store_true", help="Include circularity in features")
+    parser.add_argument("--use_orientation_merit", action="store_true", help="Include orientation merit in features")
+    parser.add_argument("--stats", type=str, nargs="+", default=["max", "min", "median"],
+                        help="Statistiques locales (max, min, median, mean, std)")
+    parser.add_argument("--mode", type=str, default="default",
+                        choices=["default", "ref_by_LIP0", "ref_by_LIP0_fft"], help="Mode de local_features")
+    lip_sign.add_radon_arguments(parser)
+    lip_sign.add_resolution_arguments(parser)
+    parser.add_argument("--batch_size", type=int, default=32, help="Taille maximale d'un micro-lot")
+    parser.add_argument("--max_wait", type=float, default=5., help="Attente maximale d'un micro-lot (ms)")
+    parser.add_argument("--decode_workers", type=int, default=4,
+                        help="Threads de décodage des requêtes (images et imProfile des requêtes mesh)")
+    parser.add_argument("--warmup", type=int, nargs=2, metavar=("H", "W"),
+                        help="Prépare le backend de Radon pour des images H x W au démarrage")
+    lip_profiling.add_arguments(parser)
+    args = parser.parse_args(argv)
+    lip_profiling.configure_from_args(args)
+
+    service = LipService(args.model_path, args.classes, args.angle_range, args.angles, args.radon, args.coarse,
+                         args.fine, args.stats, args.mode, args.use_circularity, args.use_orientation_merit,
+                         args.imProfile, args.batch_size, args.max_wait / 1000., args.tie_rtol,
+                         args.decode_workers)
+    if args.warmup:
+        service.warmup(tuple(args.warmup))
+    print(f"[Info] Modèle chargé ({len(service.labels)} classes)", file=sys.stderr)
+
+    if args.socket is None:
+        serve_lines(service, sys.stdin, sys.stdout)
+    else:
+        server = make_server(service, args.socket)
+        print(f"[Info] En écoute sur {args.socket}", file=sys.stderr)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+    lip_profiling.report()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
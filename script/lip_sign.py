@@ -4,12 +4,28 @@ import numpy as np
 import cv2
 import sys
 import math
-import matplotlib.pyplot as plt
 import os
+import argparse
+import json
+import time
 import pandas as pd
+from radon_backend import get_radon_backend, rho_window, RADON_BACKENDS
+import lip_profiling
+
+def _pyplot():
+    # matplotlib n'est importé qu'au premier tracé, avec le backend Agg
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    return plt
+
+# Version de l'extraction LIP, à incrémenter quand les valeurs produites
+# changent (invalide les entrées du cache de run_pipeline.py)
+LIP_VERSION = 4
 
 def get_cmap(n, name='hsv'):
-    return plt.cm.get_cmap(name, n)
+    import matplotlib
+    return matplotlib.colormaps[name].resampled(n)
 '''
 this function allow to compute shift on LIP profile
 '''
@@ -109,15 +125,87 @@ def getFeaturesByProfil(profil):
     return LIP0, LIP1, LIP2, LIP3, LIP4, LIP5
 
 
+def compute_lip_signatures(radon_img, tie_rtol=0.):
+    """
+    Version vectorisée de getFeaturesByProfil : calcule les six LIP pour toutes
+    les colonnes (angles) d'une image de Radon en une seule passe NumPy.
+
+    Les points clefs M, B, E sont obtenus par argmax le long de l'axe rho, les
+    moyennes et écarts-types avant/après le maximum par masques sur cet axe.
+    Une colonne sans valeur strictement positive donne six LIP nuls.
+
+    Les profils ont souvent un plateau au maximum (bord de la silhouette
+    parallèle à la projection) : les valeurs y sont égales au bruit d'arrondi
+    près, qui dépend du backend de Radon. Par défaut (tie_rtol=0), M est le
+    premier maximum strict, comme getFeaturesByProfil. Avec tie_rtol > 0, M
+    est le premier indice dont la valeur atteint le maximum à tie_rtol près :
+    les LIP ne dépendent plus du backend (1e-10 suffit pour "matrix" et
+    "skimage"), mais diffèrent de getFeaturesByProfil sur les plateaux.
+
+    Paramètres :
+        radon_img (ndarray) : image de Radon [rho, angles].
+        tie_rtol (float) : tolérance relative pour départager les maxima.
+
+    Retour :
+        ndarray : signatures [angles, 6] (colonnes LIP0 à LIP5).
+    """
+    radon_img = np.asarray(radon_img, dtype=np.float64)
+    nRho = radon_img.shape[0]
+    rho = np.arange(nRho)[:, np.newaxis]
+
+    # M : maximum de chaque profil (premier indice en cas d'égalité)
+    maxVal = np.max(radon_img, axis=0)
+    argMaxVal = np.argmax(radon_img >= maxVal - tie_rtol * np.abs(maxVal), axis=0)
+
+    # B et E : premier et dernier point strictement positif
+    positive = radon_img > 0
+    hasPositive = positive.any(axis=0)
+    infRho = np.where(hasPositive, np.argmax(positive, axis=0), nRho - 1)
+    supRho = np.where(hasPositive, nRho - 1 - np.argmax(positive[::-1], axis=0), 0)
+
+    # Moyennes et écarts-types sur [B, M[ et [M, E]
+    before = (rho >= infRho) & (rho < argMaxVal)
+    after = (rho >= argMaxVal) & (rho <= supRho)
+    m1, y1 = _masked_mean_std(radon_img, before)
+    m2, y2 = _masked_mean_std(radon_img, after)
+
+    # Longueur du profil = nombre de valeurs strictement positives entre B et E
+    profile_length = np.count_nonzero(positive, axis=0)
+    profile_length[profile_length == 0] = 1
+
+    lips = np.stack([maxVal,
+                     argMaxVal - infRho,
+                     m1, y1, m2, y2], axis=1) / profile_length[:, np.newaxis]
+    lips[~hasPositive] = 0.
+    return lips
+
+
+def _masked_mean_std(values, mask):
+    """
+    Moyenne et écart-type (comme np.mean/np.std) de chaque colonne de values
+    restreinte à mask ; 0 pour les colonnes où le masque est vide.
+    """
+    count = np.count_nonzero(mask, axis=0)
+    safe_count = np.maximum(count, 1)
+    mean = np.where(mask, values, 0.).sum(axis=0) / safe_count
+    var = np.where(mask, (values - mean) ** 2, 0.).sum(axis=0) / safe_count
+    empty = count == 0
+    mean[empty] = 0.
+    var[empty] = 0.
+    return mean, np.sqrt(var)
+
+
 def plot_column_vector(column_vector, output_path="column_plot.png",title="Radon Transform Column", xlabel="Index", ylabel="Value"):
 
-    plt.figure(facecolor='white')
+    plt = _pyplot()
+    fig = plt.figure(facecolor='white')
     plt.plot(column_vector, marker='', linestyle='-', markersize=5, color='b')  # Courbe avec des points
     plt.title(title)
     plt.xlabel(xlabel)
     plt.ylabel(ylabel)
     #plt.grid(True)
     plt.savefig(output_path)
+    plt.close(fig)
 
 def extract_column_from_radon(radon_transform, column_index):
     
@@ -127,146 +215,453 @@ def extract_column_from_radon(radon_transform, column_index):
     return radon_transform[:, column_index]
 
 
-def main(argv):
-    outputPath=""
-    imgs=["","",""]
-    imgs[0]=argv[0]
+def circular_shift(lips, shifts):
+    """
+    Décalage circulaire de chaque signature d'un lot le long de l'axe des
+    angles : out[..., i, :] = lips[..., (i + shift) % m, :] (applyShift
+    appliqué aux six LIP à la fois).
 
-    imgs[1]=argv[1]
-    imgs[2]=argv[2]
-    
-    outputPath=argv[3]
-    #imgs[0]="/volWork/these/source/TLDDC/test_projection/cerf/cerf.png"
-    #imgs[1]="/volWork/these/source/VT/trunkdefectclassification/data/VT/trainingdata/data/beech1/beech1-22-ci_s.pgm"
-    #outputPath="/volWork/these/source/TLDDC/LIP/"
-    #imgs=["beech1-22-ci_m_symHO.pgm"]
-    #ANGLE range to compute radon img
-    ANGLE=180.
-    #Number of projection used to compute feature
-    m=180
-    #THETA=range(0,ANGLE,int(ANGLE/m))
+    Paramètres :
+        lips (ndarray) : signatures [..., m, 6].
+        shifts (ndarray) : décalages entiers [...].
+    """
+    lips=np.asarray(lips)
+    m=lips.shape[-2]
+    idx=(np.arange(m)+np.asarray(shifts)[...,np.newaxis])%m
+    return np.take_along_axis(lips,idx[...,np.newaxis],axis=-2)
+
+def normalize_signatures(lips):
+    """
+    Normalise un lot de signatures [..., m, 6] : décalage circulaire pour
+    placer le maximum de LIP0 en premier, puis retournement si le minimum de
+    LIP0 est dans la première moitié (2 * minId < m). Mêmes valeurs, au bit
+    près, que max_min et applyShift signature par signature.
+
+    Retour :
+        tuple : (signatures normalisées [..., m, 6], décalages [...],
+                 retournements [...], orientation merits [...]) ; décalages et
+                 retournements permettent de revenir aux signatures brutes
+                 (denormalize_signatures)
+    """
+    lips=np.asarray(lips)
+    lip0=lips[...,0]
+    shifts=np.argmax(lip0,axis=-1)
+    flips=2*np.argmin(lip0,axis=-1)<lips.shape[-2]
+    #math.exp (et non np.exp) : mêmes valeurs que la version par signature
+    sdo=np.max(lip0,axis=-1)
+    merits=np.array([1-math.exp(1-v) for v in sdo.ravel()]).reshape(sdo.shape)
+    normalized=circular_shift(lips,shifts)
+    normalized=np.where(flips[...,np.newaxis,np.newaxis],normalized[...,::-1,:],normalized)
+    return normalized,shifts,flips,merits
+
+def denormalize_signatures(lips, shifts, flips):
+    """
+    Inverse de normalize_signatures : signatures brutes (angle 0 en premier)
+    à partir des signatures normalisées, des décalages et des retournements.
+    """
+    lips=np.asarray(lips)
+    lips=np.where(np.asarray(flips)[...,np.newaxis,np.newaxis],lips[...,::-1,:],lips)
+    return circular_shift(lips,-np.asarray(shifts))
+
+def normalize_signature(lips):
+    """
+    Normalise une signature [m, 6] (voir normalize_signatures).
+
+    Retour :
+        tuple : (signature normalisée, décalage, retournement (bool),
+                 orientation merit)
+    """
+    lips,shift,flip,merit=normalize_signatures(lips)
+    return lips,int(shift),bool(flip),float(merit)
+
+def lip_signatures_batch(profiles, ANGLE=180., m=180, radon_backend="skimage", chunk_size=64, coarse=0, fine=180,
+                         tie_rtol=0.):
+    """
+    Calcule les signatures LIP normalisées d'un lot d'images de profil.
+
+    Les images sont traitées par paquets de chunk_size : un seul appel au
+    backend de Radon par paquet, ce qui borne la mémoire (sinogrammes
+    [chunk_size, rho, m]) tout en amortissant la préparation de la transformée.
+    Les extrémités de l'axe rho où le sinogramme du paquet est nul (hors du
+    cercle de support des silhouettes) ne sont pas parcourues : les LIP ne
+    dépendent que d'écarts d'indices rho, elles sont inchangées.
+
+    Paramètres :
+        profiles (ndarray) : images de profil [N, H, W] (même taille).
+        ANGLE (float) : plage angulaire de la transformée de Radon.
+        m (int) : nombre de projections.
+        radon_backend (str) : backend de radon_backend.py ("skimage", défaut de
+                              toutes les fonctions de ce module, ou "matrix",
+                              à utiliser avec tie_rtol=1e-10).
+        chunk_size (int) : nombre d'images par appel au backend.
+        coarse (int) : si non nul, orientation cherchée sur coarse angles puis
+                       affinée sur fine angles (voir lip_signatures_coarse_to_fine).
+        fine (int) : grille d'affinage de l'orientation (avec coarse).
+        tie_rtol (float) : tolérance des maxima de compute_lip_signatures.
+
+    Retour :
+        tuple : (signatures [N, m, 6], décalages [N], retournements [N],
+                 orientation merits [N])
+    """
+    if coarse:
+        return lip_signatures_coarse_to_fine(profiles,ANGLE,m,coarse,fine,radon_backend,chunk_size,tie_rtol)
     THETA=np.arange(0.0,ANGLE,ANGLE/m)
-    
-    LIP=[[],[],[]]
-    LIP1=[[],[],[]]
-    LIP2=[[],[],[]]
-    LIP3=[[],[],[]]
-    LIP4=[[],[],[]]
-    LIP5=[[],[],[]]
-    OM=[[],[],[]]
-    
+    backend=get_radon_backend(radon_backend)
+    n=len(profiles)
+    lips=np.empty((n,m,6))
+    shifts=np.empty(n,dtype=np.int64)
+    flips=np.empty(n,dtype=bool)
+    merits=np.empty(n)
+    for start in range(0,n,chunk_size):
+        chunk=np.asarray(profiles[start:start+chunk_size])
+        stop=start+len(chunk)
+        #Radon img [chunk, rho, m]
+        with lip_profiling.stage("radon",n=len(chunk),backend=backend.name):
+            sinograms=backend.batch(chunk,THETA)[:,rho_window(chunk)]
+        #extract features from all profils of the chunk at once
+        nc,nRho,_=sinograms.shape
+        with lip_profiling.stage("lip",n=nc):
+            raw=compute_lip_signatures(sinograms.transpose(1,0,2).reshape(nRho,nc*m),tie_rtol).reshape(nc,m,6)
+        with lip_profiling.stage("normalisation",n=nc):
+            lips[start:stop],shifts[start:stop],flips[start:stop],merits[start:stop]=normalize_signatures(raw)
+    return lips,shifts,flips,merits
+
+def _grouped_sinograms(backend, imgs, angle_ids, ANGLE, L, tie_rtol=0.):
+    """
+    Sinogrammes d'images qui n'ont pas toutes les mêmes angles : les images
+    sont regroupées par liste d'angles (indices sur la grille de L angles de
+    [0, ANGLE[) et chaque groupe fait un seul appel au backend.
+
+    Paramètres :
+        imgs (ndarray) : images [N, H, W].
+        angle_ids (ndarray) : indices d'angles [N, k] de chaque image.
+
+    Retour :
+        ndarray : LIP [N, k, 6] de chaque image, dans l'ordre de angle_ids.
+    """
+    n,k=angle_ids.shape
+    lips=np.empty((n,k,6))
+    groups={}
+    for i,ids in enumerate(angle_ids):
+        groups.setdefault(tuple(ids.tolist()),[]).append(i)
+    for ids,members in groups.items():
+        group=imgs[members]
+        theta=np.asarray(ids)*(ANGLE/L)
+        with lip_profiling.stage("radon",n=len(group),backend=backend.name,angles=k):
+            sinograms=backend.batch(group,theta)[:,rho_window(group)]
+        nc,nRho,_=sinograms.shape
+        with lip_profiling.stage("lip",n=nc):
+            lips[members]=compute_lip_signatures(sinograms.transpose(1,0,2).reshape(nRho,nc*k),tie_rtol).reshape(nc,k,6)
+    return lips
+
+def refine_window(c, coarse, fine):
+    """
+    Indices des angles de la grille de fine angles à moins d'un pas grossier
+    (circulairement) du c-ième angle de la grille de coarse angles.
+    """
+    fine_ids=np.arange(fine)
+    gap=np.abs(fine_ids*coarse-c*fine)
+    gap=np.minimum(gap,fine*coarse-gap)
+    return fine_ids[gap<fine]
+
+def coarse_to_fine_orientations(imgs, ANGLE=180., coarse=30, fine=180, L=None, radon_backend="skimage", tie_rtol=0.):
+    """
+    Orientation dominante (maximum de LIP0) de chaque image, cherchée sur
+    une grille grossière de coarse angles puis affinée sur la grille de fine
+    angles, dans la fenêtre d'un pas grossier de part et d'autre du maximum
+    grossier. Coût : coarse + environ 2 * fine / coarse projections par
+    image au lieu de fine. Un LIP0 multimodal dont le maximum global n'est
+    pas vu sur la grille grossière peut donner un maximum local.
+
+    Paramètres :
+        imgs (ndarray) : images [N, H, W].
+        coarse (int) : nombre d'angles de la recherche grossière.
+        fine (int) : nombre d'angles de la grille d'affinage.
+        L (int) : grille des indices renvoyés (multiple de fine, défaut fine).
+
+    Retour :
+        ndarray : orientations [N], indices sur la grille de L angles.
+    """
+    L=fine if L is None else L
+    backend=get_radon_backend(radon_backend)
+    imgs=np.asarray(imgs)
+    n=len(imgs)
+    theta=np.arange(coarse)*(ANGLE/coarse)
+    with lip_profiling.stage("radon",n=n,backend=backend.name,angles=coarse):
+        sinograms=backend.batch(imgs,theta)[:,rho_window(imgs)]
+    nc,nRho,_=sinograms.shape
+    with lip_profiling.stage("lip",n=nc):
+        lip0=compute_lip_signatures(sinograms.transpose(1,0,2).reshape(nRho,nc*coarse),tie_rtol)[:,0].reshape(nc,coarse)
+    best=np.argmax(lip0,axis=1)
+    # Fenêtre : angles de la grille fine à moins d'un pas grossier du maximum
+    # grossier, rangés par angle croissant dans [0, ANGLE[ pour départager les
+    # égalités comme le chemin pleine résolution (premier maximum)
+    orientations=np.empty(n,dtype=np.int64)
+    for c in np.unique(best):
+        ids=refine_window(c,coarse,fine)*(L//fine)
+        members=np.flatnonzero(best==c)
+        lip0=_grouped_sinograms(backend,imgs[members],np.broadcast_to(ids,(len(members),len(ids))),ANGLE,L,
+                                tie_rtol)[...,0]
+        orientations[members]=ids[np.argmax(lip0,axis=1)]
+    return orientations
+
+def lip_signatures_coarse_to_fine(profiles, ANGLE=180., m=180, coarse=30, fine=180, radon_backend="skimage",
+                                  chunk_size=64, tie_rtol=0.):
+    """
+    Signatures LIP normalisées à m angles dont le premier angle est
+    l'orientation dominante trouvée par coarse_to_fine_orientations, à la
+    précision de la grille de fine angles au lieu de celle des m angles.
+
+    Les m angles d'une image sont l'orientation plus les multiples de
+    ANGLE / m (modulo ANGLE). Ils sont tous sur la grille de L = ppcm(m, fine)
+    angles et ne forment que L / m grilles distinctes (une par phase), ce qui
+    permet de regrouper les images d'un paquet par phase (un appel au backend
+    et, pour "matrix", un opérateur par phase).
+
+    Si fine divise m, la grille des m angles est déjà au moins aussi fine :
+    la signature est celle de lip_signatures_batch.
+
+    Retour :
+        tuple : (signatures [N, m, 6], décalages [N] entiers en pas de
+                 ANGLE / m, retournements [N], orientation merits [N]) ; le
+                 décalage est celui de la signature brute sur la grille de sa
+                 phase (denormalize_signatures la retrouve), l'orientation
+                 elle-même est à la précision de la grille de L angles.
+    """
+    lips,orientations,flips,merits,step=_coarse_to_fine(profiles,ANGLE,m,coarse,fine,radon_backend,chunk_size,
+                                                        tie_rtol)
+    return lips,orientations//step,flips,merits
+
+def _coarse_to_fine(profiles, ANGLE, m, coarse, fine, radon_backend, chunk_size, tie_rtol):
+    """
+    lip_signatures_coarse_to_fine, avec les orientations [N] (indices entiers
+    sur la grille de L angles) et le pas L / m au lieu des décalages.
+    """
+    if m%fine==0:
+        lips,shifts,flips,merits=lip_signatures_batch(profiles,ANGLE,m,radon_backend,chunk_size,tie_rtol=tie_rtol)
+        return lips,shifts,flips,merits,1
+    L=m*fine//math.gcd(m,fine)
+    step=L//m
+    backend=get_radon_backend(radon_backend)
+    n=len(profiles)
+    lips=np.empty((n,m,6))
+    orientations=np.empty(n,dtype=np.int64)
+    flips=np.empty(n,dtype=bool)
+    merits=np.empty(n)
+    for start in range(0,n,chunk_size):
+        chunk=np.asarray(profiles[start:start+chunk_size])
+        stop=start+len(chunk)
+        orientations[start:stop]=coarse_to_fine_orientations(chunk,ANGLE,coarse,fine,L,radon_backend,tie_rtol)
+        # Grille de la phase de chaque image, puis rotation pour commencer à l'orientation
+        phases=orientations[start:stop]%step
+        raw=_grouped_sinograms(backend,chunk,phases[:,np.newaxis]+step*np.arange(m),ANGLE,L,tie_rtol)
+        with lip_profiling.stage("normalisation",n=len(chunk)):
+            lip=circular_shift(raw,orientations[start:stop]//step)
+            _,_,_,merits[start:stop]=normalize_signatures(lip)
+            #inverse if min on the right : angle du minimum < ANGLE/2
+            flips[start:stop]=2*((orientations[start:stop]+np.argmin(lip[...,0],axis=-1)*step)%L)<L
+            lips[start:stop]=np.where(flips[start:stop,np.newaxis,np.newaxis],lip[:,::-1],lip)
+    return lips,orientations,flips,merits,step
+
+def compare_with_full_resolution(profiles, ANGLE=180., m=180, coarse=30, fine=180, radon_backend="skimage",
+                                 tie_rtol=0.):
+    """
+    Écart entre les signatures à m angles obtenues par recherche
+    grossière-fine, celles du chemin direct à m angles, et la référence
+    pleine résolution : signatures à fine angles sous-échantillonnées tous
+    les fine / m angles (si m divise fine).
+
+    Retour :
+        dict : pour "coarse_to_fine" et "direct" : écart d'orientation avec
+               la référence (en degrés : moyen, maximal, part d'orientations
+               identiques), part de retournements identiques, écarts moyen et
+               maximal des signatures, temps de calcul ; nombre de
+               projections par image de chaque chemin.
+    """
+    profiles=np.asarray(profiles)
+    timings={}
+    start=time.perf_counter()
+    ref,ref_shifts,ref_flips,_=lip_signatures_batch(profiles,ANGLE,fine,radon_backend,tie_rtol=tie_rtol)
+    timings["full"]=time.perf_counter()-start
+    start=time.perf_counter()
+    c2f,c2f_orientations,c2f_flips,_,step=_coarse_to_fine(profiles,ANGLE,m,coarse,fine,radon_backend,64,tie_rtol)
+    # Orientations en pas (fractionnaires) de ANGLE / m
+    c2f_shifts=c2f_orientations/step
+    timings["coarse_to_fine"]=time.perf_counter()-start
+    start=time.perf_counter()
+    direct,direct_shifts,direct_flips,_=lip_signatures_batch(profiles,ANGLE,m,radon_backend,tie_rtol=tie_rtol)
+    timings["direct"]=time.perf_counter()-start
+
+    ref_deg=ref_shifts*(ANGLE/fine)
+    report={"n": len(profiles), "ANGLE": ANGLE, "m": m, "coarse": coarse, "fine": fine,
+            "projections_per_image": {"full": fine, "direct": m},
+            "seconds_full": timings["full"]}
+    if fine%m==0:
+        # Signature de référence ramenée à m angles (même sens de parcours que la signature comparée)
+        ref_m=np.stack([lip[::fine//m] if not f else lip[::-1][::fine//m][::-1] for lip,f in zip(ref,ref_flips)])
+    for name,lips,shifts,flips in (("coarse_to_fine",c2f,c2f_shifts,c2f_flips),
+                                   ("direct",direct,direct_shifts,direct_flips)):
+        gap=np.abs(shifts*(ANGLE/m)-ref_deg)%ANGLE
+        gap=np.minimum(gap,ANGLE-gap)
+        entry={"orientation_error_mean_deg": float(gap.mean()), "orientation_error_max_deg": float(gap.max()),
+               "orientation_exact": float(np.mean(gap<1e-9)), "flip_agreement": float(np.mean(flips==ref_flips)),
+               "seconds": timings[name]}
+        if fine%m==0:
+            diff=np.abs(lips-ref_m)
+            entry.update(signature_error_mean=float(diff.mean()), signature_error_max=float(diff.max()))
+        report[name]=entry
+    if m%fine!=0:
+        window=np.mean([len(refine_window(c,coarse,fine)) for c in range(coarse)])
+        report["projections_per_image"]["coarse_to_fine"]=coarse+float(window)+m
+    else:
+        report["projections_per_image"]["coarse_to_fine"]=m
+    return report
+
+def add_resolution_arguments(parser):
+    """
+    Ajoute les options de résolution angulaire (--angles, --angle_range,
+    --coarse, --fine) à un parser argparse.
+    """
+    parser.add_argument("--angles", type=int, default=180,
+                        help="Nombre de projections de Radon (longueur des signatures)")
+    parser.add_argument("--angle_range", type=float, default=180.,
+                        help="Plage angulaire de la transformée de Radon en degrés")
+    parser.add_argument("--coarse", type=int, default=0,
+                        help="Recherche grossière-fine de l'orientation sur N angles (0 : désactivée)")
+    parser.add_argument("--fine", type=int, default=180,
+                        help="Nombre d'angles de la grille d'affinage de l'orientation (avec --coarse)")
+
+def add_radon_arguments(parser):
+    """
+    Ajoute les options de la transformée de Radon (--radon, --tie_rtol) à un
+    parser argparse.
+    """
+    parser.add_argument("--radon", type=str, default="skimage", choices=sorted(RADON_BACKENDS),
+                        help="Backend de la transformée de Radon (matrix : opérateur précalculé et mis en cache)")
+    parser.add_argument("--tie_rtol", type=float, default=0.,
+                        help="Tolérance relative des maxima des profils (0 : LIP historiques ; "
+                             "1e-10 : mêmes LIP avec les deux backends)")
+
+def lip_signature(img, ANGLE=180., m=180, radon_backend="skimage", tie_rtol=0.):
+    """
+    Calcule la signature LIP normalisée d'une image de profil (voir
+    lip_signatures_batch).
+
+    Retour :
+        tuple : (signature [m, 6], orientation merit)
+    """
+    lips,_,_,merits=lip_signatures_batch(np.asarray(img)[np.newaxis],ANGLE,m,radon_backend,tie_rtol=tie_rtol)
+    return lips[0],merits[0]
+
+def save_signature(lips, output_path):
+    """
+    Sauvegarde une signature [m, 6] au format CSV (une ligne par angle).
+    """
+    pd.DataFrame(lips).to_csv(output_path,header = False, index= False)
+
+def plot_signature(lips, output_path):
+    """
+    Trace les six courbes LIP d'une signature et sauvegarde la figure.
+    """
+    plt = _pyplot()
+    m=lips.shape[0]
     cmap = get_cmap(60)
-    
-    #Add a signature for all image.
-    for t in range(len(imgs)):
-        img = cv2.imread(imgs[t], 0)
-        print("image shape : ",img.shape)
-        
-        #Radon img
-        randon_img = radon(img,THETA,False)
-        #test=extract_column_from_radon(randon_img, 70)
-        #plot_column_vector(test)
-        
-        #print("salut")
-        #io.imsave(""+imgs[t]+"radon_CV.png",randon_img)
-        #print("radon shape : ",randon_img.shape)
-        
-        for i in range(m):
-            #extract feature from current profil
-            f0,f1,f2,f3,f4,f5=getFeaturesByProfil(randon_img[:,i])
-            
-            LIP[t].append(f0)
-            LIP1[t].append(f1)
-            LIP2[t].append(f2)
-            LIP3[t].append(f3)
-            LIP4[t].append(f4)
-            LIP5[t].append(f5)
-        
-        #normalize signature : shift
-        do,sdo,minId,_=max_min(LIP[t])
-        orientation_merits=1-(math.exp(1-sdo))
-        OM[t].append(orientation_merits)
-        
-        LIP[t]=applyShift(LIP[t],do)
-        LIP1[t]=applyShift(LIP1[t],do)
-        LIP2[t]=applyShift(LIP2[t],do)
-        LIP3[t]=applyShift(LIP3[t],do)
-        LIP4[t]=applyShift(LIP4[t],do)
-        LIP5[t]=applyShift(LIP5[t],do)
-        #inverse if min on the right
-        if(minId<ANGLE//2):
-            LIP[t]=LIP[t][::-1]
-            LIP1[t]=LIP1[t][::-1]
-            LIP2[t]=LIP2[t][::-1]
-            LIP3[t]=LIP3[t][::-1]
-            LIP4[t]=LIP4[t][::-1]
-            LIP5[t]=LIP5[t][::-1]
-    #save LIP
-    basename = os.path.basename(imgs[0])
-    my_df_lip_m = pd.DataFrame([LIP[0],LIP1[0],LIP2[0],LIP3[0],LIP4[0],LIP5[0]])
-    my_df_lip_m=my_df_lip_m.T
-    my_df_lip_m.to_csv(outputPath+basename[:-6]+'_m.csv',header = False, index= False)
-    
-    basename = os.path.basename(imgs[1])
-    my_df_lip_s = pd.DataFrame([LIP[1],LIP1[1],LIP2[1],LIP3[1],LIP4[1],LIP5[1]])
-    my_df_lip_s=my_df_lip_s.T
-    my_df_lip_s.to_csv(outputPath+basename[:-6]+'_s.csv',header = False, index= False)
-
-    basename = os.path.basename(imgs[2])
-    my_df_lip_s = pd.DataFrame([LIP[2],LIP1[2],LIP2[2],LIP3[2],LIP4[2],LIP5[2]])
-    my_df_lip_s=my_df_lip_s.T
-    my_df_lip_s.to_csv(outputPath+basename[:-6]+'_t.csv',header = False, index= False)
-    
-    #create graphique for main profile
-    _,ax=plt.subplots()
-    ax.plot(range(m),LIP[0],c=cmap(0),label ='LIP0', markersize=0.50,marker='.')
-    ax.plot(range(m),LIP1[0],c=cmap(10),label ='LIP1', markersize=0.50,marker='o')
-    ax.plot(range(m),LIP2[0],c=cmap(20),label ='LIP2', markersize=0.50,marker='s')
-    ax.plot(range(m),LIP3[0],c=cmap(30),label ='LIP3', markersize=0.50,marker='p')
-    ax.plot(range(m),LIP4[0],c=cmap(40),label ='LIP4', markersize=0.50,marker='*')
-    ax.plot(range(m),LIP5[0],c=cmap(50),label ='LIP5', markersize=0.50,marker='+')
+    markers=['.','o','s','p','*','+']
+    fig,ax=plt.subplots()
+    for j in range(lips.shape[1]):
+        ax.plot(range(m),lips[:,j],c=cmap(10*j),label ='LIP'+str(j), markersize=0.50,marker=markers[j])
     # Shrink current axis's height by 10% on the bottom
     box = ax.get_position()
     ax.set_position([box.x0, box.y0 + box.height * 0.1,box.width, box.height * 0.9])
     # Put a legend below current axis
     ax.legend(loc='upper center', bbox_to_anchor=(0.5, -0.05),fancybox=True, shadow=True, ncol=5)
     # save
-    basename = os.path.basename(imgs[0])
-    plt.savefig(outputPath+basename[:-6]+"_m_visu.png")
-    
-    #create graphique for second profile 
-    # clear
-    plt.clf()
-    _,ax=plt.subplots()
-    ax.plot(range(m),LIP[1],c=cmap(0),label ='LIP0', markersize=0.50,marker='.')
-    ax.plot(range(m),LIP1[1],c=cmap(10),label ='LIP1', markersize=0.50,marker='o')
-    ax.plot(range(m),LIP2[1],c=cmap(20),label ='LIP2', markersize=0.50,marker='s')
-    ax.plot(range(m),LIP3[1],c=cmap(30),label ='LIP3', markersize=0.50,marker='p')
-    ax.plot(range(m),LIP4[1],c=cmap(40),label ='LIP4', markersize=0.50,marker='*')
-    ax.plot(range(m),LIP5[1],c=cmap(50),label ='LIP5', markersize=0.50,marker='+')
-    box = ax.get_position()
-    ax.set_position([box.x0, box.y0 + box.height * 0.1,box.width, box.height * 0.9])
-    ax.legend(loc='upper center', bbox_to_anchor=(0.5, -0.05),fancybox=True, shadow=True, ncol=5)
-    basename = os.path.basename(imgs[1])
-    plt.savefig(outputPath+basename[:-6]+"_s_visu.png")
-
-    #create graphique for third profile 
-    # clear
-    plt.clf()
-    _,ax=plt.subplots()
-    ax.plot(range(m),LIP[2],c=cmap(0),label ='LIP0', markersize=0.50,marker='.')
-    ax.plot(range(m),LIP1[2],c=cmap(10),label ='LIP1', markersize=0.50,marker='o')
-    ax.plot(range(m),LIP2[2],c=cmap(20),label ='LIP2', markersize=0.50,marker='s')
-    ax.plot(range(m),LIP3[2],c=cmap(30),label ='LIP3', markersize=0.50,marker='p')
-    ax.plot(range(m),LIP4[2],c=cmap(40),label ='LIP4', markersize=0.50,marker='*')
-    ax.plot(range(m),LIP5[2],c=cmap(50),label ='LIP5', markersize=0.50,marker='+')
-    box = ax.get_position()
-    ax.set_position([box.x0, box.y0 + box.height * 0.1,box.width, box.height * 0.9])
-    ax.legend(loc='upper center', bbox_to_anchor=(0.5, -0.05),fancybox=True, shadow=True, ncol=5)
-    basename = os.path.basename(imgs[2])
-    plt.savefig(outputPath+basename[:-6]+"_t_visu.png")
+    fig.savefig(output_path)
+    plt.close(fig)
 
-    
+def parse_plots_option(value):
+    """
+    Analyse l'option --plots : "none", "all" ou "sample:N".
+
+    Retour :
+        tuple : (mode, N) avec N=None sauf pour "sample".
+    """
+    if value in ("none", "all"):
+        return value, None
+    if value.startswith("sample:") and value[len("sample:"):].isdigit():
+        return "sample", int(value[len("sample:"):])
+    raise argparse.ArgumentTypeError("--plots attend none, all ou sample:N (reçu '{}')".format(value))
+
+def plot_selection(n_objects, plots):
+    """
+    Indices des objets (ou des profils pour lip_sign.py) à tracer parmi
+    n_objects selon l'option --plots analysée : aucun, tous, ou N objets
+    régulièrement espacés (le premier et le dernier compris).
+    """
+    mode, n = plots
+    if mode == "all":
+        return set(range(n_objects))
+    if mode == "none" or n_objects == 0 or n == 0:
+        return set()
+    return set(np.linspace(0, n_objects - 1, min(n, n_objects)).round().astype(int).tolist())
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Signatures LIP des trois images de profil d'un objet.")
+    parser.add_argument("image_m", type=str)
+    parser.add_argument("image_s", type=str)
+    parser.add_argument("image_t", type=str)
+    parser.add_argument("output_path", type=str, help="Préfixe (répertoire) de sortie")
+    parser.add_argument("--name", type=str,
+                        help="Nom de l'objet dans les fichiers de sortie (défaut : déduit de image_m)")
+    parser.add_argument("--plots", type=parse_plots_option, default=("all", None),
+                        help="Figures *_visu.png : none, all (défaut, les trois profils) ou sample:N "
+                             "(N profils régulièrement espacés parmi m, s, t)")
+    add_radon_arguments(parser)
+    add_resolution_arguments(parser)
+    parser.add_argument("--check_full", type=str, default=None,
+                        help="Fichier JSON où écrire l'écart avec le chemin pleine résolution (--fine angles)")
+    lip_profiling.add_arguments(parser)
+    args = parser.parse_args(argv)
+    lip_profiling.configure_from_args(args)
+
+    imgs=[args.image_m,args.image_s,args.image_t]
+    outputPath=args.output_path
+    suffixes=['_m','_s','_t']
+
+    #toilet_0046_m.pgm -> toilet_0046
+    name=args.name
+    if name is None:
+        name=os.path.splitext(os.path.basename(imgs[0]))[0]
+        if name.endswith(suffixes[0]):
+            name=name[:-len(suffixes[0])]
+
+    profiles=[]
+    for path in imgs:
+        with lip_profiling.stage("read",object=name):
+            img = cv2.imread(path, 0)
+        if img is None:
+            parser.error("lecture impossible de "+path)
+        profiles.append(img)
+
+    #Add a signature for all image.
+    lips,_,_,_=lip_signatures_batch(np.stack(profiles),args.angle_range,args.angles,args.radon,
+                                    coarse=args.coarse,fine=args.fine,tie_rtol=args.tie_rtol)
+
+    if args.check_full:
+        report=compare_with_full_resolution(np.stack(profiles),args.angle_range,args.angles,args.coarse or 30,
+                                            args.fine,args.radon,args.tie_rtol)
+        with open(args.check_full,"w") as f:
+            json.dump(report,f,indent=2)
+
+    #save LIP and create graphique for the profile
+    plotted=plot_selection(len(imgs),args.plots)
+    for t in range(len(imgs)):
+        with lip_profiling.stage("csv_write",object=name):
+            save_signature(lips[t],outputPath+name+suffixes[t]+'.csv')
+        if t in plotted:
+            with lip_profiling.stage("plot",object=name):
+                plot_signature(lips[t],outputPath+name+suffixes[t]+"_visu.png")
+    lip_profiling.report()
 
 if __name__ == "__main__":
     # execute only if run as a script
@@ -0,0 +1,288 @@
+"""
+Stockage consolidé des signatures LIP d'un sous-ensemble (train ou test).
+
+Au lieu de trois CSV 180x6 par objet, un store est un répertoire contenant :
+    lips.npy      signatures [objets, 3 vues (m, s, t), angles, 6 LIP] (float64)
+    names.txt     nom de chaque objet (une ligne par objet)
+    labels.npy    label de chaque objet (int64)
+    profiles.txt  chemins des trois images de profil de chaque objet (optionnel)
+    circularity.npy circularité des trois profils de chaque objet [objets, 3] (optionnel)
+    normalisation.npz décalages, retournements et orientation merits de la
+                  normalisation des signatures [objets, 3] (optionnel, voir
+                  lip_sign.normalize_signatures)
+    meta.json     paramètres (ANGLE, m, vues...)
+
+lips.npy est ouvert en mémoire mappée (np.load(mmap_mode="r")), ce qui rend le
+chargement quasi instantané quelle que soit la taille du jeu de données.
+
+Les vecteurs de caractéristiques (caracs) d'un sous-ensemble ont aussi une
+forme binaire, écrite à côté des fichiers texte par l'agrégation :
+    <subset>_caracs.npy  matrice [objets, n_features] (float32, valeurs non
+                         arrondies ; le texte est arrondi à 6 décimales)
+    <subset>_labels.npy  labels (int64)
+    <subset>_names.txt   noms (fichier texte habituel)
+    <subset>_caracs.source.json, <subset>_labels.source.json
+                         taille et date du fichier texte dont le .npy est la
+                         copie (clé de source)
+read_caracs / load_feature_matrix les ouvrent en mémoire mappée, et relisent
+le texte seulement si le .npy manque ou si sa clé de source ne correspond
+plus au fichier texte (texte réécrit par un autre outil).
+
+Usage en ligne de commande (conversion d'une arborescence de CSV existante) :
+    python lip_store.py <data_root> <output_dir>
+produit <output_dir>/train_lips et <output_dir>/test_lips.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+VIEWS = ("m", "s", "t")
+SUBSETS = ("train", "test")
+
+
+def write_store(store_dir, lips, names, labels, profiles=None, meta=None, circularity=None, normalisation=None):
+    """
+    Écrit un store.
+
+    Parameters:
+        store_dir (str): Répertoire de sortie (créé si besoin).
+        lips (ndarray): Signatures [objets, 3, angles, 6].
+        names (list): Noms des objets.
+        labels (list): Labels des objets.
+        profiles (list): Optionnel, triplets de chemins des images de profil.
+        meta (dict): Optionnel, paramètres à conserver.
+        circularity (ndarray): Optionnel, circularités [objets, 3] calculées
+                    pendant l'extraction des signatures.
+        normalisation (dict): Optionnel, "shifts", "flips" et "merits"
+                    [objets, 3] de la normalisation des signatures.
+    """
+    lips = np.asarray(lips, dtype=np.float64)
+    if lips.ndim != 4 or lips.shape[0] != len(names) or lips.shape[0] != len(labels):
+        raise ValueError(f"Store incohérent : lips {lips.shape}, {len(names)} noms, {len(labels)} labels.")
+    os.makedirs(store_dir, exist_ok=True)
+    np.save(os.path.join(store_dir, "lips.npy"), lips)
+    np.save(os.path.join(store_dir, "labels.npy"), np.asarray(labels, dtype=np.int64))
+    with open(os.path.join(store_dir, "names.txt"), "w") as f:
+        f.writelines(name + "\n" for name in names)
+    if circularity is not None:
+        np.save(os.path.join(store_dir, "circularity.npy"), np.asarray(circularity, dtype=np.float64))
+    if normalisation is not None:
+        np.savez(os.path.join(store_dir, "normalisation.npz"),
+                 shifts=np.asarray(normalisation["shifts"], dtype=np.int64),
+                 flips=np.asarray(normalisation["flips"], dtype=bool),
+                 merits=np.asarray(normalisation["merits"], dtype=np.float64))
+    if profiles is not None:
+        with open(os.path.join(store_dir, "profiles.txt"), "w") as f:
+            f.writelines(" ".join(p) + "\n" for p in profiles)
+    meta = dict(meta or {})
+    meta.setdefault("views", list(VIEWS))
+    meta["shape"] = list(lips.shape)
+    with open(os.path.join(store_dir, "meta.json"), "w") as f:
+        json.dump(meta, f, indent=4)
+
+
+def read_store(store_dir, mmap=True):
+    """
+    Lit un store.
+
+    Parameters:
+        store_dir (str): Répertoire du store.
+        mmap (bool): Ouvre lips.npy en mémoire mappée (lecture seule).
+
+    Returns:
+        dict: "lips", "names", "labels", "profiles", "circularity" et
+        "normalisation" (None si absents), "meta".
+    """
+    lips = np.load(os.path.join(store_dir, "lips.npy"), mmap_mode="r" if mmap else None)
+    labels = np.load(os.path.join(store_dir, "labels.npy"))
+    with open(os.path.join(store_dir, "names.txt")) as f:
+        names = [line.rstrip("\n") for line in f]
+    profiles = None
+    profiles_path = os.path.join(store_dir, "profiles.txt")
+    if os.path.isfile(profiles_path):
+        with open(profiles_path) as f:
+            profiles = [line.split() for line in f]
+    circularity = None
+    circularity_path = os.path.join(store_dir, "circularity.npy")
+    if os.path.isfile(circularity_path):
+        circularity = np.load(circularity_path)
+    normalisation = None
+    normalisation_path = os.path.join(store_dir, "normalisation.npz")
+    if os.path.isfile(normalisation_path):
+        with np.load(normalisation_path) as data:
+            normalisation = {k: data[k] for k in ("shifts", "flips", "merits")}
+    with open(os.path.join(store_dir, "meta.json")) as f:
+        meta = json.load(f)
+    return {"lips": lips, "names": names, "labels": labels, "profiles": profiles,
+            "circularity": circularity, "normalisation": normalisation, "meta": meta}
+
+
+def _source_key(path):
+    """
+    Clé de source d'un fichier texte : taille et date de modification.
+    """
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def _source_key_path(path):
+    return os.path.splitext(path)[0] + ".source.json"
+
+
+def write_caracs(output_dir, subset, features, labels):
+    """
+    Écrit la forme binaire des caracs d'un sous-ensemble :
+    <subset>_caracs.npy (float32) et <subset>_labels.npy (int64), puis la clé
+    de source des fichiers texte <subset>_caracs.txt et <subset>_labels.txt.
+
+    À appeler après l'écriture des fichiers texte : le .npy n'est relu que
+    tant que le texte correspond à la clé enregistrée.
+    """
+    features = np.asarray(features, dtype=np.float32)
+    os.makedirs(output_dir, exist_ok=True)
+    for name, array in (("_caracs", features), ("_labels", np.asarray(labels, dtype=np.int64))):
+        base = os.path.join(output_dir, subset + name)
+        np.save(base + ".npy", array)
+        key_path = _source_key_path(base + ".txt")
+        if os.path.isfile(base + ".txt"):
+            with open(key_path, "w") as f:
+                json.dump(_source_key(base + ".txt"), f)
+        elif os.path.isfile(key_path):
+            os.remove(key_path)
+
+
+def _binary_path(path):
+    """
+    Fichier .npy associé à un fichier texte, s'il existe et que le texte est
+    absent ou correspond à la clé de source enregistrée ; None sinon.
+    """
+    if path.endswith(".npy"):
+        return path
+    binary = os.path.splitext(path)[0] + ".npy"
+    if not os.path.isfile(binary):
+        return None
+    if not os.path.isfile(path):
+        return binary
+    try:
+        with open(_source_key_path(path)) as f:
+            key = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return binary if key == _source_key(path) else None
+
+
+def load_feature_matrix(path, mmap=True):
+    """
+    Matrice de caractéristiques float32 [objets, n_features] d'un fichier
+    caracs : .npy associé en mémoire mappée (lecture seule) s'il existe,
+    fichier texte sinon.
+    """
+    binary = _binary_path(path)
+    if binary is not None:
+        return np.load(binary, mmap_mode="r" if mmap else None)
+    return pd.read_csv(path, header=None, delimiter=" ", dtype=np.float32).to_numpy()
+
+
+def load_labels(path):
+    """
+    Labels (int64) d'un fichier labels (.npy associé ou texte).
+    """
+    binary = _binary_path(path)
+    if binary is not None:
+        return np.load(binary)
+    return np.loadtxt(path, dtype=np.int64, ndmin=1)
+
+
+def read_caracs(exp_dir, subset, mmap=True):
+    """
+    Caracs d'un sous-ensemble d'une expérience (run_pipeline.py ou
+    make_custom_feature_file.py --dataset).
+
+    Returns:
+        dict: "features" [objets, n_features] (float32, mémoire mappée si
+        binaire), "labels", "names" (None si absents).
+    """
+    names = None
+    names_path = os.path.join(exp_dir, subset + "_names.txt")
+    if os.path.isfile(names_path):
+        with open(names_path) as f:
+            names = [line.rstrip("\n") for line in f]
+    return {"features": load_feature_matrix(os.path.join(exp_dir, subset + "_caracs.txt"), mmap),
+            "labels": load_labels(os.path.join(exp_dir, subset + "_labels.txt")),
+            "names": names}
+
+
+def store_lookup(store, name):
+    """
+    Retourne les signatures [3, angles, 6] d'un objet du store à partir de son nom.
+    """
+    try:
+        return store["lips"][store["names"].index(name)]
+    except ValueError:
+        raise KeyError(f"Objet '{name}' absent du store.")
+
+
+def read_csv_tree(data_root, subset):
+    """
+    Lit les signatures d'un sous-ensemble d'une arborescence
+    <categorie>/<train|test>/carac/*_{m,s,t}.csv (sortie de process_meshes.sh).
+
+    Les labels suivent l'ordre alphabétique des catégories (EXP ignoré), comme
+    dans process_lip.sh. Les objets dont un des trois CSV manque sont ignorés.
+
+    Returns:
+        dict: "lips" [objets, 3, angles, 6] (None si aucun objet), "names",
+        "labels", "profiles", "categories".
+    """
+    categories = sorted(d for d in os.listdir(data_root)
+                        if os.path.isdir(os.path.join(data_root, d)) and d != "EXP" and not d.startswith("."))
+    lips, names, labels, profiles = [], [], [], []
+    for label, category in enumerate(categories):
+        carac_path = os.path.join(data_root, category, subset, "carac")
+        pgm_path = os.path.join(data_root, category, subset, "pgm")
+        if not os.path.isdir(carac_path):
+            continue
+        for file_m in sorted(f for f in os.listdir(carac_path) if f.endswith("_m.csv")):
+            name = file_m[:-len("_m.csv")]
+            files = [os.path.join(carac_path, name + "_" + v + ".csv") for v in VIEWS]
+            if not all(os.path.isfile(f) for f in files):
+                print(f"[Warning] Fichiers manquants pour l'objet : {name} dans {carac_path}", file=sys.stderr)
+                continue
+            lips.append(np.stack([pd.read_csv(f, header=None).to_numpy() for f in files]))
+            names.append(name)
+            labels.append(label)
+            profiles.append([os.path.join(pgm_path, name + "_" + v + ".pgm") for v in VIEWS])
+    return {"lips": np.stack(lips) if lips else None, "names": names, "labels": np.asarray(labels, dtype=np.int64),
+            "profiles": profiles, "categories": categories}
+
+
+def csv_tree_to_store(data_root, output_dir):
+    """
+    Convertit une arborescence de CSV (voir read_csv_tree) en un store par
+    sous-ensemble.
+    """
+    for subset in SUBSETS:
+        tree = read_csv_tree(data_root, subset)
+        if not tree["names"]:
+            continue
+        store_dir = os.path.join(output_dir, subset + "_lips")
+        write_store(store_dir, tree["lips"], tree["names"], tree["labels"], tree["profiles"],
+                    meta={"categories": tree["categories"]})
+        print(f"[Info] {len(tree['names'])} objets écrits dans {store_dir}")
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Conversion d'une arborescence de CSV LIP en stores .npy.")
+    parser.add_argument("data_root", type=str, help="Racine <categorie>/<train|test>/carac")
+    parser.add_argument("output_dir", type=str, help="Répertoire de sortie des stores")
+    args = parser.parse_args(argv)
+    csv_tree_to_store(args.data_root, args.output_dir)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
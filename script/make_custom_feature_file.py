@@ -5,16 +5,28 @@ from skimage import io
 from scipy.signal import find_peaks
 import numpy as np
 import scipy.fft
+import scipy.ndimage as ndi
 import pandas as pd
 import cv2
 import sys
 import math
-import matplotlib.pyplot as plt
 import os
 import pandas as pd
 import argparse
+import fnmatch
+import json
+import lip_store
+import lip_profiling
 
-def local_features(lip, stats=("max", "min", "median", "mean", "std"), mode="default"):
+# Version des vecteurs de caractéristiques, à incrémenter quand les valeurs
+# produites changent (invalide les entrées "features" du cache de run_pipeline.py)
+FEATURE_VERSION = 2
+
+# Statistiques de local_features, dans l'ordre où elles sont concaténées
+STAT_FUNCTIONS = {"max": np.max, "min": np.min, "median": np.median, "mean": np.mean, "std": np.std}
+
+def local_features(lip, stats=("max", "min", "median", "mean", "std"), mode="default",
+                   top_n_freq=10, n_representatives=10):
     """
     Extrait des caractéristiques locales à partir d'une matrice LIP.
 
@@ -24,62 +36,74 @@ def local_features(lip, stats=("max", "min", "median", "mean", "std"), mode="def
         mode (str): Mode d'extraction. 
                     - "default" : statistiques classiques sur chaque colonne.
                     - "ref_by_LIP0" : min, max, median extraits selon les indices de LIP0.
+                    - "ref_by_LIP0_fft" : valeurs aux indices représentatifs de LIP0
+                      (voir select_lip_representative_indices).
+        top_n_freq (int): Fréquences retenues en mode "ref_by_LIP0_fft".
+        n_representatives (int): Représentants retenus en mode "ref_by_LIP0_fft".
 
     Returns:
         ndarray: Vecteur de caractéristiques locales.
     """
-    local_feature = []
+    return local_features_batch(lip, stats=stats, mode=mode,
+                                top_n_freq=top_n_freq, n_representatives=n_representatives)
+
+def local_features_batch(lips, stats=("max", "min", "median", "mean", "std"), mode="default",
+                         top_n_freq=10, n_representatives=10):
+    """
+    Version vectorisée de local_features sur un lot de matrices LIP.
+
+    Les signatures sont transposées en [..., 6, angles] contigu : chaque
+    statistique est une réduction NumPy sur le dernier axe, qui parcourt les
+    valeurs dans le même ordre que local_features sur une colonne (résultats
+    identiques au bit près).
+
+    Parameters:
+        lips (ndarray): Matrices LIP [..., angles, 6] (ex. [objets, vues, angles, 6]).
+        stats (tuple): Statistiques à extraire ("max", "min", "median", "mean", "std").
+        mode (str): "default", "ref_by_LIP0" ou "ref_by_LIP0_fft" (voir local_features).
+        top_n_freq, n_representatives (int): Paramètres du mode "ref_by_LIP0_fft".
+
+    Returns:
+        ndarray: Caractéristiques locales [..., n_features], rangées signature
+        par signature puis statistique par statistique.
+    """
+    lips = np.asarray(lips, dtype=np.float64)
+    signatures = np.ascontiguousarray(np.swapaxes(lips, -1, -2))
+    batch_shape = signatures.shape[:-2]
 
     if mode == "default":
-        for i in range(lip.shape[1]):
-            signature = lip[:, i]
-
-            if "max" in stats:
-                local_feature.append(np.max(signature))
-            if "min" in stats:
-                local_feature.append(np.min(signature))
-            if "median" in stats:
-                local_feature.append(np.median(signature))
-            if "mean" in stats:
-                local_feature.append(np.mean(signature))
-            if "std" in stats:
-                local_feature.append(np.std(signature))
+        columns = [STAT_FUNCTIONS[stat](signatures, axis=-1) for stat in STAT_FUNCTIONS if stat in stats]
 
     elif mode == "ref_by_LIP0":
-        lip0 = lip[:, 0]
-        idx_min = np.argmin(lip0)
-        idx_max = np.argmax(lip0)
-        idx_med = np.argsort(lip0)[len(lip0) // 2]
-
-        for i in range(lip.shape[1]):
-            signature = lip[:, i]
-
-            if "min" in stats:
-                local_feature.append(signature[idx_min])
-            if "max" in stats:
-                local_feature.append(signature[idx_max])
-            if "median" in stats:
-                local_feature.append(signature[idx_med])
-            # Les stats "mean" et "std" restent globales
-            if "mean" in stats:
-                local_feature.append(np.mean(signature))
-            if "std" in stats:
-                local_feature.append(np.std(signature))
+        lip0 = signatures[..., 0, :]
+        references = {"min": np.argmin(lip0, axis=-1),
+                      "max": np.argmax(lip0, axis=-1),
+                      "median": np.argsort(lip0, axis=-1)[..., lip0.shape[-1] // 2]}
+        columns = []
+        for stat in ("min", "max", "median"):
+            if stat in stats:
+                idx = references[stat][..., np.newaxis, np.newaxis]
+                columns.append(np.take_along_axis(signatures, idx, axis=-1)[..., 0])
+        # Les stats "mean" et "std" restent globales
+        for stat in ("mean", "std"):
+            if stat in stats:
+                columns.append(STAT_FUNCTIONS[stat](signatures, axis=-1))
+
     elif mode == "ref_by_LIP0_fft":
-        lip0 = lip[:, 0]
-        representative_indices, _, _, _ = select_lip_representative_indices(
-            lip0, top_n_freq=10, n_representatives=10
+        lip0 = signatures[..., 0, :].reshape(-1, signatures.shape[-1])
+        representative_indices, _, _ = batch_select_lip_representative_indices(
+            lip0, top_n_freq=top_n_freq, n_representatives=n_representatives
         )
+        representative_indices = representative_indices.reshape(batch_shape + (1, -1))
+        values = np.take_along_axis(signatures, representative_indices, axis=-1)
+        return values.reshape(batch_shape + (-1,))
 
-        for i in range(lip.shape[1]):
-            signature = lip[:, i]
-            for idx in representative_indices:
-                local_feature.append(signature[idx])
-            
     else:
         raise ValueError(f"Mode '{mode}' non reconnu. Utilisez 'default' ou 'ref_by_LIP0' ou 'ref_by_LIP0_fft'.")
 
-    return np.array(local_feature)
+    if not columns:
+        return np.zeros(batch_shape + (0,))
+    return np.stack(columns, axis=-1).reshape(batch_shape + (-1,))
 
 def select_lip_representative_indices(lip0, top_n_freq=10, n_representatives=10):
     """
@@ -90,7 +114,56 @@ def select_lip_representative_indices(lip0, top_n_freq=10, n_representatives=10)
     top_indices = lip_fft_representatives(lip0, top_n=top_n_freq)
     reconstructed = reconstruct_signal_from_fft(lip0, top_indices)
     features = detect_signal_features(reconstructed, distance=10)
+    selected = _pick_representatives(features, reconstructed, n_representatives)
+    return selected, top_indices, reconstructed, features
+
+def batch_select_lip_representative_indices(lip0s, top_n_freq=10, n_representatives=10, distance=10):
+    """
+    Version par lot de select_lip_representative_indices, aux résultats
+    identiques.
+
+    Le spectre de chaque signal est calculé une seule fois pour tout le lot,
+    les fréquences retenues forment un masque booléen et la reconstruction est
+    une seule transformée inverse. Seule la détection des pics (find_peaks)
+    reste faite signal par signal.
 
+    La FFT complexe est conservée (et non rfft/irfft) : la reconstruction
+    d'une seule sinusoïde présente des égalités entre échantillons voisins, et
+    un écart de 1e-16 suffit à déplacer un pic.
+
+    Parameters:
+        lip0s (ndarray): Signaux LIP0 [N, angles].
+        top_n_freq (int): Nombre d'amplitudes retenues (voir lip_fft_representatives).
+        n_representatives (int): Nombre de représentants par signal.
+        distance (int): Distance minimale entre pics (voir detect_signal_features).
+
+    Returns:
+        tuple: (indices des représentants [N, n_representatives] triés,
+                masque des fréquences retenues [N, angles],
+                signaux reconstruits [N, angles])
+    """
+    lip0s = np.atleast_2d(np.asarray(lip0s, dtype=np.float64))
+    spectra = np.fft.fft(lip0s, axis=-1)
+    amplitudes = np.abs(spectra)
+    # Ignorer la composante DC (fréquence 0) en la mettant à zéro
+    amplitudes[:, 0] = 0
+    mask = np.zeros(spectra.shape, dtype=bool)
+    np.put_along_axis(mask, np.argsort(amplitudes, axis=-1)[:, -top_n_freq:], True, axis=-1)
+    # Chaque fréquence k retenue entraîne sa symétrique -k
+    mask |= np.roll(mask[:, ::-1], 1, axis=-1)
+    reconstructed = np.fft.ifft(np.where(mask, spectra, 0), axis=-1).real
+
+    indices = np.empty((len(lip0s), n_representatives), dtype=np.intp)
+    for i, signal in enumerate(reconstructed):
+        features = detect_signal_features(signal, distance=distance)
+        indices[i] = _pick_representatives(features, signal, n_representatives)
+    return indices, mask, reconstructed
+
+def _pick_representatives(features, reconstructed, n_representatives):
+    """
+    Répartit les représentants entre pics, creux et plateaux puis complète
+    avec les points les plus extrêmes (commun aux versions simple et par lot).
+    """
     # Nombre cible par catégorie
     per_type_target = n_representatives // 3
     remaining = n_representatives - 3 * per_type_target
@@ -120,22 +193,18 @@ def select_lip_representative_indices(lip0, top_n_freq=10, n_representatives=10)
             if len(seen) >= n_representatives:
                 break
 
-    return sorted(selected[:n_representatives]), top_indices, reconstructed, features
+    return sorted(selected[:n_representatives])
 
 def detect_signal_features(signal, distance=10):
-    peaks, _ = find_peaks(signal, distance=distance)
+    # Un seul passage pour les pics et les plateaux : plateau_size=1 ne filtre
+    # aucun pic mais donne les bords du sommet de chacun
+    peaks, properties = find_peaks(signal, plateau_size=1, distance=distance)
     troughs, _ = find_peaks(-signal, distance=distance)
-    plateau_peaks, properties = find_peaks(signal, plateau_size=True, distance=distance)
-    #print(plateau_peaks)
-    plateau_indices = []
-    if 'left_edges' in properties and 'right_edges' in properties:
-        for left, right in zip(properties['left_edges'], properties['right_edges']):
-            center = (left + right) // 2
-            plateau_indices.append(center)
+    plateau_indices = (properties['left_edges'] + properties['right_edges']) // 2
     return {
         'peaks': peaks,
         'troughs': troughs,
-        'plateau_indices': np.array(plateau_indices),
+        'plateau_indices': plateau_indices,
         'plateau_info': properties
     }
 
@@ -187,37 +256,171 @@ def re_order_feature(lf_m, lf_s, lf_t,
     Tous les paramètres circulaires et d'orientation sont optionnels.
     S'ils sont absents (None), ils ne sont pas ajoutés au vecteur.
     """
+    assert(len(lf_m) == len(lf_s) == len(lf_t))
+    ci = om = None
+    # Ajout de circularity si fournie
+    if ci_m is not None and ci_s is not None and ci_t is not None:
+        ci = np.array([[ci_m, ci_s, ci_t]], dtype=np.float64)
+    # Ajout de orientation merit si fourni
+    if om_m is not None and om_s is not None and om_t is not None:
+        om = np.array([[om_m, om_s, om_t]], dtype=np.float64)
+    return re_order_features_batch(np.stack([lf_m, lf_s, lf_t])[np.newaxis], ci, om)[0]
+
+def re_order_features_batch(lf, ci=None, om=None):
+    """
+    Version vectorisée de re_order_feature.
+
+    Parameters:
+        lf (ndarray): Features locaux [objets, 3 vues (m, s, t), n_features].
+        ci (ndarray): Optionnel, circularités [objets, 3].
+        om (ndarray): Optionnel, orientation merits [objets, 3].
+
+    Returns:
+        ndarray: Vecteurs ordonnés [objets, 3 * n_features (+ 3) (+ 3)].
+    """
     sizeOfLocalFeature = 3
-    feature_ordered = []
+    lf = np.asarray(lf, dtype=np.float64)
+    n, views, size = lf.shape
+    if size % sizeOfLocalFeature:
+        raise ValueError(f"Nombre de features locaux ({size}) non multiple de {sizeOfLocalFeature}.")
 
     # Concaténation par direction : max/min/median de m, s, t
-    assert(len(lf_m) == len(lf_s) == len(lf_t))
-    for i in range(0, len(lf_m), sizeOfLocalFeature):
-        feature_ordered = np.append(feature_ordered, lf_m[i:i+sizeOfLocalFeature])
-        feature_ordered = np.append(feature_ordered, lf_s[i:i+sizeOfLocalFeature])
-        feature_ordered = np.append(feature_ordered, lf_t[i:i+sizeOfLocalFeature])
+    ordered = lf.reshape(n, views, size // sizeOfLocalFeature, sizeOfLocalFeature)
+    parts = [ordered.transpose(0, 2, 1, 3).reshape(n, -1)]
 
     #--> pour virer lip0 max de chaque image
     #indToDel=[0,3,6]
     #feature_ordered = np.delete(feature_ordered,indToDel)
-        
-    # Ajout de circularity si fournie
-    if ci_m is not None and ci_s is not None and ci_t is not None:
-        feature_ordered = np.append(feature_ordered, [ci_m, ci_s, ci_t])
 
-    # Ajout de orientation merit si fourni
-    if om_m is not None and om_s is not None and om_t is not None:
-        feature_ordered = np.append(feature_ordered, [om_m, om_s, om_t])
+    if ci is not None:
+        parts.append(np.asarray(ci, dtype=np.float64).reshape(n, views))
+    if om is not None:
+        parts.append(np.asarray(om, dtype=np.float64).reshape(n, views))
+    return np.concatenate(parts, axis=1)
 
-    
+VIEWS = ("m", "s", "t")
+
+def local_feature_names(stats=("max", "min", "median"), mode="default", n_representatives=10):
+    """
+    Noms (signature, statistique) des features locaux d'une vue, dans l'ordre
+    de local_features_batch.
+
+    Returns:
+        list: Couples (indice LIP, nom de la statistique ou "repK" en mode
+        "ref_by_LIP0_fft").
+    """
+    if mode == "default":
+        names = [stat for stat in STAT_FUNCTIONS if stat in stats]
+    elif mode == "ref_by_LIP0":
+        # Valeurs aux indices min/max/médiane de LIP0, puis stats globales
+        names = [stat for stat in ("min", "max", "median", "mean", "std") if stat in stats]
+    elif mode == "ref_by_LIP0_fft":
+        names = [f"rep{k}" for k in range(n_representatives)]
+    else:
+        raise ValueError(f"Mode '{mode}' non reconnu. Utilisez 'default' ou 'ref_by_LIP0' ou 'ref_by_LIP0_fft'.")
+    return [(lip, name) for lip in range(6) for name in names]
 
-    return feature_ordered
+def feature_layout(stats=("max", "min", "median"), mode="default", use_circularity=False,
+                   use_orientation_merit=False, n_representatives=10):
+    """
+    Description des colonnes du vecteur de caractéristiques produit par
+    dataset_feature_matrix (ordre de re_order_features_batch : blocs de 3
+    features locaux entrelacés entre les vues m, s, t, puis circularités et
+    orientation merits).
+
+    Returns:
+        list: Un dict par colonne : "name" (ex. "m_LIP0_max"), "view",
+        "lip" (None pour circularité et orientation merit) et "stat".
+    """
+    sizeOfLocalFeature = 3
+    local = local_feature_names(stats, mode, n_representatives)
+    if len(local) % sizeOfLocalFeature:
+        raise ValueError(f"Nombre de features locaux ({len(local)}) non multiple de {sizeOfLocalFeature}.")
+    layout = []
+    for block in range(0, len(local), sizeOfLocalFeature):
+        for view in VIEWS:
+            for lip, stat in local[block:block + sizeOfLocalFeature]:
+                layout.append({"name": f"{view}_LIP{lip}_{stat}", "view": view, "lip": lip, "stat": stat})
+    for enabled, stat in ((use_circularity, "circularity"), (use_orientation_merit, "orientation_merit")):
+        if enabled:
+            layout.extend({"name": f"{view}_{stat}", "view": view, "lip": None, "stat": stat} for view in VIEWS)
+    return layout
+
+# Coefficients de perimeter_crofton(directions=2) par configuration 2x2
+CROFTON_COEFS = [0, np.pi / 2, 0, 0, 0, np.pi / 2, 0, 0,
+                 np.pi / 2, np.pi, 0, 0, np.pi / 2, np.pi, 0, 0]
 
 def circularity(profile):
-    img = cv2.imread(profile, 0)
+    """
+    Circularité 4*pi*aire/périmètre^2 d'une image de profil.
 
-    img = area_closing(img, 128, connectivity=1)
+    Parameters:
+        profile (str | ndarray): Chemin de l'image ou image déjà chargée.
+
+    Returns:
+        float: Circularité (nan si le profil est vide).
+    """
+    img = cv2.imread(profile, 0) if isinstance(profile, str) else np.asarray(profile)
+    return circularity_batch(img[np.newaxis])[0]
+
+def circularity_batch(imgs, area_threshold=128):
+    """
+    Circularité d'un lot d'images de profil [N, H, W], par comptage direct.
+
+    Pour des silhouettes binaires (fond nul, une seule valeur non nulle), les
+    valeurs sont identiques à l'ancien calcul area_closing + regionprops +
+    perimeter_crofton :
+        - bouchage des composantes de fond (4-connexité) de moins de
+          area_threshold pixels, comme area_closing(img, 128, connectivity=1) ;
+        - aire = nombre de pixels de la silhouette ;
+        - périmètre de Crofton (2 directions) à partir de l'histogramme des
+          configurations 2x2 de pixels.
+    Les images à plusieurs niveaux de gris passent par l'ancien calcul.
+
+    Returns:
+        ndarray: Circularités [N] (nan pour un profil vide).
+    """
+    imgs = np.asarray(imgs)
+    if np.unique(imgs[imgs != 0]).size > 1:
+        return np.array([_circularity_regionprops(img, area_threshold) for img in imgs])
+
+    # Bouchage des petits trous : étiquetage du fond, image par image
+    background = imgs == 0
+    structure = np.zeros((3, 3, 3), dtype=bool)
+    structure[1] = ndi.generate_binary_structure(2, 1)
+    labels, _ = ndi.label(background, structure)
+    small = np.bincount(labels.ravel()) < area_threshold
+    small[0] = False
+    silhouettes = ~background | small[labels]
+
+    areas = np.count_nonzero(silhouettes, axis=(1, 2))
+    perimeters = crofton_perimeter_batch(silhouettes)
+    ci = np.full(len(imgs), np.nan)
+    valid = areas > 0
+    ci[valid] = (4 * math.pi * areas[valid]) / (perimeters[valid] * perimeters[valid])
+    return ci
+
+def crofton_perimeter_batch(silhouettes):
+    """
+    Périmètre de Crofton à 2 directions (perimeter_crofton(img, directions=2))
+    d'un lot d'images binaires [N, H, W].
+    """
+    n = len(silhouettes)
+    padded = np.pad(np.asarray(silhouettes, dtype=np.int32), ((0, 0), (1, 1), (1, 1)))
+    # Configuration 2x2 : pixel, voisin du haut, de gauche et de la diagonale
+    codes = padded.copy()
+    codes[:, 1:, :] += 2 * padded[:, :-1, :]
+    codes[:, :, 1:] += 4 * padded[:, :, :-1]
+    codes[:, 1:, 1:] += 8 * padded[:, :-1, :-1]
+    codes += 16 * np.arange(n, dtype=np.int32)[:, np.newaxis, np.newaxis]
+    histograms = np.bincount(codes.ravel(), minlength=16 * n).reshape(n, 16)
+    return np.array([CROFTON_COEFS @ h for h in histograms], dtype=np.float64)
+
+def _circularity_regionprops(img, area_threshold=128):
+    img = area_closing(img, area_threshold, connectivity=1)
     regions = regionprops(img)
+    if not regions:
+        return np.nan
     pe = perimeter_crofton(img, directions=2)
     a = regions[0].area
 
@@ -231,65 +434,319 @@ def orientation_merit(lip):
     orientation_merits=1-(math.exp(1-sdo))
     return orientation_merits
 
+def orientation_merits_batch(lips):
+    """
+    orientation_merit de chaque matrice LIP d'un lot [..., angles, 6].
+    math.exp est conservé (et non np.exp) pour des valeurs identiques au bit près.
+    """
+    sdo = np.max(np.asarray(lips)[..., 0], axis=-1)
+    return np.array([1 - math.exp(1 - v) for v in sdo.ravel()]).reshape(sdo.shape)
+
+def object_feature_vector(lip_m, lip_s, lip_t,
+                          profile_m=None, profile_s=None, profile_t=None,
+                          use_circularity=False, use_orientation_merit=False,
+                          stats=("max", "min", "median"), mode="default", circularities=None):
+    """
+    Construit le vecteur de caractéristiques final d'un objet à partir de ses
+    trois signatures LIP (m, s, t).
+
+    Parameters:
+        lip_m, lip_s, lip_t (ndarray): Signatures LIP [angles, 6] des trois vues.
+        profile_m, profile_s, profile_t (str | ndarray): Chemins ou images de
+                    profil, nécessaires uniquement si use_circularity est activé
+                    et que circularities n'est pas fourni.
+        use_circularity (bool): Ajoute la circularité des trois profils.
+        use_orientation_merit (bool): Ajoute l'orientation merit des trois vues.
+        stats (tuple): Statistiques transmises à local_features.
+        mode (str): Mode transmis à local_features.
+        circularities (ndarray): Optionnel, circularités [3] déjà calculées
+                    (voir circularity_batch).
+
+    Returns:
+        ndarray: Vecteur de caractéristiques, non arrondi (voir
+        format_feature_vector).
+    """
+    lips = np.stack([lip_m, lip_s, lip_t])[np.newaxis]
+    if circularities is not None:
+        circularities = np.asarray(circularities)[np.newaxis]
+    return dataset_feature_matrix(lips, [(profile_m, profile_s, profile_t)],
+                                  use_circularity=use_circularity,
+                                  use_orientation_merit=use_orientation_merit,
+                                  stats=stats, mode=mode, circularities=circularities)[0]
+
+def dataset_feature_matrix(lips, profiles=None, use_circularity=False, use_orientation_merit=False,
+                           stats=("max", "min", "median"), mode="default", chunk_size=1024,
+                           top_n_freq=10, n_representatives=10, circularities=None):
+    """
+    Construit en une passe les vecteurs de caractéristiques de tout un jeu de
+    données (mêmes valeurs que object_feature_vector objet par objet).
+
+    Parameters:
+        lips (ndarray): Signatures [objets, 3 vues (m, s, t), angles, 6], par
+                    exemple store["lips"] en mémoire mappée.
+        profiles (list): Triplets de chemins (ou d'images) de profil, nécessaires
+                    uniquement si use_circularity est activé sans circularities.
+        use_circularity (bool): Ajoute la circularité des trois profils.
+        use_orientation_merit (bool): Ajoute l'orientation merit des trois vues.
+        stats (tuple): Statistiques transmises à local_features.
+        mode (str): Mode transmis à local_features.
+        chunk_size (int): Nombre d'objets chargés en mémoire à la fois.
+        top_n_freq, n_representatives (int): Paramètres du mode "ref_by_LIP0_fft".
+        circularities (ndarray): Optionnel, circularités [objets, 3] déjà
+                    calculées (store ou cache de run_pipeline.py).
+
+    Returns:
+        ndarray: Matrice de caractéristiques [objets, n_features], non arrondie
+        (l'arrondi à 6 décimales des fichiers texte est fait par
+        format_feature_vector).
+    """
+    if use_circularity and profiles is None and circularities is None:
+        raise ValueError("use_circularity nécessite les images de profil ou les circularités.")
+    features = []
+    for start in range(0, len(lips), chunk_size):
+        chunk = np.asarray(lips[start:start + chunk_size], dtype=np.float64)
+        #Compute local features [objets, vues, n_features]
+        with lip_profiling.stage("aggregation", n=len(chunk), mode=mode):
+            lf = local_features_batch(chunk, stats=stats, mode=mode,
+                                      top_n_freq=top_n_freq, n_representatives=n_representatives)
+        ci = om = None
+        #Circulatiry
+        if use_circularity and circularities is not None:
+            ci = np.asarray(circularities[start:start + len(chunk)], dtype=np.float64)
+        elif use_circularity:
+            with lip_profiling.stage("circularity", n=len(chunk)):
+                ci = np.array([[circularity(p) for p in profiles[i]]
+                               for i in range(start, start + len(chunk))])
+        #orientation Merits 
+        with lip_profiling.stage("aggregation", n=len(chunk), mode="reorder"):
+            if use_orientation_merit:
+                om = orientation_merits_batch(chunk)
+            #order final feature file
+            features.append(re_order_features_batch(lf, ci, om))
+    if not features:
+        return np.zeros((0, 0))
+    return np.concatenate(features)
+
+def format_feature_vector(feature_ordered):
+    """
+    Formate un vecteur de caractéristiques comme une ligne du fichier caracs :
+    valeurs arrondies à 6 décimales séparées par des espaces, identique à
+    print(*np.round(feature_ordered, decimals=6)).
+    """
+    return " ".join(str(v) for v in np.round(np.asarray(feature_ordered, dtype=np.float64), decimals=6))
+
+def write_feature_files(output_dir, subset, features, names, labels):
+    """
+    Écrit <subset>_caracs.txt, <subset>_names.txt et <subset>_labels.txt
+    (mêmes fichiers que process_lip.sh), et leur forme binaire
+    <subset>_caracs.npy / <subset>_labels.npy (voir lip_store.write_caracs).
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    with open(os.path.join(output_dir, subset + "_caracs.txt"), "w") as f:
+        f.writelines(format_feature_vector(row) + "\n" for row in features)
+    with open(os.path.join(output_dir, subset + "_names.txt"), "w") as f:
+        f.writelines(name + "\n" for name in names)
+    with open(os.path.join(output_dir, subset + "_labels.txt"), "w") as f:
+        f.writelines(str(label) + "\n" for label in labels)
+    # En dernier : la clé de source du binaire porte sur le texte final
+    lip_store.write_caracs(output_dir, subset, features, labels)
+
+# Schéma des colonnes des fichiers caracs, écrit à côté d'eux
+SCHEMA_FILE = "caracs_schema.json"
+
+def write_feature_schema(output_dir, layout, params, classes=None):
+    """
+    Écrit <output_dir>/caracs_schema.json : une entrée par colonne des
+    fichiers caracs (voir feature_layout) et les paramètres de l'agrégation.
+
+    Parameters:
+        layout (list): Description des colonnes (feature_layout).
+        params (dict): Paramètres (stats, mode, options, angles...).
+        classes (list): Optionnel, nom de la catégorie de chaque label.
+    """
+    schema = {"n_features": len(layout), "columns": layout, "params": params}
+    if classes is not None:
+        schema["classes"] = list(classes)
+    os.makedirs(output_dir, exist_ok=True)
+    with open(os.path.join(output_dir, SCHEMA_FILE), "w") as f:
+        json.dump(schema, f, indent=1)
+
+def load_feature_schema(path):
+    """
+    Charge un schéma de colonnes (fichier, ou répertoire qui contient
+    caracs_schema.json). Retourne None s'il n'existe pas.
+    """
+    if os.path.isdir(path):
+        path = os.path.join(path, SCHEMA_FILE)
+    if not os.path.isfile(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+def select_columns(columns, include=None, exclude=None):
+    """
+    Indices des colonnes dont le nom correspond à un des motifs include
+    (toutes si None) et à aucun des motifs exclude (motifs fnmatch, ex.
+    "m_*", "*_LIP0_*", "*_orientation_merit").
+
+    Parameters:
+        columns (list): Colonnes d'un schéma (dicts avec "name") ou noms.
+
+    Returns:
+        ndarray: Indices croissants.
+    """
+    names = [c["name"] if isinstance(c, dict) else c for c in columns]
+    keep = [i for i, name in enumerate(names)
+            if (not include or any(fnmatch.fnmatchcase(name, p) for p in include))
+            and not any(fnmatch.fnmatchcase(name, p) for p in (exclude or ()))]
+    if include and not keep:
+        raise ValueError(f"Aucune colonne ne correspond à {' '.join(include)}.")
+    return np.array(keep, dtype=np.intp)
+
+def column_index(indices):
+    """
+    Index à appliquer à l'axe des colonnes : tranche (vue sans copie de la
+    matrice) si les indices sont régulièrement espacés, tableau sinon.
+    """
+    indices = np.asarray(indices)
+    if len(indices) == 1:
+        return slice(int(indices[0]), int(indices[0]) + 1)
+    if len(indices) > 1:
+        steps = np.diff(indices)
+        if steps[0] > 0 and np.all(steps == steps[0]):
+            return slice(int(indices[0]), int(indices[-1]) + 1, int(steps[0]))
+    return indices
+
+def add_column_arguments(parser):
+    """
+    Ajoute les options de sélection de colonnes par nom (--columns,
+    --exclude_columns, --schema).
+    """
+    parser.add_argument("--columns", type=str, nargs="+",
+                        help="Colonnes retenues, motifs de noms du schéma (ex. 'm_*' '*_LIP0_*')")
+    parser.add_argument("--exclude_columns", type=str, nargs="+", help="Colonnes écartées (motifs de noms)")
+    parser.add_argument("--schema", type=str,
+                        help=f"Schéma des colonnes (défaut : {SCHEMA_FILE} à côté des caracs)")
+
+def columns_from_args(args, default_schema, n_features):
+    """
+    Colonnes retenues selon --columns / --exclude_columns.
+
+    Parameters:
+        default_schema (str): Schéma utilisé sans --schema (fichier ou répertoire).
+        n_features (int): Nombre de colonnes des caracs (contrôle du schéma).
+
+    Returns:
+        tuple: (index des colonnes (tranche ou tableau, voir column_index),
+                colonnes retenues du schéma ou None sans schéma)
+    """
+    schema = load_feature_schema(args.schema or default_schema)
+    if schema is None:
+        if args.columns or args.exclude_columns:
+            raise ValueError("la sélection par nom nécessite le schéma des colonnes ({})".format(
+                args.schema or default_schema))
+        return slice(None), None
+    if schema["n_features"] != n_features:
+        raise ValueError(f"{n_features} colonnes dans les caracs, {schema['n_features']} dans le schéma")
+    indices = select_columns(schema["columns"], args.columns, args.exclude_columns)
+    return column_index(indices), [schema["columns"][i] for i in indices]
+
+def load_dataset(dataset, subset):
+    """
+    Charge les signatures d'un sous-ensemble : store <dataset>/<subset>_lips
+    s'il existe (sortie de run_pipeline.py --store ou lip_store.py), sinon
+    arborescence de CSV <categorie>/<subset>/carac.
+
+    Returns:
+        dict: "lips", "names", "labels", "profiles" (voir lip_store).
+    """
+    store_dir = os.path.join(dataset, subset + "_lips")
+    if os.path.isdir(store_dir):
+        return lip_store.read_store(store_dir)
+    return lip_store.read_csv_tree(dataset, subset)
+
 def main(argv):
     parser = argparse.ArgumentParser(description="Feature extraction from LIP profile images.")
-    parser.add_argument("feature_m", type=str)
-    parser.add_argument("feature_s", type=str)
-    parser.add_argument("feature_t", type=str)
-    parser.add_argument("profile_m", type=str)
-    parser.add_argument("profile_s", type=str)
-    parser.add_argument("profile_t", type=str)
+    parser.add_argument("feature_m", type=str, nargs="?")
+    parser.add_argument("feature_s", type=str, nargs="?")
+    parser.add_argument("feature_t", type=str, nargs="?")
+    parser.add_argument("profile_m", type=str, nargs="?")
+    parser.add_argument("profile_s", type=str, nargs="?")
+    parser.add_argument("profile_t", type=str, nargs="?")
+    parser.add_argument("--store", type=str,
+                        help="Store de signatures (voir lip_store.py) : une ligne par objet au lieu des CSV")
+    parser.add_argument("--dataset", type=str,
+                        help="Racine d'une arborescence de CSV ou répertoire de stores <subset>_lips : "
+                             "caracs/names/labels de tout le jeu de données en une passe")
+    parser.add_argument("-o", "--output_dir", type=str, help="Répertoire de sortie du mode --dataset")
     parser.add_argument("--use_circularity", action="store_true", help="Include circularity in features")
     parser.add_argument("--use_orientation_merit", action="store_true", help="Include orientation merit in features")
+    parser.add_argument("--stats", type=str, nargs="+", default=["max", "min", "median"],
+                        help="Statistiques locales (max, min, median, mean, std)")
+    parser.add_argument("--mode", type=str, default="default",
+                        choices=["default", "ref_by_LIP0", "ref_by_LIP0_fft"], help="Mode de local_features")
+    parser.add_argument("--top_n_freq", type=int, default=10,
+                        help="Amplitudes FFT retenues (mode ref_by_LIP0_fft, --store et --dataset)")
+    parser.add_argument("--n_representatives", type=int, default=10,
+                        help="Représentants par signature (mode ref_by_LIP0_fft, --store et --dataset)")
+    lip_profiling.add_arguments(parser)
     args = parser.parse_args(argv)
-    #path to CSV
-    feature_m=argv[0]
-    feature_s=argv[1]
-    feature_t=argv[2]
-    #path to PGM
-    profile_m=argv[3]
-    profile_s=argv[4]
-    profile_t=argv[5]
-
-    #path to CSV
-    #feature_m="/volWork/these/DATA/ModelNet/lip10/toilet/test/carac/toilet_0361_m.csv"
-    #feature_s="/volWork/these/DATA/ModelNet/lip10/toilet/test/carac/toilet_0361_s.csv"
-    #feature_t="/volWork/these/DATA/ModelNet/lip10/toilet/test/carac/toilet_0361_t.csv"
-    #path to PGM
-    #profile_m="/volWork/these/DATA/ModelNet/lip10/toilet/test/pgm/toilet_0361_m.pgm"
-    #profile_s="/volWork/these/DATA/ModelNet/lip10/toilet/test/pgm/toilet_0361_s.pgm"
-    #profile_t="/volWork/these/DATA/ModelNet/lip10/toilet/test/pgm/toilet_0361_t.pgm"
+    lip_profiling.configure_from_args(args)
+    options = dict(use_circularity=args.use_circularity, use_orientation_merit=args.use_orientation_merit,
+                   stats=tuple(args.stats), mode=args.mode)
+    fft_options = dict(top_n_freq=args.top_n_freq, n_representatives=args.n_representatives)
+
+    if args.dataset:
+        if not args.output_dir:
+            parser.error("--dataset nécessite --output_dir")
+        for subset in lip_store.SUBSETS:
+            with lip_profiling.stage("read", subset=subset):
+                data = load_dataset(args.dataset, subset)
+            if not data["names"]:
+                print(f"[Warning] Aucun objet pour le sous-ensemble {subset}", file=sys.stderr)
+                continue
+            if args.use_circularity and data["profiles"] is None and data.get("circularity") is None:
+                parser.error("--use_circularity nécessite les chemins des profils ou les circularités du store")
+            features = dataset_feature_matrix(data["lips"], data["profiles"], **options, **fft_options,
+                                              circularities=data.get("circularity"))
+            with lip_profiling.stage("write", subset=subset):
+                write_feature_files(args.output_dir, subset, features, data["names"], data["labels"])
+                # Paramètres des signatures (angles...) si le store les décrit
+                meta = data.get("meta") or {}
+                params = dict(options, stats=list(args.stats), **fft_options,
+                              **{k: meta[k] for k in ("ANGLE", "m", "coarse", "fine") if k in meta})
+                write_feature_schema(args.output_dir, feature_layout(args.stats, args.mode, args.use_circularity,
+                                                                     args.use_orientation_merit,
+                                                                     args.n_representatives),
+                                     params, data.get("categories") or meta.get("categories"))
+            print(f"[Info] {len(data['names'])} objets {subset} écrits dans {args.output_dir}")
+        lip_profiling.report()
+        return
+
+    if args.store:
+        store = lip_store.read_store(args.store)
+        if args.use_circularity and store["profiles"] is None and store["circularity"] is None:
+            parser.error("--use_circularity nécessite les chemins des profils ou les circularités du store")
+        for row in dataset_feature_matrix(store["lips"], store["profiles"], **options, **fft_options,
+                                          circularities=store["circularity"]):
+            print(format_feature_vector(row))
+        lip_profiling.report()
+        return
+
+    if args.profile_t is None:
+        parser.error("les trois CSV et les trois profils sont requis sans --store")
 
     #READ DATA
-    df_f_m = pd.read_csv(feature_m,header=None).to_numpy()
-    df_f_s = pd.read_csv(feature_s,header=None).to_numpy()
-    df_f_t = pd.read_csv(feature_t,header=None).to_numpy()
-    #Compute local features
-    lf_m=local_features(df_f_m, stats=("max", "min", "median"), mode="default")
-    lf_s=local_features(df_f_s, stats=("max", "min", "median"), mode="default")
-    lf_t=local_features(df_f_t, stats=("max", "min", "median"), mode="default")
-
-    # Variables optionnelles
-    ci_m = ci_s = ci_t = None
-    om_m = om_s = om_t = None
-
-    #Circulatiry
-    if args.use_circularity:
-        ci_m=circularity(profile_m)
-        ci_s=circularity(profile_s)
-        ci_t=circularity(profile_t)
-    #orientation Merits 
-    if args.use_orientation_merit:
-        om_m=orientation_merit(df_f_m)
-        om_s=orientation_merit(df_f_s)
-        om_t=orientation_merit(df_f_t)
-
-    #order final feature file
-    feature_ordered=re_order_feature(lf_m,lf_s,lf_t,ci_m,ci_s,ci_t,om_m,om_s,om_t)
-    #np.set_printoptions(precision=7,suppress=True,linewidth=np.inf)
-    feature_ordered = np.round(feature_ordered, decimals=6)
+    with lip_profiling.stage("read"):
+        df_f_m = pd.read_csv(args.feature_m,header=None).to_numpy()
+        df_f_s = pd.read_csv(args.feature_s,header=None).to_numpy()
+        df_f_t = pd.read_csv(args.feature_t,header=None).to_numpy()
+
+    feature_ordered=object_feature_vector(df_f_m, df_f_s, df_f_t,
+                                          args.profile_m, args.profile_s, args.profile_t, **options)
     
-    print(*feature_ordered)
+    print(format_feature_vector(feature_ordered))
+    lip_profiling.report()
 
 if __name__ == "__main__":
     main(sys.argv[1:])
@@ -0,0 +1,252 @@
+"""
+Lecture rapide des maillages .off, avec cache binaire à côté du fichier source.
+
+Le fichier est lu en flux : en-tête ligne à ligne, puis les blocs des sommets
+et des faces par np.loadtxt (analyse en C, arrêt après le nombre de lignes
+annoncé), sans objet Python par valeur. Le maillage est rendu sous forme de
+tableaux contigus :
+    vertices      sommets [n, 3] (float32 par défaut)
+    face_sizes    nombre de sommets de chaque face [f] (int32)
+    face_indices  indices des sommets des faces, mis bout à bout (int32)
+
+L'en-tête peut être "OFF", "NOFF", "CNOFF"... suivi des nombres de sommets et
+de faces sur la ligne suivante, ou sur la même ligne ("OFF3 4 5", "OFF 3 4 5",
+en-têtes fréquents de ModelNet que MeshReader::importOFFFile refuse). Les
+colonnes en plus (normales, couleurs) sont ignorées.
+
+Le résultat est mis en cache dans <fichier>.<dtype>.cache : une suite de
+tableaux au format .npy (clef [version, taille, mtime_ns] du source, sommets,
+tailles et indices des faces), ouverts en mémoire mappée. Le cache est
+recalculé quand la taille ou la date de modification du source change ;
+s'il ne peut pas être écrit (répertoire en lecture seule), le maillage est
+simplement relu à chaque fois.
+
+Usage (préremplit le cache et affiche les temps de lecture) :
+    python off_reader.py ../examples/*.off
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import warnings
+
+import numpy as np
+
+# Version du format du cache, à incrémenter quand son contenu change
+CACHE_VERSION = 1
+
+OFF_KEYWORDS = ("OFF", "NOFF", "CNOFF", "COFF", "STOFF", "4OFF")
+
+
+def _header(f, path):
+    """
+    Lit l'en-tête et renvoie (nombre de sommets, nombre de faces) ; le
+    fichier est ensuite positionné sur le premier sommet.
+    """
+    first = f.readline().decode("latin-1")
+    keyword = next((k for k in sorted(OFF_KEYWORDS, key=len, reverse=True) if first.startswith(k)), None)
+    if keyword is None:
+        raise ValueError(f"{path} : en-tête OFF attendu")
+    counts = first[len(keyword):].split()
+    while not counts:
+        line = f.readline().decode("latin-1")
+        if not line:
+            raise ValueError(f"{path} : nombres de sommets et de faces absents")
+        if not line.startswith("#"):
+            counts = line.split()
+    try:
+        n_vertices, n_faces = int(counts[0]), int(counts[1])
+    except (IndexError, ValueError):
+        raise ValueError(f"{path} : nombres de sommets et de faces invalides") from None
+    return n_vertices, n_faces
+
+
+def _loadtxt(f, **kwargs):
+    # Lignes vides et commentaires non comptés dans max_rows : c'est le
+    # comportement voulu, l'avertissement de NumPy (>= 1.23) est masqué
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", message="Input line", category=UserWarning)
+        return np.loadtxt(f, **kwargs)
+
+
+def _faces_by_line(f, n_faces, path):
+    # Faces de tailles différentes (lignes de longueurs différentes) : ligne à ligne
+    sizes = np.empty(n_faces, dtype=np.int32)
+    indices = []
+    i = 0
+    for line in f:
+        values = line.split(b"#", 1)[0].split()
+        if not values:
+            continue
+        if i == n_faces:
+            break
+        size = int(values[0])
+        if len(values) < size + 1:
+            raise ValueError(f"{path} : face {i} incomplète")
+        sizes[i] = size
+        indices.append(np.array(values[1:1 + size], dtype=np.int32))
+        i += 1
+    if i < n_faces:
+        raise ValueError(f"{path} : {n_faces} faces annoncées, {i} lues")
+    return sizes, np.concatenate(indices) if indices else np.empty(0, dtype=np.int32)
+
+
+def parse_off(path, dtype=np.float32):
+    """
+    Lit un maillage .off, sans cache.
+
+    Parameters:
+        path (str): Fichier .off.
+        dtype: Type des coordonnées des sommets.
+
+    Returns:
+        dict: "vertices" [n, 3], "face_sizes" [f] et "face_indices" (int32).
+    """
+    # Mode binaire : f.tell() reste utilisable après np.loadtxt
+    with open(path, "rb") as f:
+        n_vertices, n_faces = _header(f, path)
+        vertices = np.empty((0, 3), dtype=dtype)
+        if n_vertices:
+            vertices = _loadtxt(f, dtype=dtype, usecols=(0, 1, 2), max_rows=n_vertices, ndmin=2)
+        if len(vertices) != n_vertices:
+            raise ValueError(f"{path} : {n_vertices} sommets annoncés, {len(vertices)} lus")
+        sizes = np.empty(0, dtype=np.int32)
+        indices = np.empty(0, dtype=np.int32)
+        if n_faces:
+            start = f.tell()
+            try:
+                # Cas courant : toutes les lignes de faces ont le même nombre de colonnes
+                table = _loadtxt(f, dtype=np.int64, max_rows=n_faces, ndmin=2)
+            except ValueError:
+                table = None
+            if table is not None and len(table) == n_faces and np.all(table[:, 0] < table.shape[1]):
+                sizes = table[:, 0].astype(np.int32)
+                indices = table[:, 1:][np.arange(table.shape[1] - 1)[None, :] < sizes[:, None]].astype(np.int32)
+            else:
+                f.seek(start)
+                sizes, indices = _faces_by_line(f, n_faces, path)
+    if len(indices) and (indices.min() < 0 or indices.max() >= n_vertices):
+        raise ValueError(f"{path} : indice de sommet hors du maillage")
+    return {"vertices": np.ascontiguousarray(vertices), "face_sizes": sizes, "face_indices": indices}
+
+
+def cache_path(path, dtype=np.float32):
+    """
+    Chemin du cache binaire d'un maillage (à côté du fichier source).
+    """
+    return f"{path}.{np.dtype(dtype).name}.cache"
+
+
+def _source_key(path):
+    stat = os.stat(path)
+    return np.array([CACHE_VERSION, stat.st_size, stat.st_mtime_ns], dtype=np.int64)
+
+
+def _read_arrays(path, count):
+    # Tableaux .npy successifs d'un fichier, ouverts en mémoire mappée
+    arrays = []
+    with open(path, "rb") as f:
+        for _ in range(count):
+            if np.lib.format.read_magic(f) == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+            offset = f.tell()
+            n_bytes = int(np.prod(shape)) * dtype.itemsize
+            if n_bytes:
+                arrays.append(np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=shape,
+                                        order="F" if fortran_order else "C"))
+            else:
+                arrays.append(np.empty(shape, dtype=dtype))
+            f.seek(offset + n_bytes)
+    return arrays
+
+
+def _write_arrays(path, arrays):
+    # Écriture atomique : fichier temporaire dans le même répertoire puis renommage
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for array in arrays:
+                np.lib.format.write_array(f, np.ascontiguousarray(array), allow_pickle=False)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def read_off(path, dtype=np.float32, cache=True):
+    """
+    Lit un maillage .off en passant par le cache binaire <fichier>.<dtype>.cache.
+
+    Parameters:
+        path (str): Fichier .off.
+        dtype: Type des coordonnées des sommets.
+        cache (bool): Utiliser (et mettre à jour) le cache.
+
+    Returns:
+        dict: "vertices" [n, 3], "face_sizes" [f] et "face_indices" (int32),
+        en mémoire mappée quand ils viennent du cache.
+    """
+    if not cache:
+        return parse_off(path, dtype)
+    key = _source_key(path)
+    cached = cache_path(path, dtype)
+    try:
+        arrays = _read_arrays(cached, 4)
+        if np.array_equal(arrays[0], key):
+            return dict(zip(("vertices", "face_sizes", "face_indices"), arrays[1:]))
+    except (OSError, ValueError, IndexError):
+        # Cache absent, tronqué ou d'un autre format
+        pass
+    mesh = parse_off(path, dtype)
+    try:
+        _write_arrays(cached, [key, mesh["vertices"], mesh["face_sizes"], mesh["face_indices"]])
+    except OSError:
+        pass
+    return mesh
+
+
+def triangles(mesh):
+    """
+    Triangles en éventail (sommet 0, j+1, j+2) de chaque face d'au moins
+    trois sommets, comme MeshVoxelizer::voxelize.
+
+    Returns:
+        ndarray: Indices des triangles [k, 3] (int32).
+    """
+    sizes = np.asarray(mesh["face_sizes"], dtype=np.int64)
+    indices = np.asarray(mesh["face_indices"])
+    starts = np.cumsum(sizes) - sizes
+    n_triangles = np.maximum(sizes - 2, 0)
+    first = np.repeat(starts, n_triangles)
+    j = np.arange(int(n_triangles.sum())) - np.repeat(np.cumsum(n_triangles) - n_triangles, n_triangles)
+    return np.stack([indices[first], indices[first + j + 1], indices[first + j + 2]], axis=1)
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Lecture des maillages .off et remplissage du cache binaire.")
+    parser.add_argument("meshes", type=str, nargs="+", help="Fichiers .off")
+    parser.add_argument("--dtype", type=str, default="float32", choices=["float32", "float64"],
+                        help="Type des coordonnées des sommets")
+    parser.add_argument("--no_cache", action="store_true", help="Lire sans cache")
+    args = parser.parse_args(argv)
+
+    failed = 0
+    for path in args.meshes:
+        start = time.perf_counter()
+        try:
+            mesh = read_off(path, np.dtype(args.dtype), cache=not args.no_cache)
+        except (OSError, ValueError) as e:
+            print(f"[Warning] {e}", file=sys.stderr)
+            failed += 1
+            continue
+        print(f"[Info] {path} : {len(mesh['vertices'])} sommets, {len(mesh['face_sizes'])} faces "
+              f"en {time.perf_counter() - start:.3f} s")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
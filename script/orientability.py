@@ -3,6 +3,7 @@ import pandas as pd
 import argparse
 import math
 import sys
+import lip_store
 
 def orientation_merit(lip):
     """
@@ -13,11 +14,23 @@ def orientation_merit(lip):
 
 def main(argv):
     parser = argparse.ArgumentParser(description="Calcule uniquement l'orientation merit à partir des fichiers LIP.")
-    parser.add_argument("feature_m", type=str, help="Chemin vers le fichier CSV de la direction m")
-    parser.add_argument("feature_s", type=str, help="Chemin vers le fichier CSV de la direction s")
-    parser.add_argument("feature_t", type=str, help="Chemin vers le fichier CSV de la direction t")
+    parser.add_argument("feature_m", type=str, nargs="?", help="Chemin vers le fichier CSV de la direction m")
+    parser.add_argument("feature_s", type=str, nargs="?", help="Chemin vers le fichier CSV de la direction s")
+    parser.add_argument("feature_t", type=str, nargs="?", help="Chemin vers le fichier CSV de la direction t")
+    parser.add_argument("--store", type=str,
+                        help="Store de signatures (voir lip_store.py) : affiche 'nom om_m om_s om_t' par objet")
     args = parser.parse_args(argv)
 
+    if args.store:
+        store = lip_store.read_store(args.store)
+        for name, lips in zip(store["names"], store["lips"]):
+            om_values = [round(orientation_merit(lip), 4) for lip in lips]
+            print(name, *om_values)
+        return
+
+    if args.feature_t is None:
+        parser.error("les trois CSV sont requis sans --store")
+
     # Lecture des fichiers
     lip_m = pd.read_csv(args.feature_m, header=None).to_numpy()
     lip_s = pd.read_csv(args.feature_s, header=None).to_numpy()
@@ -0,0 +1,54 @@
+"""
+Rendu a posteriori des figures *_visu.png à partir de signatures déjà
+calculées (CSV produits par lip_sign.py ou store de lip_store.py), pour ne pas
+payer le coût de matplotlib pendant les runs batch.
+
+Usage :
+    python plot_lip.py toilet_0046_m.csv toilet_0046_s.csv -o ./visu/
+    python plot_lip.py --store EXP/defaut/test_lips --plots sample:20 -o ./visu/
+    python plot_lip.py --store EXP/defaut/test_lips --names toilet_0361 -o ./visu/
+"""
+
+import argparse
+import os
+import sys
+
+import pandas as pd
+
+import lip_sign
+import lip_store
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Rendu des figures LIP à partir des signatures stockées.")
+    parser.add_argument("csv_files", type=str, nargs="*", help="Fichiers CSV de signatures")
+    parser.add_argument("-o", "--output_dir", type=str, default=".", help="Répertoire des figures")
+    parser.add_argument("--store", type=str, help="Store de signatures (voir lip_store.py)")
+    parser.add_argument("--names", type=str, nargs="+", help="Objets du store à tracer")
+    parser.add_argument("--plots", type=lip_sign.parse_plots_option, default=("all", None),
+                        help="Objets du store à tracer : all (défaut), none ou sample:N "
+                             "(N objets régulièrement espacés)")
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    for csv_path in args.csv_files:
+        base_name = os.path.splitext(os.path.basename(csv_path))[0]
+        lips = pd.read_csv(csv_path, header=None).to_numpy()
+        lip_sign.plot_signature(lips, os.path.join(args.output_dir, base_name + "_visu.png"))
+
+    if args.store:
+        store = lip_store.read_store(args.store)
+        if args.names:
+            indices = [store["names"].index(name) for name in args.names]
+        else:
+            indices = sorted(lip_sign.plot_selection(len(store["names"]), args.plots))
+        for i in indices:
+            for view, lips in zip(store["meta"]["views"], store["lips"][i]):
+                output = os.path.join(args.output_dir, store["names"][i] + "_" + view + "_visu.png")
+                lip_sign.plot_signature(lips, output)
+        print(f"[Info] {len(indices)} objets tracés dans {args.output_dir}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
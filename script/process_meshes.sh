@@ -18,6 +18,11 @@ fi
 # Démarrage du chrono
 START_TIME=$(date +%s)
 
+# Liste des maillages (une ligne "maillage préfixe" par maillage) : les profils
+# sont tous générés par un seul appel à imProfile (mode batch, multi-thread)
+LIST_FILE=$(mktemp)
+trap 'rm -f "$LIST_FILE"' EXIT
+
 # Parcours des sous-répertoires
 for SUBDIR in "$INPUT_DIR"/*; do
     if [ -d "$SUBDIR" ]; then
@@ -43,43 +48,42 @@ for SUBDIR in "$INPUT_DIR"/*; do
                     fi
 
                     BASENAME=$(basename "$MESH_FILE" .off)
+                    echo "$MESH_FILE $OUT_PGM/${BASENAME} $OUT_CARAC" >> "$LIST_FILE"
+                done
+            fi
+        done
+    fi
+done
 
-                    IMG1="$OUT_PGM/${BASENAME}_m.pgm"
-                    IMG2="$OUT_PGM/${BASENAME}_s.pgm"
-                    IMG3="$OUT_PGM/${BASENAME}_t.pgm"
-                    IMG_pre="$OUT_PGM/${BASENAME}"
-
-                    echo "Processing $MESH_FILE with imProfile..."
-                    ./imProfile -i "$MESH_FILE" -o "$IMG_pre"
+echo "Processing $(wc -l < "$LIST_FILE") meshes with imProfile..."
+./imProfile --list "$LIST_FILE"
 
-                    if [ ! -f "$IMG1" ] || [ ! -f "$IMG2" ] || [ ! -f "$IMG3" ]; then
-                        echo "Erreur : échec de la génération des images pour $MESH_FILE"
-                        continue
-                    fi
+while read -r MESH_FILE IMG_pre OUT_CARAC; do
+    BASENAME=$(basename "$MESH_FILE" .off)
 
-                    OUT_IMG1="$OUT_CARAC/${BASENAME}_m_visu.png"
-                    OUT_IMG2="$OUT_CARAC/${BASENAME}_s_visu.png"
-                    OUT_IMG3="$OUT_CARAC/${BASENAME}_t_visu.png"
+    IMG1="${IMG_pre}_m.pgm"
+    IMG2="${IMG_pre}_s.pgm"
+    IMG3="${IMG_pre}_t.pgm"
 
-                    CSV1="$OUT_CARAC/${BASENAME}_m.csv"
-                    CSV2="$OUT_CARAC/${BASENAME}_s.csv"
-                    CSV3="$OUT_CARAC/${BASENAME}_t.csv"
+    if [ ! -f "$IMG1" ] || [ ! -f "$IMG2" ] || [ ! -f "$IMG3" ]; then
+        echo "Erreur : échec de la génération des images pour $MESH_FILE"
+        continue
+    fi
 
-                    echo "Processing images with lip_sign.py..."
-                    python3 lip_sign.py "$IMG1" "$IMG2" "$IMG3" "$OUT_CARAC"
+    CSV1="$OUT_CARAC/${BASENAME}_m.csv"
+    CSV2="$OUT_CARAC/${BASENAME}_s.csv"
+    CSV3="$OUT_CARAC/${BASENAME}_t.csv"
 
-                    if [ ! -f "$OUT_IMG1" ] || [ ! -f "$OUT_IMG2" ] || [ ! -f "$OUT_IMG3" ] || \
-                       [ ! -f "$CSV1" ] || [ ! -f "$CSV2" ] || [ ! -f "$CSV3" ]; then
-                        echo "Erreur : échec de la génération des fichiers LIP pour $MESH_FILE"
-                        continue
-                    fi
+    echo "Processing images with lip_sign.py..."
+    python3 lip_sign.py "$IMG1" "$IMG2" "$IMG3" "$OUT_CARAC" --plots none
 
-                    echo "Traitement terminé pour $MESH_FILE"
-                done
-            fi
-        done
+    if [ ! -f "$CSV1" ] || [ ! -f "$CSV2" ] || [ ! -f "$CSV3" ]; then
+        echo "Erreur : échec de la génération des fichiers LIP pour $MESH_FILE"
+        continue
     fi
-done
+
+    echo "Traitement terminé pour $MESH_FILE"
+done < "$LIST_FILE"
 
 # Fin du chrono
 END_TIME=$(date +%s)
@@ -0,0 +1,291 @@
+"""
+Backends de transformée de Radon pour lip_sign.py.
+
+- "skimage" : skimage.transform.radon(img, theta, circle=False), qui tourne
+  l'image complète une fois par angle (comportement historique).
+- "matrix" : la transformée de Radon de skimage est linéaire en l'image ; on
+  précalcule donc une fois par (taille d'image, angles) l'opérateur creux
+  équivalent (même rotation, même interpolation bilinéaire, même padding) et
+  chaque sinogramme devient un produit matrice creuse - vecteur, ou un seul
+  produit pour un lot d'images empilées. L'opérateur est mis en cache en
+  mémoire et sur disque (LIP_RADON_CACHE, ~/.cache/lip3d par défaut) : un
+  répertoire par opérateur avec ses tableaux CSC en .npy, ouverts en mémoire
+  mappée, donc partagés entre les workers d'une même machine.
+
+Les deux backends renvoient un sinogramme [rho, angles] identique à la
+précision machine près.
+
+Les silhouettes étant surtout du fond, "matrix" ne garde que les colonnes de
+l'opérateur des pixels non nuls (les termes retirés sont des zéros exacts :
+sinogramme inchangé au bit près) ; son coût suit alors la taille de l'objet et
+non plus celle de l'image (--imageSize). "skimage" transforme l'image
+complète, seul moyen d'obtenir exactement le sinogramme historique. Dans les
+deux cas, rho_window donne les lignes du sinogramme hors desquelles il est
+exactement nul, ce qui restreint le calcul des LIP sans en changer la valeur.
+"""
+
+import hashlib
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import scipy.sparse
+from skimage.transform import radon
+from skimage.util import img_as_float
+
+DEFAULT_CACHE_DIR = os.environ.get("LIP_RADON_CACHE",
+                                   os.path.join(os.path.expanduser("~"), ".cache", "lip3d"))
+
+
+def _padding(shape):
+    """
+    Padding appliqué par skimage.transform.radon(circle=False) : taille du
+    carré padé et décalage de l'image d'origine dans ce carré.
+    """
+    diagonal = np.sqrt(2) * max(shape)
+    pad = [int(np.ceil(diagonal - s)) for s in shape]
+    new_center = [(s + p) // 2 for s, p in zip(shape, pad)]
+    old_center = [s // 2 for s in shape]
+    pad_before = [nc - oc for oc, nc in zip(old_center, new_center)]
+    size = shape[0] + pad[0]
+    if size != shape[1] + pad[1]:
+        raise ValueError('padded_image must be a square')
+    return size, pad_before
+
+
+def support_radius(imgs):
+    """
+    Rayon du cercle centré sur le centre de rotation de radon (pixel
+    (H // 2, W // 2)) qui contient tous les pixels non nuls.
+
+    Parameters:
+        imgs (ndarray): Image [H, W] ou lot d'images [N, H, W] (support commun).
+
+    Returns:
+        float: Rayon, None si les images sont vides.
+    """
+    imgs = np.asarray(imgs)
+    occupied = imgs != 0
+    if imgs.ndim == 3:
+        occupied = occupied.any(axis=0)
+    rows, cols = np.nonzero(occupied)
+    if rows.size == 0:
+        return None
+    H, W = occupied.shape
+    return float(np.sqrt(((rows - H // 2) ** 2 + (cols - W // 2) ** 2).max()))
+
+
+def rho_window(imgs):
+    """
+    Tranche de l'axe rho (sinogramme complet) en dehors de laquelle le
+    sinogramme des images est nul, quel que soit l'angle.
+
+    Parameters:
+        imgs (ndarray): Lot d'images [N, H, W].
+
+    Returns:
+        slice: Lignes du sinogramme à conserver (tout l'axe rho si les images
+        sont vides : leurs profils nuls donnent des LIP nulles).
+    """
+    imgs = np.asarray(imgs)
+    size, _ = _padding(imgs.shape[-2:])
+    radius = support_radius(imgs)
+    if radius is None:
+        return slice(0, size)
+    # Marge de 2 pixels pour l'interpolation bilinéaire
+    half = int(np.ceil(radius)) + 2
+    return slice(max(size // 2 - half, 0), min(size // 2 + half + 1, size))
+
+
+def build_radon_operator(shape, theta):
+    """
+    Construit l'opérateur creux R tel que R @ img.ravel() donne le sinogramme
+    de skimage.transform.radon(img, theta, circle=False), rangé angle par angle.
+
+    Parameters:
+        shape (tuple): Taille (H, W) des images.
+        theta (ndarray): Angles de projection en degrés.
+
+    Returns:
+        scipy.sparse.csr_matrix: Opérateur [len(theta) * D, H * W], D étant la
+        taille du carré padé (nombre de valeurs de rho).
+    """
+    H, W = shape
+    size, (pb_r, pb_c) = _padding(shape)
+    center = size // 2
+    out_r, out_c = np.mgrid[0:size, 0:size]
+    out_r = out_r.ravel().astype(np.float64)
+    out_c = out_c.ravel()
+
+    blocks = []
+    for angle in np.deg2rad(np.asarray(theta, dtype=np.float64)):
+        # Même matrice de rotation et même convention (colonne, ligne) que radon/warp
+        cos_a, sin_a = np.cos(angle), np.sin(angle)
+        c = cos_a * out_c + sin_a * out_r - center * (cos_a + sin_a - 1)
+        r = -sin_a * out_c + cos_a * out_r - center * (cos_a - sin_a - 1)
+        min_r = np.floor(r)
+        min_c = np.floor(c)
+        dr = r - min_r
+        dc = c - min_c
+        min_r = min_r.astype(np.int64) - pb_r
+        min_c = min_c.astype(np.int64) - pb_c
+
+        rows, cols, vals = [], [], []
+        for off_r, off_c, weight in ((0, 0, (1 - dr) * (1 - dc)), (0, 1, (1 - dr) * dc),
+                                     (1, 0, dr * (1 - dc)), (1, 1, dr * dc)):
+            src_r = min_r + off_r
+            src_c = min_c + off_c
+            # Hors de l'image d'origine : padding nul (ou mode constant de warp)
+            keep = (src_r >= 0) & (src_r < H) & (src_c >= 0) & (src_c < W) & (weight != 0)
+            rows.append(out_c[keep])
+            cols.append(src_r[keep] * W + src_c[keep])
+            vals.append(weight[keep])
+        blocks.append(scipy.sparse.csr_matrix(
+            (np.concatenate(vals), (np.concatenate(rows), np.concatenate(cols))),
+            shape=(size, H * W)))
+    operator = scipy.sparse.vstack(blocks, format="csr")
+    operator.sum_duplicates()
+    return operator
+
+
+class SkimageRadon:
+    """
+    Backend historique : skimage.transform.radon.
+    """
+    name = "skimage"
+
+    def __call__(self, img, theta):
+        return self.batch(np.asarray(img)[np.newaxis], theta)[0]
+
+    def batch(self, imgs, theta):
+        """
+        Sinogrammes [N, rho, angles] d'un lot d'images [N, H, W], image par
+        image sur l'image complète : recadrer l'image change la taille du
+        carré padé, donc l'arithmétique de la rotation et de la somme, et le
+        bruit d'arrondi qui en résulte (~1e-13) suffit à déplacer le maximum
+        d'un profil à plateau.
+        """
+        imgs = np.asarray(imgs)
+        n, H, W = imgs.shape
+        if n == 0:
+            return np.zeros((0, _padding((H, W))[0], len(theta)))
+        return np.stack([radon(img, theta, False) for img in imgs])
+
+
+_OPERATOR_ARRAYS = ("data", "indices", "indptr")
+
+
+def _load_operator(path, shape):
+    """
+    Opérateur CSC enregistré par _save_operator, ses tableaux ouverts en
+    mémoire mappée (np.load(mmap_mode="r")) ; None s'il est absent.
+    """
+    try:
+        arrays = [np.load(os.path.join(path, name + ".npy"), mmap_mode="r") for name in _OPERATOR_ARRAYS]
+    except (OSError, ValueError):
+        return None
+    if len(arrays[2]) != shape[1] + 1:
+        return None
+    return scipy.sparse.csc_matrix(tuple(arrays), shape=shape, copy=False)
+
+
+def _save_operator(path, operator):
+    """
+    Enregistre les tableaux CSC de l'opérateur en .npy dans le répertoire
+    path. Écriture atomique : plusieurs workers peuvent construire le même
+    opérateur, le premier renommage l'emporte.
+    """
+    parent = os.path.dirname(path)
+    os.makedirs(parent, exist_ok=True)
+    tmp = tempfile.mkdtemp(dir=parent, prefix=".tmp-")
+    try:
+        for name in _OPERATOR_ARRAYS:
+            np.save(os.path.join(tmp, name + ".npy"), getattr(operator, name))
+        os.replace(tmp, path)
+    except OSError:
+        # Répertoire déjà créé par un autre worker
+        pass
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+class MatrixRadon:
+    """
+    Backend par opérateur creux précalculé (voir build_radon_operator).
+
+    Parameters:
+        cache_dir (str): Répertoire du cache disque des opérateurs, None pour
+                         ne garder les opérateurs qu'en mémoire.
+    """
+    name = "matrix"
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self._operators = {}
+
+    def operator(self, shape, theta):
+        """
+        Retourne l'opérateur de (shape, theta), depuis la mémoire, le disque
+        ou en le construisant.
+        """
+        theta = np.ascontiguousarray(theta, dtype=np.float64)
+        key = "radon_{}x{}_{}".format(shape[0], shape[1], hashlib.sha1(theta.tobytes()).hexdigest()[:16])
+        if key in self._operators:
+            return self._operators[key]
+        path = None
+        operator = None
+        if self.cache_dir is not None:
+            path = os.path.join(self.cache_dir, key)
+            operator = _load_operator(path, (len(theta) * _padding(shape)[0], shape[0] * shape[1]))
+        if operator is None:
+            # Format CSC : extraction rapide des colonnes des pixels non nuls
+            operator = build_radon_operator(shape, theta).tocsc()
+            if path is not None:
+                _save_operator(path, operator)
+                # Relu en mémoire mappée : pages partagées avec les autres workers
+                mapped = _load_operator(path, operator.shape)
+                if mapped is not None:
+                    operator = mapped
+        self._operators[key] = operator
+        return operator
+
+    def __call__(self, img, theta):
+        return self.batch(np.asarray(img)[np.newaxis], theta)[0]
+
+    def batch(self, imgs, theta):
+        """
+        Sinogrammes [N, rho, angles] d'un lot d'images [N, H, W] en un seul
+        produit matrice creuse - matrice dense, restreint aux colonnes des
+        pixels non nuls d'au moins une image du lot.
+        """
+        imgs = img_as_float(np.asarray(imgs))
+        n, H, W = imgs.shape
+        operator = self.operator((H, W), theta)
+        pixels = imgs.reshape(n, H * W)
+        support = np.flatnonzero(pixels.any(axis=0))
+        if support.size < H * W:
+            operator = operator[:, support]
+            pixels = pixels[:, support]
+        sinograms = operator @ pixels.T
+        # [angles * rho, N] -> [N, rho, angles]
+        return sinograms.reshape(len(theta), -1, n).transpose(2, 1, 0)
+
+
+RADON_BACKENDS = {
+    SkimageRadon.name: SkimageRadon,
+    MatrixRadon.name: MatrixRadon,
+}
+
+_instances = {}
+
+
+def get_radon_backend(name="skimage"):
+    """
+    Retourne l'instance (partagée par processus) du backend demandé.
+    """
+    if name not in RADON_BACKENDS:
+        raise ValueError(f"Backend Radon '{name}' non reconnu. Utilisez {' ou '.join(RADON_BACKENDS)}.")
+    if name not in _instances:
+        _instances[name] = RADON_BACKENDS[name]()
+    return _instances[name]
@@ -0,0 +1,223 @@
+"""
+Recherche des hyperparamètres de la forêt aléatoire par successive halving
+sur le nombre d'arbres, en remplacement de GridSearchCV.
+
+Toutes les combinaisons de la grille (hors n_estimators) sont évaluées en
+validation croisée avec peu d'arbres ; seul le meilleur tiers (factor) passe
+au palier suivant, avec factor fois plus d'arbres, jusqu'à n_estimators
+maximal. Les forêts des candidats retenus sont agrandies (warm_start) au lieu
+d'être réapprises : avec le même random_state, une forêt agrandie à n arbres
+est identique à une forêt apprise directement avec n arbres.
+
+Les plis de validation croisée (StratifiedKFold, comme GridSearchCV) et les
+matrices float32 contiguës de chaque pli sont construits une seule fois et
+partagés par tous les candidats (les arbres de scikit-learn travaillent en
+float32 : pas de conversion à chaque apprentissage).
+
+Les scores sont enregistrés au fur et à mesure dans le fichier JSON des
+hyperparamètres, sous la clef "_search" (ignorée par load_hyperparameters) :
+une recherche interrompue reprend là où elle s'était arrêtée. Une fois la
+recherche terminée, le fichier contient les meilleurs hyperparamètres.
+
+Usage :
+    python rf_search.py train_caracs.npy train_labels.npy -o best_rf_params.json
+"""
+
+import argparse
+import itertools
+import json
+import math
+import os
+import sys
+import time
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.model_selection import StratifiedKFold
+
+import lip_profiling
+import lip_store
+
+# Grille de train_randomForest2.py
+DEFAULT_GRID = {
+    'n_estimators': [100, 200, 300],
+    'max_depth': [None, 10, 20, 30],
+    'min_samples_split': [2, 5, 10],
+    'min_samples_leaf': [1, 2, 4],
+    'max_features': ['sqrt']
+}
+
+
+def load_checkpoint(file_path):
+    """
+    Contenu du fichier JSON des hyperparamètres ({} s'il n'existe pas).
+    """
+    if not file_path or not os.path.isfile(file_path):
+        return {}
+    with open(file_path) as f:
+        return json.load(f)
+
+
+def save_checkpoint(content, file_path):
+    """
+    Écriture atomique du fichier JSON des hyperparamètres.
+    """
+    tmp = file_path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(content, f, indent=4)
+    os.replace(tmp, file_path)
+
+
+def budgets(max_trees, min_trees, factor):
+    """
+    Nombres d'arbres des paliers : max_trees, max_trees / factor, ... tant
+    que >= min_trees (au moins un palier), par ordre croissant.
+    """
+    levels = [max_trees]
+    while levels[-1] // factor >= min_trees:
+        levels.append(levels[-1] // factor)
+    return levels[::-1]
+
+
+def candidate_key(params):
+    return json.dumps(params, sort_keys=True)
+
+
+def make_folds(X, y, cv=5):
+    """
+    Plis de validation croisée, construits une fois : couples
+    ((X_train, y_train), (X_val, y_val)) en float32 contigu.
+    """
+    X = np.ascontiguousarray(X, dtype=np.float32)
+    y = np.asarray(y).ravel()
+    folds = []
+    for train, val in StratifiedKFold(n_splits=cv).split(X, y):
+        folds.append(((np.ascontiguousarray(X[train]), y[train]), (np.ascontiguousarray(X[val]), y[val])))
+    return folds
+
+
+def successive_halving_search(X, y, param_grid=None, cv=5, factor=3, min_trees=None, warm_start=True,
+                              checkpoint=None, n_jobs=-1, random_state=42, verbose=1):
+    """
+    Successive halving sur n_estimators.
+
+    Parameters:
+        X (ndarray | DataFrame): Caractéristiques d'apprentissage.
+        y (ndarray): Labels.
+        param_grid (dict): Grille au format GridSearchCV ; n_estimators donne le
+                    nombre d'arbres maximal (défaut : DEFAULT_GRID).
+        cv (int): Nombre de plis.
+        factor (int): Un candidat sur factor est conservé à chaque palier, qui
+                    a factor fois plus d'arbres.
+        min_trees (int): Arbres du premier palier (défaut : plus petite valeur
+                    de n_estimators divisée par factor).
+        warm_start (bool): Agrandit les forêts des candidats conservés au lieu
+                    de les réapprendre (mémoire : forêts des candidats conservés).
+        checkpoint (str): Fichier JSON des hyperparamètres où enregistrer la
+                    progression et le résultat.
+        n_jobs (int): Processus par forêt.
+
+    Returns:
+        dict: Meilleurs hyperparamètres (dont n_estimators).
+    """
+    grid = dict(DEFAULT_GRID if param_grid is None else param_grid)
+    n_estimators = grid.pop('n_estimators', [100])
+    max_trees = max(n_estimators)
+    if min_trees is None:
+        min_trees = max(min(n_estimators) // factor, 1)
+    levels = budgets(max_trees, min_trees, factor)
+    names = sorted(grid)
+    candidates = [dict(zip(names, values)) for values in itertools.product(*(grid[n] for n in names))]
+
+    settings = {"grid": dict(grid, n_estimators=n_estimators), "cv": cv, "factor": factor, "levels": levels,
+                "random_state": random_state}
+    content = load_checkpoint(checkpoint)
+    state = content.get("_search")
+    if not state or state.get("settings") != settings:
+        state = {"settings": settings, "scores": {}, "done": False}
+    scores = state["scores"]
+
+    with lip_profiling.stage("folds", n=len(X)):
+        folds = make_folds(X, y, cv)
+    forests = {}
+    survivors = candidates
+    for rung, trees in enumerate(levels):
+        if verbose:
+            print(f"[Info] Palier {rung + 1}/{len(levels)} : {len(survivors)} candidats, {trees} arbres")
+        n_keep = max(math.ceil(len(survivors) / factor), 1) if rung < len(levels) - 1 else 1
+        results = []
+        for params in survivors:
+            key = candidate_key(params)
+            done = scores.get(key, {}).get(str(trees))
+            if done is None:
+                start = time.perf_counter()
+                fold_scores = []
+                for i, ((X_tr, y_tr), (X_va, y_va)) in enumerate(folds):
+                    model = forests.pop((key, i), None)
+                    if model is None:
+                        model = RandomForestClassifier(**params, random_state=random_state, n_jobs=n_jobs,
+                                                       warm_start=warm_start)
+                    model.set_params(n_estimators=trees)
+                    with lip_profiling.stage("fit", n=len(X_tr), trees=trees):
+                        model.fit(X_tr, y_tr)
+                    with lip_profiling.stage("predict", n=len(X_va), trees=trees):
+                        fold_scores.append(float(np.mean(model.predict(X_va) == y_va)))
+                    if warm_start and rung < len(levels) - 1:
+                        forests[(key, i)] = model
+                done = float(np.mean(fold_scores))
+                scores.setdefault(key, {})[str(trees)] = done
+                if checkpoint:
+                    save_checkpoint(dict(content, _search=state), checkpoint)
+                if verbose > 1:
+                    print(f"    {params} : {done:.4f} ({time.perf_counter() - start:.1f} s)")
+            results.append((done, params))
+            # Seules les forêts des n_keep meilleurs candidats du palier sont gardées en mémoire
+            ranked = sorted(results, key=lambda item: -item[0])
+            for _, dropped in ranked[n_keep:]:
+                for i in range(len(folds)):
+                    forests.pop((candidate_key(dropped), i), None)
+        # Tri stable : à score égal, ordre de la grille (comme GridSearchCV)
+        survivors = [params for _, params in sorted(results, key=lambda item: -item[0])[:n_keep]]
+
+    best_score = scores[candidate_key(survivors[0])][str(levels[-1])]
+    best = dict(survivors[0], n_estimators=max_trees)
+    state["done"] = True
+    state["best_score"] = best_score
+    if verbose:
+        print("Meilleurs paramètres trouvés :", best, f"(score {best_score:.4f})")
+    if checkpoint:
+        # Les meilleurs hyperparamètres remplacent les éventuels précédents
+        save_checkpoint(dict(best, _search=state), checkpoint)
+    return best
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Hyperparamètres de la forêt aléatoire par successive halving.")
+    parser.add_argument("features", type=str, help="Fichier caracs d'apprentissage (.npy ou .txt)")
+    parser.add_argument("labels", type=str, help="Fichier labels d'apprentissage")
+    parser.add_argument("-o", "--output", type=str, required=True,
+                        help="Fichier JSON des hyperparamètres (progression et reprise)")
+    parser.add_argument("--grid", type=str, help="Grille au format JSON (défaut : grille de train_randomForest2.py)")
+    parser.add_argument("--cv", type=int, default=5, help="Nombre de plis")
+    parser.add_argument("--factor", type=int, default=3, help="Facteur de réduction entre paliers")
+    parser.add_argument("--min_trees", type=int, help="Arbres du premier palier")
+    parser.add_argument("--no_warm_start", action="store_true", help="Réapprendre les forêts à chaque palier")
+    parser.add_argument("-j", "--jobs", type=int, default=-1, help="Processus par forêt")
+    lip_profiling.add_arguments(parser)
+    args = parser.parse_args(argv)
+    lip_profiling.configure_from_args(args)
+
+    with lip_profiling.stage("read"):
+        X = lip_store.load_feature_matrix(args.features)
+        y = lip_store.load_labels(args.labels)
+    grid = None
+    if args.grid:
+        with open(args.grid) as f:
+            grid = json.load(f)
+    successive_halving_search(X, y, grid, args.cv, args.factor, args.min_trees, not args.no_warm_start,
+                              args.output, args.jobs)
+    lip_profiling.report()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,408 @@
+"""
+Pilote batch de toute la chaîne : maillage .off -> images de profil .pgm
+(imProfile) -> signatures LIP .csv (lip_sign.py) -> vecteurs de
+caractéristiques (make_custom_feature_file.py).
+
+Avec --silhouettes python, les images de profil sont calculées en mémoire par
+silhouette.py (mêmes images qu'imProfile) : ni sous-processus ni fichier .pgm.
+
+Remplace process_meshes.sh et process_lip.sh : les objets sont répartis sur un
+pool de processus, les modules lourds (skimage, pandas, cv2) ne sont importés
+qu'une fois par worker, et les fichiers caracs/names/labels sont écrits dans
+un ordre déterministe (catégorie, puis nom d'objet).
+
+Arborescence attendue en entrée :
+    input_dir/<categorie>/{train,test}/*.off
+Arborescence produite :
+    output_dir/<categorie>/{train,test}/{pgm,carac}/
+    output_dir/EXP/<exp>/{train,test}_{caracs,names,labels}.txt
+    output_dir/EXP/<exp>/{train,test}_{caracs,labels}.npy  (float32 / int64)
+"""
+
+import argparse
+import io
+import multiprocessing
+import os
+import shutil
+import subprocess
+import sys
+import time
+
+# Modules lourds importés une seule fois par worker (hérités ou réimportés
+# selon la méthode de démarrage du pool)
+import cv2
+import numpy as np
+import lip_cache
+import lip_profiling
+import lip_store
+import lip_sign
+import make_custom_feature_file
+import silhouette
+
+SUBSETS = ("train", "test")
+VIEWS = ("m", "s", "t")
+
+
+def discover_objects(input_dir, output_dir):
+    """
+    Parcourt l'arborescence catégorie/train|test/*.off.
+
+    Les labels sont attribués dans l'ordre alphabétique des catégories (le
+    répertoire EXP est ignoré), comme le faisait process_lip.sh.
+
+    Returns:
+        list: Tâches (dict) triées par sous-ensemble, label puis nom.
+    """
+    categories = sorted(d for d in os.listdir(input_dir)
+                        if os.path.isdir(os.path.join(input_dir, d)) and d != "EXP" and not d.startswith("."))
+    jobs = []
+    for label, category in enumerate(categories):
+        for subset in SUBSETS:
+            subset_path = os.path.join(input_dir, category, subset)
+            if not os.path.isdir(subset_path):
+                continue
+            out_path = os.path.join(output_dir, category, subset)
+            for mesh_file in sorted(f for f in os.listdir(subset_path) if f.endswith(".off")):
+                jobs.append({
+                    "mesh": os.path.join(subset_path, mesh_file),
+                    "name": mesh_file[:-len(".off")],
+                    "category": category,
+                    "label": label,
+                    "subset": subset,
+                    "pgm_dir": os.path.join(out_path, "pgm"),
+                    "carac_dir": os.path.join(out_path, "carac"),
+                })
+    jobs.sort(key=lambda job: (SUBSETS.index(job["subset"]), job["label"], job["name"]))
+    return jobs
+
+
+def process_object(job, options):
+    """
+    Traite un objet : génère les profils, les signatures LIP puis le vecteur
+    de caractéristiques. Chaque étape est sautée si son résultat est déjà
+    dans le cache (options["cache"]).
+
+    Returns:
+        dict: "job", "line" (ligne du fichier caracs), "lips" (signatures
+              [3, angles, 6]), "circularity" (circularités des trois profils),
+              "error" (message ou None), "used" (entrées de cache utilisées)
+              et "timings" (mesures de lip_profiling, à fusionner dans le
+              processus principal).
+    """
+    if options.get("profile") and not lip_profiling.enabled():
+        # Worker démarré par spawn : reprend la configuration du processus principal
+        lip_profiling.configure(*options["profile"])
+    with lip_profiling.profile_object(job["name"], job.get("index", 0)):
+        try:
+            result = _process_object(job, options)
+        except Exception as e:
+            # Une erreur sur un objet ne doit pas interrompre tout le lot
+            result = _failure(job, "erreur inattendue ({}: {})".format(type(e).__name__, e), [])
+    result["timings"] = lip_profiling.drain()
+    return result
+
+
+def _process_object(job, options):
+    cache = options["cache"]
+    used = []
+    if options["silhouettes"] != "python":
+        os.makedirs(job["pgm_dir"], exist_ok=True)
+    os.makedirs(job["carac_dir"], exist_ok=True)
+    prefix = os.path.join(job["pgm_dir"], job["name"])
+    profiles = [prefix + "_" + v + ".pgm" for v in VIEWS]
+    pgm_names = [os.path.basename(p) for p in profiles]
+
+    # 1. Images de profil
+    imgs = None
+    if options["silhouettes"] == "python":
+        # Silhouettes calculées en mémoire (silhouette.py), sans fichier .pgm
+        hit = None
+        if cache is not None:
+            key = lip_cache.make_key("silhouettes", [lip_cache.file_digest(job["mesh"])],
+                                     {"version": silhouette.SILHOUETTE_VERSION})
+            hit = cache.get("silhouettes", key)
+            used.append(("silhouettes", key))
+        if hit is not None:
+            lip_profiling.count("cache_hit:silhouettes")
+            imgs = np.load(os.path.join(hit, "silhouettes.npy"))
+        else:
+            lip_profiling.count("cache_miss:silhouettes")
+            try:
+                with lip_profiling.stage("profiles", object=job["name"]):
+                    imgs = silhouette.silhouettes(job["mesh"], mesh_cache=options["mesh_cache"])
+            except (OSError, ValueError) as e:
+                return _failure(job, "échec du calcul des silhouettes ({})".format(e or "fichier tronqué"), used)
+            if cache is not None:
+                cache.put("silhouettes", key, data={"silhouettes.npy": _npy_bytes(imgs)})
+    elif not (options["skip_profiles"] and all(os.path.isfile(p) for p in profiles)):
+        hit = None
+        if cache is not None:
+            key = lip_cache.make_key("profiles", [lip_cache.file_digest(job["mesh"]),
+                                                  options["imProfile_digest"]])
+            hit = cache.get("profiles", key)
+        if hit is not None:
+            lip_profiling.count("cache_hit:profiles")
+            for name, profile in zip(VIEWS, profiles):
+                shutil.copyfile(os.path.join(hit, name + ".pgm"), profile)
+        else:
+            lip_profiling.count("cache_miss:profiles")
+            with lip_profiling.stage("profiles", object=job["name"]):
+                result = subprocess.run([options["imProfile"], "-i", job["mesh"], "-o", prefix],
+                                        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+            if result.returncode != 0 or not all(os.path.isfile(p) for p in profiles):
+                return _failure(job, "échec de la génération des images ({})".format(
+                    result.stderr.decode(errors="replace").strip()), used)
+            if cache is not None:
+                cache.put("profiles", key, files={v + ".pgm": p for v, p in zip(VIEWS, profiles)})
+        if cache is not None:
+            used.append(("profiles", key))
+
+    # 2. Signatures LIP
+    lip_params = {"ANGLE": options["ANGLE"], "m": options["m"], "radon": options["radon"],
+                  "tie_rtol": options["tie_rtol"], "version": lip_sign.LIP_VERSION}
+    if options["coarse"]:
+        lip_params.update(coarse=options["coarse"], fine=options["fine"])
+    hit = None
+    if cache is not None:
+        digests = ([lip_cache.data_digest(img) for img in imgs] if imgs is not None
+                   else [lip_cache.file_digest(p) for p in profiles])
+        lip_key = lip_cache.make_key("lip", digests, lip_params)
+        hit = cache.get("lip", lip_key)
+        used.append(("lip", lip_key))
+    if hit is not None and not all(os.path.isfile(os.path.join(hit, f)) for f in ("circularity.npy", "normalisation.npz")):
+        # Entrée antérieure au calcul de la circularité ou à l'enregistrement de la normalisation
+        hit = None
+    if hit is not None:
+        lip_profiling.count("cache_hit:lip")
+        lips = list(np.load(os.path.join(hit, "lips.npy")))
+        circularities = np.load(os.path.join(hit, "circularity.npy"))
+        with np.load(os.path.join(hit, "normalisation.npz")) as data:
+            normalisation = {k: data[k] for k in ("shifts", "flips", "merits")}
+    else:
+        lip_profiling.count("cache_miss:lip")
+        if imgs is None:
+            imgs = []
+            for profile in profiles:
+                with lip_profiling.stage("read", object=job["name"]):
+                    img = cv2.imread(profile, 0)
+                if img is None:
+                    return _failure(job, "lecture impossible de " + profile, used)
+                imgs.append(img)
+        lips, shifts, flips, merits = lip_sign.lip_signatures_batch(np.stack(imgs), options["ANGLE"], options["m"],
+                                                                   options["radon"], coarse=options["coarse"],
+                                                                   fine=options["fine"], tie_rtol=options["tie_rtol"])
+        lips = list(lips)
+        # Décalage (int), retournement (bool) et orientation merit (float) de chaque vue [3 vues]
+        normalisation = {"shifts": shifts, "flips": flips, "merits": merits}
+        # Circularité calculée sur les images déjà en mémoire
+        with lip_profiling.stage("circularity", object=job["name"]):
+            circularities = make_custom_feature_file.circularity_batch(np.stack(imgs))
+        if cache is not None:
+            cache.put("lip", lip_key, data={"lips.npy": _npy_bytes(np.stack(lips)),
+                                            "circularity.npy": _npy_bytes(circularities),
+                                            "normalisation.npz": _npz_bytes(shifts=shifts, flips=flips,
+                                                                            merits=merits)})
+    for view, lip in zip(VIEWS, lips):
+        with lip_profiling.stage("csv_write", object=job["name"]):
+            lip_sign.save_signature(lip, os.path.join(job["carac_dir"], job["name"] + "_" + view + ".csv"))
+        if job.get("plot"):
+            with lip_profiling.stage("plot", object=job["name"]):
+                lip_sign.plot_signature(lip, os.path.join(job["carac_dir"], job["name"] + "_" + view + "_visu.png"))
+
+    # 3. Vecteur de caractéristiques
+    feature_params = {"stats": list(options["stats"]), "mode": options["mode"],
+                      "use_circularity": options["use_circularity"],
+                      "use_orientation_merit": options["use_orientation_merit"],
+                      "version": make_custom_feature_file.FEATURE_VERSION}
+    hit = None
+    if cache is not None:
+        feature_key = lip_cache.make_key("features", [lip_key], feature_params)
+        hit = cache.get("features", feature_key)
+        used.append(("features", feature_key))
+    if hit is not None:
+        lip_profiling.count("cache_hit:features")
+        with open(os.path.join(hit, "feature.txt")) as f:
+            line = f.read()
+        if os.path.isfile(os.path.join(hit, "feature.npy")):
+            feature = np.load(os.path.join(hit, "feature.npy"))
+        else:
+            # Entrée antérieure au format binaire : valeurs relues depuis le texte (repr exacte)
+            feature = np.array(line.split(), dtype=np.float64)
+    else:
+        lip_profiling.count("cache_miss:features")
+        feature = make_custom_feature_file.object_feature_vector(
+            lips[0], lips[1], lips[2],
+            use_circularity=options["use_circularity"],
+            use_orientation_merit=options["use_orientation_merit"],
+            stats=options["stats"], mode=options["mode"], circularities=circularities)
+        line = make_custom_feature_file.format_feature_vector(feature)
+        if cache is not None:
+            cache.put("features", feature_key, data={"feature.txt": line, "feature.npy": _npy_bytes(feature)})
+    return {"job": job, "line": line, "feature": feature, "lips": np.stack(lips), "circularity": circularities,
+            "normalisation": normalisation, "error": None, "used": used}
+
+
+def _failure(job, error, used):
+    return {"job": job, "line": None, "feature": None, "lips": None, "circularity": None, "error": error, "used": used}
+
+
+def _npy_bytes(array):
+    buffer = io.BytesIO()
+    np.save(buffer, array)
+    return buffer.getvalue()
+
+
+def _npz_bytes(**arrays):
+    buffer = io.BytesIO()
+    np.savez(buffer, **arrays)
+    return buffer.getvalue()
+
+
+def _process_object_star(args):
+    return process_object(*args)
+
+
+def write_outputs(results, exp_dir, options, store=False):
+    """
+    Écrit les fichiers caracs/names/labels de chaque sous-ensemble dans
+    l'ordre des tâches (caracs et labels aussi en .npy), et si store est demandé les signatures consolidées
+    dans <exp_dir>/<subset>_lips (voir lip_store.py).
+    """
+    os.makedirs(exp_dir, exist_ok=True)
+    # Schéma des colonnes des caracs (noms et paramètres de l'agrégation)
+    by_label = {r["job"]["label"]: r["job"]["category"] for r in results}
+    categories = [by_label.get(label) for label in range(max(by_label) + 1)] if by_label else []
+    params = {k: options[k] for k in ("stats", "mode", "use_circularity", "use_orientation_merit",
+                                      "ANGLE", "m", "coarse", "fine", "radon", "tie_rtol")}
+    params["stats"] = list(params["stats"])
+    layout = make_custom_feature_file.feature_layout(options["stats"], options["mode"], options["use_circularity"],
+                                                     options["use_orientation_merit"])
+    make_custom_feature_file.write_feature_schema(exp_dir, layout, params, categories)
+    for subset in SUBSETS:
+        subset_results = [r for r in results if r["job"]["subset"] == subset and r["error"] is None]
+        rows = [(r["job"], r["line"]) for r in subset_results]
+        with open(os.path.join(exp_dir, subset + "_caracs.txt"), "w") as f_caracs, \
+             open(os.path.join(exp_dir, subset + "_names.txt"), "w") as f_names, \
+             open(os.path.join(exp_dir, subset + "_labels.txt"), "w") as f_labels:
+            for job, line in rows:
+                f_caracs.write(line + "\n")
+                f_names.write(job["name"] + "\n")
+                f_labels.write(str(job["label"]) + "\n")
+        # Forme binaire float32, sans passer par le texte
+        features = np.array([r["feature"] for r in subset_results], dtype=np.float32).reshape(-1, len(layout))
+        lip_store.write_caracs(exp_dir, subset, features, [job["label"] for job, _ in rows])
+        if store and subset_results:
+            lip_store.write_store(
+                os.path.join(exp_dir, subset + "_lips"),
+                np.stack([r["lips"] for r in subset_results]),
+                [r["job"]["name"] for r in subset_results],
+                [r["job"]["label"] for r in subset_results],
+                None if options["silhouettes"] == "python" else
+                [[os.path.join(r["job"]["pgm_dir"], r["job"]["name"] + "_" + v + ".pgm") for v in VIEWS]
+                 for r in subset_results],
+                meta={"ANGLE": options["ANGLE"], "m": options["m"], "coarse": options["coarse"], "fine": options["fine"],
+                      "categories": categories},
+                circularity=np.stack([r["circularity"] for r in subset_results]),
+                normalisation={k: np.stack([r["normalisation"][k] for r in subset_results])
+                               for k in ("shifts", "flips", "merits")})
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Pipeline complet maillages -> profils -> LIP -> caracs.")
+    parser.add_argument("input_dir", type=str, help="Racine des maillages (categorie/train|test/*.off)")
+    parser.add_argument("output_dir", type=str, help="Racine des sorties (pgm, carac et EXP)")
+    parser.add_argument("--exp", type=str, default="defaut", help="Nom de l'expérience (sous-dossier de EXP)")
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count(), help="Nombre de processus")
+    parser.add_argument("--imProfile", type=str,
+                        default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "imProfile"),
+                        help="Chemin vers l'exécutable imProfile")
+    parser.add_argument("--silhouettes", type=str, default="imProfile", choices=["imProfile", "python"],
+                        help="Images de profil : imProfile (fichiers .pgm) ou python (silhouette.py, en mémoire)")
+    parser.add_argument("--skip_profiles", action="store_true",
+                        help="Réutiliser les images .pgm déjà présentes (avec --silhouettes imProfile)")
+    parser.add_argument("--use_circularity", action="store_true", help="Include circularity in features")
+    parser.add_argument("--use_orientation_merit", action="store_true", help="Include orientation merit in features")
+    parser.add_argument("--stats", type=str, nargs="+", default=["max", "min", "median"],
+                        help="Statistiques locales (max, min, median, mean, std)")
+    parser.add_argument("--mode", type=str, default="default",
+                        choices=["default", "ref_by_LIP0", "ref_by_LIP0_fft"], help="Mode de local_features")
+    lip_sign.add_radon_arguments(parser)
+    lip_sign.add_resolution_arguments(parser)
+    parser.add_argument("--plots", type=lip_sign.parse_plots_option, default=("none", None),
+                        help="Figures *_visu.png : none (défaut), all ou sample:N "
+                             "(N objets régulièrement espacés)")
+    parser.add_argument("--store", action="store_true",
+                        help="Écrire aussi les signatures consolidées (<exp>/<subset>_lips, voir lip_store.py)")
+    parser.add_argument("--cache_dir", type=str, default=None,
+                        help="Répertoire du cache (défaut : <output_dir>/.lip_cache)")
+    parser.add_argument("--no_cache", action="store_true",
+                        help="Désactiver le cache (et le cache binaire des maillages, voir --no_mesh_cache)")
+    parser.add_argument("--no_mesh_cache", action="store_true",
+                        help="Ne pas lire ni écrire <fichier>.off.float64.cache à côté des maillages "
+                             "(--silhouettes python)")
+    parser.add_argument("--cache_max_size", type=float, default=None,
+                        help="Taille maximale du cache en Mo (éviction LRU)")
+    parser.add_argument("--force", action="store_true", help="Recalculer toutes les étapes et remplacer le cache")
+    lip_profiling.add_arguments(parser)
+    args = parser.parse_args(argv)
+    lip_profiling.configure_from_args(args)
+
+    start_time = time.time()
+    jobs = discover_objects(args.input_dir, args.output_dir)
+    print(f"[Info] {len(jobs)} objets à traiter avec {args.workers} workers")
+    for i, job in enumerate(jobs):
+        job["index"] = i
+    for i in lip_sign.plot_selection(len(jobs), args.plots):
+        jobs[i]["plot"] = True
+
+    cache = None
+    if not args.no_cache:
+        cache = lip_cache.LipCache(args.cache_dir or os.path.join(args.output_dir, ".lip_cache"),
+                                   force=args.force)
+
+    options = {
+        "cache": cache,
+        "imProfile": args.imProfile,
+        "imProfile_digest": lip_cache.file_digest(args.imProfile) if os.path.isfile(args.imProfile) else "",
+        "skip_profiles": args.skip_profiles,
+        "silhouettes": args.silhouettes,
+        # Cache binaire écrit dans le répertoire des maillages : suit --no_cache
+        "mesh_cache": not (args.no_cache or args.no_mesh_cache),
+        "use_circularity": args.use_circularity,
+        "use_orientation_merit": args.use_orientation_merit,
+        "stats": tuple(args.stats),
+        "mode": args.mode,
+        "radon": args.radon,
+        "tie_rtol": args.tie_rtol,
+        "ANGLE": args.angle_range,
+        "m": args.angles,
+        "coarse": args.coarse,
+        "fine": args.fine,
+        "profile": (args.profile, args.profile_sample, args.profile_mode, args.profile_dir) if args.profile else None,
+    }
+
+    results = []
+    with multiprocessing.Pool(args.workers) as pool:
+        for result in pool.imap(_process_object_star, [(job, options) for job in jobs], chunksize=4):
+            if result["error"] is not None:
+                print(f"[Warning] {result['job']['mesh']} : {result['error']}", file=sys.stderr)
+            lip_profiling.merge(result.pop("timings"))
+            results.append(result)
+
+    with lip_profiling.stage("write"):
+        write_outputs(results, os.path.join(args.output_dir, "EXP", args.exp), options, store=args.store)
+
+    if cache is not None:
+        max_size = None if args.cache_max_size is None else int(args.cache_max_size * 1024 * 1024)
+        evicted = cache.update_manifest([entry for result in results for entry in result["used"]], max_size)
+        if evicted:
+            print(f"[Info] {len(evicted)} entrées évincées du cache")
+
+    n_errors = sum(1 for result in results if result["error"] is not None)
+    print(f"[Info] {len(results) - n_errors} objets traités, {n_errors} en échec")
+    print(f"[Info] Temps total d'exécution : {time.time() - start_time:.1f} secondes")
+    lip_profiling.report()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
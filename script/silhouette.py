@@ -0,0 +1,638 @@
+"""
+Images de profil (silhouettes) calculées en Python, sans imProfile.
+
+Reprend la chaîne de Main.cpp sur des tableaux NumPy :
+    1. lecture du maillage .off (off_reader.py, avec cache binaire) ;
+    2. normalisation : translation du coin inférieur de la boîte englobante à
+       l'origine, mise à l'échelle diagonale -> image_size ;
+    3. voxelisation 26-séparante des triangles (comme MeshVoxelizer<Set, 26>),
+       domaine élargi de max_scan voxels ;
+    4. directions principales des voxels (comme getMainDirsFromVoxels : mêmes
+       sommes dans l'ordre du domaine et même décomposition propre que
+       DGtal::EigenDecomposition, donc mêmes signes des axes) ;
+    5. balayage d'un plan le long de chaque direction (comme compute2D_profile
+       et Point2DEmbedderIn3D), vectorisé sur les pixels et les pas.
+
+Les trois silhouettes [3, image_size, image_size] (uint8, 0/255) restent en
+mémoire et peuvent être données directement à lip_sign.lip_signatures_batch
+(run_pipeline.py --silhouettes python). Une entrée peut aussi être un tableau
+de voxels .npy : volume [X, Y, Z] (voxels non nuls occupés) ou liste de points
+entiers [N, 3], déjà à l'échelle de l'image ; le domaine est alors la boîte
+englobante des voxels élargie de max_scan.
+
+--compare calcule aussi les profils avec imProfile et compte les pixels
+différents par vue ; l'écart est accepté sous --tolerance (fraction des pixels
+de la réunion des deux silhouettes).
+
+Usage :
+    python silhouette.py ../examples/toilet_0046.off -o ./results/
+    python silhouette.py ../examples/*.off --compare --imProfile ./imProfile
+"""
+
+import argparse
+import math
+import os
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+
+import lip_profiling
+import off_reader
+
+# Version du calcul des silhouettes, à incrémenter quand les images produites
+# changent (invalide les entrées du cache de run_pipeline.py)
+SILHOUETTE_VERSION = 1
+
+# Valeurs par défaut de Main.cpp (Options)
+IMAGE_SIZE = 100
+MAX_SCAN = 50
+
+VIEWS = ("m", "s", "t")
+
+# Cibles d'intersection de la voxelisation 26-séparante (IntersectionTarget<Space, 26, 1>) :
+# les quatre grandes diagonales du voxel
+_TARGET_FIRST = np.array([[-0.5, 0.5, 0.5], [0.5, 0.5, 0.5], [0.5, 0.5, -0.5], [-0.5, 0.5, -0.5]])
+_TARGET_SECOND = np.array([[0.5, -0.5, -0.5], [-0.5, -0.5, -0.5], [-0.5, -0.5, 0.5], [0.5, -0.5, 0.5]])
+
+
+def _normalized(v):
+    # PointVector::getNormalized : division de chaque composante par la norme
+    return v / math.sqrt(v[0] * v[0] + v[1] * v[1] + v[2] * v[2])
+
+
+def _target_bases():
+    # Bases des plans de projection des cibles (IntersectionTarget<Space, 26, 1>)
+    coef = 1. / math.sqrt(3.)
+    normals = [(coef, -coef, -coef), (-coef, -coef, -coef), (-coef, -coef, coef), (coef, -coef, coef)]
+    e1 = np.array([_normalized(np.array([-y, x, 0.])) for x, y, z in normals])
+    e2 = np.array([_normalized(np.array([-x * z, -y * z, x * x + y * y])) for x, y, z in normals])
+    return e1, e2
+
+
+_TARGET_E1, _TARGET_E2 = _target_bases()
+
+
+def _dot(a, b):
+    # Produit scalaire dans l'ordre de DGtal::dotProduct (mêmes arrondis)
+    return a[..., 0] * b[..., 0] + a[..., 1] * b[..., 1] + a[..., 2] * b[..., 2]
+
+
+def normalize_mesh(vertices, image_size=IMAGE_SIZE):
+    """
+    Translation du coin inférieur de la boîte englobante à l'origine puis mise
+    à l'échelle de la diagonale à image_size (étape 2 de Main.cpp).
+    """
+    lower = vertices.min(axis=0)
+    diagonal = lower - vertices.max(axis=0)
+    scale = image_size / math.sqrt(diagonal[0] * diagonal[0] + diagonal[1] * diagonal[1] + diagonal[2] * diagonal[2])
+    return (vertices + (-lower)) * scale
+
+
+def voxelize(vertices, triangles, lower, upper, chunk_size=1 << 16):
+    """
+    Voxelisation 26-séparante des triangles (MeshVoxelizer<Set, 26>) : un
+    voxel de la boîte englobante entière d'un triangle est occupé si l'une
+    de ses quatre diagonales traverse le plan du triangle et si son centre,
+    projeté le long de cette diagonale, tombe dans le triangle projeté.
+
+    Les voxels candidats de tous les triangles sont testés ensemble, par
+    paquets d'au plus chunk_size voxels.
+
+    Parameters:
+        vertices (ndarray): Sommets normalisés [n, 3].
+        triangles (ndarray): Indices des triangles [k, 3].
+        lower, upper (ndarray): Bornes entières du domaine (incluses).
+
+    Returns:
+        ndarray: Occupation booléenne [X, Y, Z], indicée par (p - lower).
+    """
+    lower = np.asarray(lower, dtype=np.int64)
+    upper = np.asarray(upper, dtype=np.int64)
+    occupancy = np.zeros(upper - lower + 1, dtype=bool)
+    if len(triangles) == 0:
+        return occupancy
+    A, B, C = (vertices[triangles[:, j]] for j in range(3))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        e1, e2 = B - A, C - A
+        normals = np.stack([e1[:, 1] * e2[:, 2] - e1[:, 2] * e2[:, 1],
+                            e1[:, 2] * e2[:, 0] - e1[:, 0] * e2[:, 2],
+                            e1[:, 0] * e2[:, 1] - e1[:, 1] * e2[:, 0]], axis=1)
+        normals /= np.sqrt(_dot(normals, normals))[:, None]
+    box_lower = np.floor(np.minimum(np.minimum(A, B), C)).astype(np.int64)
+    box_size = np.ceil(np.maximum(np.maximum(A, B), C)).astype(np.int64) - box_lower + 1
+    counts = np.prod(box_size, axis=1)
+
+    # Triangles projetés sur le plan de chaque cible, orientés dans le sens direct
+    projected = []
+    for i in range(4):
+        AA, BB, CC = (np.stack([_dot(P, _TARGET_E1[i][None]), _dot(P, _TARGET_E2[i][None])], axis=1)
+                      for P in (A, B, C))
+        det = (BB[:, 0] - AA[:, 0]) * (CC[:, 1] - AA[:, 1]) - (BB[:, 1] - AA[:, 1]) * (CC[:, 0] - AA[:, 0])
+        swap = ~(det > 0)
+        AA[swap], CC[swap] = CC[swap], AA[swap].copy()
+        projected.append((AA, BB, CC))
+
+    ends = np.cumsum(counts)
+    start = 0
+    while start < len(triangles):
+        # Paquet de triangles dont les voxels candidats tiennent dans chunk_size
+        stop = max(start + 1, int(np.searchsorted(ends, ends[start] - counts[start] + chunk_size, side="right")))
+        t = np.repeat(np.arange(start, stop), counts[start:stop])
+        local = np.arange(len(t)) - np.repeat(ends[start:stop] - counts[start:stop] - (ends[start] - counts[start]),
+                                              counts[start:stop])
+        sx, sy = box_size[t, 0], box_size[t, 1]
+        # Coordonnées des voxels, une composante par tableau (accès contigus)
+        vx = (box_lower[t, 0] + local % sx).astype(np.float64)
+        vy = (box_lower[t, 1] + (local // sx) % sy).astype(np.float64)
+        vz = (box_lower[t, 2] + local // (sx * sy)).astype(np.float64)
+        nx, ny, nz = normals[t, 0], normals[t, 1], normals[t, 2]
+        ax, ay, az = A[t, 0], A[t, 1], A[t, 2]
+        with np.errstate(invalid="ignore"):
+            # Centre à plus d'une demi-diagonale (sqrt(3)/2, plus une marge) du
+            # plan : aucune diagonale ne le traverse, le voxel est écarté sans
+            # changer le résultat (normales NaN des triangles dégénérés gardées)
+            near = np.flatnonzero(~(np.abs((vx - ax) * nx + (vy - ay) * ny + (vz - az) * nz) > 0.8661))
+            t, vx, vy, vz, nx, ny, nz, ax, ay, az = (x[near] for x in (t, vx, vy, vz, nx, ny, nz, ax, ay, az))
+            hit = np.zeros(len(t), dtype=bool)
+            for i in range(4):
+                (fx, fy, fz), (gx, gy, gz) = _TARGET_FIRST[i], _TARGET_SECOND[i]
+                # Extrémités de la diagonale : cible + v (mêmes opérations que voxelizeTriangle)
+                f0, f1, f2 = fx + vx, fy + vy, fz + vz
+                s0, s1, s2 = gx + vx, gy + vy, gz + vz
+                den = nx * (s0 - f0) + ny * (s1 - f1) + nz * (s2 - f2)
+                side = (((ax - f0) * nx + (ay - f1) * ny + (az - f2) * nz)
+                        * ((ax - s0) * nx + (ay - s1) * ny + (az - s2) * nz))
+                # Test 2D seulement pour les voxels traversés et pas encore occupés
+                k = np.flatnonzero(~((den == 0) | (side > 0)) & ~hit)
+                e1, e2 = _TARGET_E1[i], _TARGET_E2[i]
+                px = e1[0] * vx[k] + e1[1] * vy[k] + e1[2] * vz[k]
+                py = e2[0] * vx[k] + e2[1] * vy[k] + e2[2] * vz[k]
+                AA, BB, CC = (P[t[k]] for P in projected[i])
+                val1 = (CC[:, 1] - AA[:, 1]) * (px - AA[:, 0]) + (CC[:, 0] - AA[:, 0]) * (AA[:, 1] - py)
+                val2 = (BB[:, 1] - CC[:, 1]) * (px - CC[:, 0]) + (BB[:, 0] - CC[:, 0]) * (CC[:, 1] - py)
+                val3 = (AA[:, 1] - BB[:, 1]) * (px - BB[:, 0]) + (AA[:, 0] - BB[:, 0]) * (BB[:, 1] - py)
+                z1, z2, z3 = val1 == 0, val2 == 0, val3 == 0
+                on_vertex = (z1 & z2) | (z1 & z3) | (z2 & z3)
+                outside = (val1 < 0) | (val2 < 0) | (val3 < 0)
+                hit[k] = on_vertex | ~outside
+        voxels = np.stack([vx[hit], vy[hit], vz[hit]], axis=1).astype(np.int64)
+        inside = np.all((voxels >= lower) & (voxels <= upper), axis=1)
+        index = voxels[inside] - lower
+        occupancy[index[:, 0], index[:, 1], index[:, 2]] = True
+        start = stop
+    return occupancy
+
+
+def _tridiagonalize(V, d, e):
+    # Réduction de Householder (EigenDecomposition::tridiagonalize, JAMA tred2)
+    n = len(d)
+    for j in range(n):
+        d[j] = V[n - 1][j]
+    for i in range(n - 1, 0, -1):
+        scale = 0.0
+        h = 0.0
+        for k in range(i):
+            scale += abs(d[k])
+        if scale == 0.0:
+            e[i] = d[i - 1]
+            for j in range(i):
+                d[j] = V[i - 1][j]
+                V[i][j] = 0.0
+                V[j][i] = 0.0
+        else:
+            for k in range(i):
+                d[k] /= scale
+                h += d[k] * d[k]
+            f = d[i - 1]
+            g = math.sqrt(h)
+            if f > 0.0:
+                g = -g
+            e[i] = scale * g
+            h -= f * g
+            d[i - 1] = f - g
+            for j in range(i):
+                e[j] = 0.0
+            for j in range(i):
+                f = d[j]
+                V[j][i] = f
+                g = e[j] + V[j][j] * f
+                for k in range(j + 1, i):
+                    g += V[k][j] * d[k]
+                    e[k] += V[k][j] * f
+                e[j] = g
+            f = 0.0
+            for j in range(i):
+                e[j] /= h
+                f += e[j] * d[j]
+            hh = f / (h + h)
+            for j in range(i):
+                e[j] -= hh * d[j]
+            for j in range(i):
+                f = d[j]
+                g = e[j]
+                for k in range(j, i):
+                    V[k][j] = V[k][j] - (f * e[k] + g * d[k])
+                d[j] = V[i - 1][j]
+                V[i][j] = 0.0
+        d[i] = h
+    for i in range(n - 1):
+        V[n - 1][i] = V[i][i]
+        V[i][i] = 1.0
+        h = d[i + 1]
+        if h != 0.0:
+            for k in range(i + 1):
+                d[k] = V[k][i + 1] / h
+            for j in range(i + 1):
+                g = 0.0
+                for k in range(i + 1):
+                    g += V[k][i + 1] * V[k][j]
+                for k in range(i + 1):
+                    V[k][j] = V[k][j] - g * d[k]
+        for k in range(i + 1):
+            V[k][i + 1] = 0.0
+    for j in range(n):
+        d[j] = V[n - 1][j]
+        V[n - 1][j] = 0.0
+    V[n - 1][n - 1] = 1.0
+    e[0] = 0.0
+
+
+def _decompose_ql(V, d, e):
+    # Algorithme QL implicite (EigenDecomposition::decomposeQL, JAMA tql2)
+    n = len(d)
+    e = list(e)
+    for i in range(1, n):
+        e[i - 1] = e[i]
+    e[n - 1] = 0.0
+    f = 0.0
+    tst1 = 0.0
+    eps = 2.0 ** -52
+    for l in range(n):
+        tst1 = max(tst1, abs(d[l]) + abs(e[l]))
+        m = l
+        while m < n:
+            if abs(e[m]) <= eps * tst1:
+                break
+            m += 1
+        if m > l:
+            while True:
+                g = d[l]
+                p = (d[l + 1] - g) / (2.0 * e[l])
+                r = math.sqrt(p * p + 1.0 * 1.0)
+                if p < 0:
+                    r = -r
+                d[l] = e[l] / (p + r)
+                d[l + 1] = e[l] * (p + r)
+                dl1 = d[l + 1]
+                h = g - d[l]
+                for i in range(l + 2, n):
+                    d[i] -= h
+                f = f + h
+                p = d[m]
+                c = c2 = c3 = 1.0
+                el1 = e[l + 1]
+                s = s2 = 0.0
+                for i in range(m - 1, l - 1, -1):
+                    c3 = c2
+                    c2 = c
+                    s2 = s
+                    g = c * e[i]
+                    h = c * p
+                    r = math.sqrt(p * p + e[i] * e[i])
+                    e[i + 1] = s * r
+                    s = e[i] / r
+                    c = p / r
+                    p = c * d[i] - s * g
+                    d[i + 1] = h + s * (c * g + s * d[i])
+                    for k in range(n):
+                        h = V[k][i + 1]
+                        V[k][i + 1] = s * V[k][i] + c * h
+                        V[k][i] = c * V[k][i] - s * h
+                p = -s * s2 * c3 * el1 * e[l] / dl1
+                e[l] = s * p
+                d[l] = c * p
+                if not abs(e[l]) > eps * tst1:
+                    break
+        d[l] = d[l] + f
+        e[l] = 0.0
+    for i in range(n - 1):
+        k = i
+        p = d[i]
+        for j in range(i + 1, n):
+            if d[j] < p:
+                k = j
+                p = d[j]
+        if k != i:
+            d[k] = d[i]
+            d[i] = p
+            for j in range(n):
+                V[j][i], V[j][k] = V[j][k], V[j][i]
+
+
+def eigen_decomposition(matrix):
+    """
+    Valeurs et vecteurs propres d'une matrice symétrique, calculés comme
+    DGtal::EigenDecomposition (tridiagonalisation puis QL), pour obtenir les
+    mêmes signes de vecteurs propres qu'imProfile.
+
+    Returns:
+        tuple: (valeurs propres croissantes [n], vecteurs propres en colonnes [n, n])
+    """
+    V = [[float(x) for x in row] for row in matrix]
+    d = [0.0] * len(V)
+    e = [0.0] * len(V)
+    _tridiagonalize(V, d, e)
+    _decompose_ql(V, d, e)
+    return np.array(d), np.array(V)
+
+
+def main_directions(occupancy, lower):
+    """
+    Directions principales normalisées des voxels occupés (getMainDirsFromVoxels
+    puis getNormalized), par valeur propre décroissante.
+
+    Les sommes sont faites dans l'ordre du domaine (x, puis y, puis z) avec
+    np.cumsum, qui additionne dans l'ordre comme la boucle C++ : mêmes
+    arrondis, donc mêmes axes.
+
+    Returns:
+        list: Trois directions (ndarray [3]) ; vecteurs nuls sans voxel.
+    """
+    z, y, x = np.nonzero(occupancy.transpose(2, 1, 0))
+    count = len(x)
+    if count == 0:
+        return [np.zeros(3)] * 3
+    points = np.stack([x, y, z], axis=1).astype(np.float64) + np.asarray(lower, dtype=np.float64)
+    centroid = np.cumsum(points, axis=0)[-1] / count
+    d = points - centroid
+    pairs = [(0, 0), (0, 1), (0, 2), (1, 1), (1, 2), (2, 2)]
+    sums = dict(zip(pairs, np.cumsum(np.stack([d[:, i] * d[:, j] for i, j in pairs], axis=1), axis=0)[-1]))
+    cov = np.array([[sums[(min(i, j), max(i, j))] for j in range(3)] for i in range(3)]) / count
+    values, vectors = eigen_decomposition(cov)
+    order = sorted(range(3), key=lambda i: -values[i])
+    return [_normalized(vectors[:, i]) for i in order]
+
+
+def _round_half_away(x):
+    # std::round : arrondi à l'entier le plus proche, milieux loin de zéro
+    return math.copysign(math.floor(abs(x) + 0.5), x)
+
+
+def _embedder(center, normal, width):
+    """
+    Origine et axes de Point2DEmbedderIn3D(domaine, center, normal, width).
+    """
+    c = [float(v) for v in center]
+    dd = -normal[0] * c[0] - normal[1] * c[1] - normal[2] * c[2]
+    if normal[0] != 0:
+        ref = [-dd / normal[0], 0.0, 0.0]
+        if ref == c:
+            ref[1] = -1.0
+    elif normal[1] != 0:
+        ref = [0.0, -dd / normal[1], 0.0]
+        if ref == c:
+            ref[0] = -1.0
+    else:
+        ref = [0.0, 0.0, -dd / normal[2]]
+        if ref == c:
+            ref[0] = -1.0
+    u1 = _normalized(np.array(ref) - np.array(c))
+    u2 = _normalized(np.array([u1[1] * normal[2] - u1[2] * normal[1],
+                               u1[2] * normal[0] - u1[0] * normal[2],
+                               u1[0] * normal[1] - u1[1] * normal[0]]))
+    width = int(width)
+    # Conversion RealPoint -> Point : troncature vers zéro
+    origin = (np.asarray(center, dtype=np.int64) + np.trunc(u1 * width / 2).astype(np.int64)
+              + np.trunc(u2 * width / 2).astype(np.int64)).astype(np.float64)
+    return origin, -u1, -u2
+
+
+def project(occupancy, lower, normal, image_size=IMAGE_SIZE, max_scan=MAX_SCAN):
+    """
+    Silhouette du volume vue le long de normal (compute2D_profile de
+    image_profiles.h) : un plan de image_size x image_size pixels part de
+    max_scan voxels avant le centre du domaine et avance d'un pas de normal à
+    la fois ; un pixel est allumé s'il rencontre un voxel occupé pendant les
+    max_scan pas qui suivent le premier contact.
+
+    Les pixels hors du domaine lisent le voxel (0, 0, 0), comme le point par
+    défaut de l'embedder. Les pas sont évalués par paquets (tableaux
+    [pas, image_size, image_size]).
+
+    Returns:
+        ndarray: Image uint8 [image_size, image_size] (0 / 255), lignes dans
+        l'ordre du fichier .pgm d'imProfile (PGMWriter écrit y décroissant).
+    """
+    lower = np.asarray(lower, dtype=np.int64)
+    upper = lower + np.array(occupancy.shape) - 1
+    size = int(image_size)
+    result = np.zeros((size, size), dtype=np.uint8)
+    # Centre du domaine (division entière C++) reculé de max_scan le long de -normal
+    center = np.trunc((lower + upper) / 2).astype(np.int64)
+    back = _normalized(-np.asarray(normal, dtype=np.float64)) * max_scan
+    center = center + np.array([_round_half_away(v) for v in back], dtype=np.int64)
+    origin, axis1, axis2 = _embedder(center, normal, size)
+
+    flat = occupancy.ravel()
+    strides = np.array(occupancy.strides) // occupancy.itemsize
+    default = occupancy[tuple(-lower)] if np.all(lower <= 0) and np.all(upper >= 0) else False
+    coords = np.arange(size, dtype=np.float64)
+    second = np.floor(coords[:, None] * axis2[None, :]).astype(np.int64)   # [y, 3]
+    window = max(max_scan, 1)
+    # Borne du nombre de pas : au-delà, le plan est sorti du domaine
+    limit = 2 * window + int(math.ceil(math.sqrt(float(np.sum((upper - lower + 1) ** 2))))) + size
+    chunk = max(1, (1 << 18) // (size * size))
+    first_step = None
+    step = 0
+    while step < limit and (first_step is None or step < first_step + window):
+        n_steps = min(chunk, limit - step)
+        # Origines des pas step+1..step+n_steps, additions successives comme shiftOriginPoint
+        origins = np.cumsum(np.vstack([origin, np.tile(normal, (n_steps, 1))]), axis=0)
+        origin = origins[-1]
+        first = np.floor(coords[None, :, None] * axis1[None, None, :] + origins[1:, None, :]).astype(np.int64)
+        # Voxel de chaque (pas, y, x) : test du domaine et indice linéaire
+        # composante par composante (tableaux [pas, y, x])
+        inside = np.ones((n_steps, size, size), dtype=bool)
+        linear = np.zeros((n_steps, size, size), dtype=np.int64)
+        for c in range(3):
+            component = first[:, None, :, c] + second[None, :, None, c] - lower[c]
+            inside &= (component >= 0) & (component < occupancy.shape[c])
+            linear += component * strides[c]
+        hits = np.where(inside, flat[np.where(inside, linear, 0)], default)
+        touched = hits.reshape(n_steps, -1).any(axis=1)
+        if first_step is None and touched.any():
+            first_step = step + int(np.argmax(touched))
+        if first_step is not None:
+            keep = slice(max(first_step - step, 0), max(min(first_step + window - step, n_steps), 0))
+            result[hits[keep].any(axis=0)] = 255
+        step += n_steps
+    return np.ascontiguousarray(result[::-1])
+
+
+def silhouettes_from_voxels(occupancy, lower, image_size=IMAGE_SIZE, max_scan=MAX_SCAN):
+    """
+    Silhouettes des trois directions principales d'un volume d'occupation.
+
+    Returns:
+        ndarray: [3 vues (m, s, t), image_size, image_size] uint8.
+    """
+    with lip_profiling.stage("pca"):
+        directions = main_directions(occupancy, lower)
+    with lip_profiling.stage("projection"):
+        return np.stack([project(occupancy, lower, d, image_size, max_scan) for d in directions])
+
+
+def mesh_volume(path, image_size=IMAGE_SIZE, max_scan=MAX_SCAN, mesh_cache=True):
+    """
+    Volume d'occupation d'un maillage .off normalisé (étapes 1 à 3 de
+    Main.cpp). Le maillage est lu par off_reader.read_off en float64 (comme
+    MeshReader::importOFFFile), avec son cache binaire si mesh_cache.
+
+    Returns:
+        tuple: (occupation [X, Y, Z] bool, borne inférieure du domaine [3])
+    """
+    with lip_profiling.stage("mesh_read"):
+        mesh = off_reader.read_off(path, np.float64, cache=mesh_cache)
+    vertices = mesh["vertices"]
+    if len(vertices) == 0:
+        raise ValueError(f"{path} : maillage vide")
+    vertices = normalize_mesh(vertices, image_size)
+    # Domaine : boîte englobante élargie de max_scan (floor / ceil des bornes réelles)
+    lower = np.floor(vertices.min(axis=0) - max_scan).astype(np.int64)
+    upper = np.ceil(vertices.max(axis=0) + max_scan).astype(np.int64)
+    with lip_profiling.stage("voxelization"):
+        occupancy = voxelize(vertices, off_reader.triangles(mesh), lower, upper)
+    return occupancy, lower
+
+
+def voxel_volume(voxels, max_scan=MAX_SCAN):
+    """
+    Volume d'occupation d'un tableau de voxels : volume [X, Y, Z] (non nul :
+    occupé, indices = coordonnées) ou points entiers [N, 3]. Le domaine est la
+    boîte englobante des voxels élargie de max_scan.
+
+    Returns:
+        tuple: (occupation [X, Y, Z] bool, borne inférieure du domaine [3])
+    """
+    voxels = np.asarray(voxels)
+    if voxels.ndim == 2 and voxels.shape[1] == 3:
+        points = voxels.astype(np.int64)
+    elif voxels.ndim == 3:
+        points = np.argwhere(voxels != 0)
+    else:
+        raise ValueError("volume [X, Y, Z] ou points [N, 3] attendus")
+    if len(points) == 0:
+        raise ValueError("aucun voxel occupé")
+    lower = points.min(axis=0) - max_scan
+    occupancy = np.zeros(points.max(axis=0) + max_scan - lower + 1, dtype=bool)
+    index = points - lower
+    occupancy[index[:, 0], index[:, 1], index[:, 2]] = True
+    return occupancy, lower
+
+
+def silhouettes(path, image_size=IMAGE_SIZE, max_scan=MAX_SCAN, mesh_cache=True):
+    """
+    Silhouettes m, s, t d'un maillage .off ou d'un tableau de voxels .npy
+    (mesh_cache : cache binaire du maillage, voir off_reader.py).
+
+    Returns:
+        ndarray: [3, image_size, image_size] uint8 (0 / 255).
+    """
+    if path.endswith(".npy"):
+        occupancy, lower = voxel_volume(np.load(path), max_scan)
+    else:
+        occupancy, lower = mesh_volume(path, image_size, max_scan, mesh_cache)
+    return silhouettes_from_voxels(occupancy, lower, image_size, max_scan)
+
+
+def compare_with_imProfile(path, images, imProfile, image_size=IMAGE_SIZE):
+    """
+    Calcule les profils du maillage avec imProfile (dans un répertoire
+    temporaire) et les compare aux silhouettes données.
+
+    Returns:
+        list: Par vue, (pixels différents, pixels de la réunion des deux
+              silhouettes).
+    """
+    import cv2
+    with tempfile.TemporaryDirectory(prefix="lip_silhouette_") as tmp:
+        prefix = os.path.join(tmp, "profile")
+        result = subprocess.run([imProfile, "-i", path, "-o", prefix, "-r", str(image_size)],
+                                stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.decode(errors="replace").strip() or "échec d'imProfile")
+        references = [cv2.imread(prefix + "_" + view + ".pgm", 0) for view in VIEWS]
+    return [(int(np.count_nonzero(image != reference)), int(np.count_nonzero((image > 0) | (reference > 0))))
+            for image, reference in zip(images, references)]
+
+
+def save_silhouettes(images, prefix):
+    """
+    Écrit les silhouettes dans <prefix>_{m,s,t}.pgm.
+    """
+    import cv2
+    for view, image in zip(VIEWS, images):
+        cv2.imwrite(prefix + "_" + view + ".pgm", image)
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Silhouettes m, s, t de maillages .off ou de voxels .npy, sans imProfile.")
+    parser.add_argument("inputs", type=str, nargs="+", help="Maillages .off ou tableaux de voxels .npy")
+    parser.add_argument("-o", "--output", type=str, default=None,
+                        help="Préfixe (répertoire) des images <nom>_{m,s,t}.pgm")
+    parser.add_argument("-r", "--res", type=int, default=IMAGE_SIZE, help="Taille des images en pixels")
+    parser.add_argument("--max_scan", type=int, default=MAX_SCAN, help="Profondeur de balayage (voxels)")
+    parser.add_argument("--lip", type=str, default=None,
+                        help="Préfixe (répertoire) des signatures LIP <nom>_{m,s,t}.csv, calculées en mémoire")
+    parser.add_argument("--compare", action="store_true", help="Comparer aux profils d'imProfile")
+    parser.add_argument("--imProfile", type=str,
+                        default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "imProfile"),
+                        help="Chemin vers l'exécutable imProfile (avec --compare)")
+    parser.add_argument("--tolerance", type=float, default=0.01,
+                        help="Fraction maximale de pixels différents par vue (avec --compare)")
+    parser.add_argument("--no_mesh_cache", action="store_true",
+                        help="Ne pas lire ni écrire le cache binaire des maillages (<fichier>.off.float64.cache)")
+    lip_profiling.add_arguments(parser)
+    args = parser.parse_args(argv)
+    lip_profiling.configure_from_args(args)
+    if args.compare and any(path.endswith(".npy") for path in args.inputs):
+        parser.error("--compare n'accepte que des maillages .off")
+
+    failed = 0
+    for i, path in enumerate(args.inputs):
+        name = os.path.splitext(os.path.basename(path))[0]
+        with lip_profiling.profile_object(name, i):
+            try:
+                images = silhouettes(path, args.res, args.max_scan, not args.no_mesh_cache)
+            except (OSError, ValueError) as e:
+                print(f"[Warning] {path} : {e or 'fichier tronqué'}", file=sys.stderr)
+                failed += 1
+                continue
+            if args.output is not None:
+                save_silhouettes(images, args.output + name)
+            if args.lip is not None:
+                import lip_sign
+                lips, _, _, _ = lip_sign.lip_signatures_batch(images)
+                for view, lip in zip(VIEWS, lips):
+                    lip_sign.save_signature(lip, args.lip + name + "_" + view + ".csv")
+        if args.compare:
+            try:
+                counts = compare_with_imProfile(path, images, args.imProfile, args.res)
+            except (OSError, RuntimeError) as e:
+                print(f"[Warning] {path} : imProfile : {e}", file=sys.stderr)
+                failed += 1
+                continue
+            ratios = [different / max(union, 1) for different, union in counts]
+            status = "ok" if max(ratios) <= args.tolerance else "ÉCART"
+            details = "  ".join(f"{view} {different}/{union}" for view, (different, union) in zip(VIEWS, counts))
+            print(f"[Info] {name:<20} pixels différents {details}  max {max(ratios):.4f}  {status}")
+            if status != "ok":
+                failed += 1
+    lip_profiling.report()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
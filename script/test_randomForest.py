@@ -7,6 +7,9 @@ import numpy as np
 from sklearn.metrics import classification_report, confusion_matrix, ConfusionMatrixDisplay
 import matplotlib.pyplot as plt
 import argparse
+import lip_profiling
+import lip_store
+import make_custom_feature_file
 
 def load_and_display_model(model_path):
     """
@@ -41,19 +44,23 @@ def load_and_display_model(model_path):
         print(f"Erreur lors du chargement du modèle : {str(e)}")
         sys.exit(1)
 
-def test_model(model, test_features_path, test_labels_path, class_names, save_path=None):
+def test_model(model, test_features_path, test_labels_path, class_names, save_path=None, columns=slice(None)):
     import seaborn as sns  # Assure qu'on a seaborn
 
     try:
-        X_test = pd.read_csv(test_features_path, header=None, delimiter=" ", dtype=np.float32)
-        y_test = pd.read_csv(test_labels_path, header=None, delimiter=" ", names=['labels'])
+        with lip_profiling.stage("read"):
+            # .npy associés en mémoire mappée s'ils existent, sinon fichiers texte
+            X_test = lip_store.load_feature_matrix(test_features_path)
+            y_test = lip_store.load_labels(test_labels_path)
+        X_test = X_test[:, columns]
     except Exception as e:
         print(f"Erreur lors du chargement des données de test : {e}")
         sys.exit(1)
 
     print("Données de test chargées avec succès.")
 
-    y_pred = model.predict(X_test)
+    with lip_profiling.stage("predict", n=len(X_test)):
+        y_pred = model.predict(X_test)
 
     print("\n=== Rapport de classification ===")
     report = classification_report(y_test, y_pred, target_names=class_names, zero_division=0)
@@ -85,24 +92,44 @@ if __name__ == "__main__":
     # Argument parsing
     parser = argparse.ArgumentParser(description="Charger et tester un modèle Random Forest")
     parser.add_argument("model_path", type=str, help="Chemin vers le modèle (.joblib)")
-    parser.add_argument("-t", "--test_data", nargs=2, metavar=("features", "labels"), help="Chemins vers les fichiers de test")
-    parser.add_argument("-c", "--classes", type=str, nargs="+", help="Liste des noms de classes")
+    parser.add_argument("-t", "--test_data", nargs=2, metavar=("features", "labels"), help="Chemins vers les fichiers de test (.npy ou .txt)")
+    parser.add_argument("-c", "--classes", type=str, nargs="+",
+                        help="Liste des noms de classes (défaut : celle du schéma des colonnes)")
+    make_custom_feature_file.add_column_arguments(parser)
+    lip_profiling.add_arguments(parser)
     args = parser.parse_args()
+    lip_profiling.configure_from_args(args)
 
     # Chargement du modèle
     model = load_and_display_model(args.model_path)
 
     # Si des données de test sont fournies, effectuer le test
     if args.test_data:
-        if not args.classes:
-            print("Erreur : La liste des noms de classes est requise pour tester le modèle.")
-            sys.exit(1)
-        
         test_features_path, test_labels_path = args.test_data
+        default_schema = os.path.join(os.path.dirname(os.path.abspath(test_features_path)),
+                                      make_custom_feature_file.SCHEMA_FILE)
+        # Colonnes du modèle (train_randomForest2.py --columns), sinon --columns
+        if args.columns is None and hasattr(model, "lip_columns_"):
+            args.columns = model.lip_columns_
+        n_features = lip_store.load_feature_matrix(test_features_path).shape[1]
+        try:
+            columns, _ = make_custom_feature_file.columns_from_args(args, default_schema, n_features)
+        except ValueError as e:
+            print(f"Erreur : {e}")
+            sys.exit(1)
+
         class_names = args.classes
+        if not class_names:
+            schema = make_custom_feature_file.load_feature_schema(args.schema or default_schema)
+            class_names = schema.get("classes") if schema else None
+        if not class_names:
+            print("Erreur : La liste des noms de classes est requise pour tester le modèle.")
+            sys.exit(1)
 
         # Test du modèle
-        test_model(model, test_features_path, test_labels_path, class_names, "/volWork/these/DATA/ModelNet/lipCustom10/EXP/2lipOm/confusion_matrix.png")
+        test_model(model, test_features_path, test_labels_path, class_names, "/volWork/these/DATA/ModelNet/lipCustom10/EXP/2lipOm/confusion_matrix.png", columns)
 
     else:
         print("Aucun test effectué. Pour tester, utilisez l'option -t avec les chemins des données.")
+
+    lip_profiling.report()
@@ -8,6 +8,11 @@ import matplotlib.pyplot as plt
 import joblib
 import seaborn as sns
 import json
+# Chronométrage optionnel (LIP_PROFILE=table ou jsonl:<fichier>, voir lip_profiling.py)
+import lip_profiling
+import lip_store
+import rf_search
+import make_custom_feature_file
 
 # Sauvegarde des hyperparamètres
 def save_hyperparameters(params, file_path):
@@ -35,13 +40,24 @@ test_labelsPathFile = data_path + 'test_labels.txt'
 # Sauvegarder les meilleurs paramètres trouvés
 param_file = data_path + 'best_rf_params.json'
 
-# Chargement des données d'entraînement
-X_train_LIP = pd.read_csv(train_featuresPathFileLIP, header=None, delimiter=" ", dtype=np.float32)
-y_train = pd.read_csv(train_labelsPathFile, header=None, delimiter=" ", names=['labels'])
-
-# Chargement des données de test
-X_test_LIP = pd.read_csv(test_featuresPathFileLIP, header=None, delimiter=" ", dtype=np.float32)
-y_test = pd.read_csv(test_labelsPathFile, header=None, delimiter=" ", names=['labels'])
+# Chargement des données d'entraînement (float32 en mémoire mappée si les .npy
+# associés existent, voir lip_store.load_feature_matrix)
+with lip_profiling.stage("read"):
+    X_train_LIP = lip_store.load_feature_matrix(train_featuresPathFileLIP)
+    y_train = lip_store.load_labels(train_labelsPathFile)
+
+    # Chargement des données de test
+    X_test_LIP = lip_store.load_feature_matrix(test_featuresPathFileLIP)
+    y_test = lip_store.load_labels(test_labelsPathFile)
+
+# Sélection de colonnes par nom (schéma caracs_schema.json écrit avec les caracs),
+# ex. ['m_*', '*_orientation_merit'] ; None : toutes les colonnes
+columns = None
+if columns is not None:
+    schema = make_custom_feature_file.load_feature_schema(data_path)
+    index = make_custom_feature_file.column_index(make_custom_feature_file.select_columns(schema["columns"], columns))
+    X_train_LIP = X_train_LIP[:, index]
+    X_test_LIP = X_test_LIP[:, index]
 
 # Définition unique des noms des classes
 class_names = ['bathtub', 'bed', 'chair', 'desk', 'dresser', 'monitor', 'night_stand', 'sofa', 'table', 'toilet']
@@ -59,18 +75,34 @@ param_grid = {
     'max_features': [None, 'sqrt','log2']
 }
 
-# Initialisation et optimisation du modèle
-rf = RandomForestClassifier(random_state=42)
-grid_search = GridSearchCV(estimator=rf, param_grid=param_grid, cv=5, n_jobs=-1, verbose=2)
-grid_search.fit(X_train_LIP, y_train.values.ravel())
+# "grid" : GridSearchCV ; "halving" : successive halving sur n_estimators
+# (rf_search.py), progression enregistrée dans param_file pour reprise
+search_mode = "grid"
 
-best_params = grid_search.best_params_
+# Initialisation et optimisation du modèle
+if search_mode == "halving":
+    with lip_profiling.stage("grid_search", n=len(X_train_LIP)):
+        best_params = rf_search.successive_halving_search(X_train_LIP, y_train, param_grid,
+                                                          checkpoint=param_file)
+    best_rf = RandomForestClassifier(**best_params, random_state=42, n_jobs=-1)
+    with lip_profiling.stage("fit", n=len(X_train_LIP)):
+        best_rf.fit(X_train_LIP, y_train)
+else:
+    rf = RandomForestClassifier(random_state=42)
+    grid_search = GridSearchCV(estimator=rf, param_grid=param_grid, cv=5, n_jobs=-1, verbose=2)
+    with lip_profiling.stage("grid_search", n=len(X_train_LIP)):
+        grid_search.fit(X_train_LIP, y_train)
+
+    best_params = grid_search.best_params_
+    best_rf = grid_search.best_estimator_
 print("Meilleurs paramètres trouvés :", best_params)
 
-best_rf = grid_search.best_estimator_
-y_pred = best_rf.predict(X_test_LIP)
+with lip_profiling.stage("predict", n=len(X_test_LIP)):
+    y_pred = best_rf.predict(X_test_LIP)
 
-save_hyperparameters(best_params, param_file)
+if search_mode != "halving":
+    # En mode halving, param_file contient déjà les paramètres et la progression
+    save_hyperparameters(best_params, param_file)
 
 # Rapport de classification baseline
 report = classification_report(y_test, y_pred, output_dict=True, zero_division=0.0, target_names=class_names)
@@ -108,8 +140,10 @@ results_ablation = {}
 for name, indices in feature_groups.items():
     print(f"\nTesting: {name}")
     model = RandomForestClassifier(**best_params, random_state=42)
-    model.fit(X_train_LIP.iloc[:, indices], y_train.values.ravel())
-    y_pred_subset = model.predict(X_test_LIP.iloc[:, indices])
+    with lip_profiling.stage("fit", n=len(X_train_LIP), group=name):
+        model.fit(X_train_LIP[:, indices], y_train)
+    with lip_profiling.stage("predict", n=len(X_test_LIP), group=name):
+        y_pred_subset = model.predict(X_test_LIP[:, indices])
     report_subset = classification_report(y_test, y_pred_subset, output_dict=True, zero_division=0.0,
                                           target_names=class_names)
     results_ablation[name] = {classe: report_subset[classe]['f1-score'] for classe in class_names}
@@ -131,3 +165,5 @@ plt.savefig(data_path+'ablation_study_results_per_class.png')
 # Sauvegarde du meilleur modèle
 joblib.dump(best_rf, data_path+'best_model_rf.joblib')
 print("Meilleur modèle sauvegardé sous :", data_path+'best_model_rf.joblib')
+
+lip_profiling.report()
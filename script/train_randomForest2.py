@@ -10,6 +10,11 @@ import json
 import sys
 import os
 import argparse
+import lip_profiling
+import lip_store
+import rf_search
+import ablation
+import make_custom_feature_file
 
 def save_hyperparameters(params, file_path):
     """Sauvegarde des hyperparamètres dans un fichier JSON."""
@@ -21,10 +26,18 @@ def save_hyperparameters(params, file_path):
         print(f"Erreur lors de la sauvegarde des hyperparamètres : {e}")
 
 def load_hyperparameters(file_path):
-    """Charge les hyperparamètres depuis un fichier JSON."""
+    """
+    Charge les hyperparamètres depuis un fichier JSON. Les clefs commençant par
+    "_" (progression de rf_search.py) sont ignorées ; une recherche non
+    terminée donne des hyperparamètres vides (elle reprend avec -g).
+    """
     try:
         with open(file_path, 'r') as f:
             params = json.load(f)
+        if not params.get("_search", {}).get("done", True):
+            print(f"Recherche inachevée dans : {file_path}")
+            return {}
+        params = {k: v for k, v in params.items() if not k.startswith("_")}
         print(f"Hyperparamètres chargés depuis : {file_path}")
         return params
     except Exception as e:
@@ -43,36 +56,22 @@ def perform_grid_search(X_train, y_train):
     }
     rf = RandomForestClassifier(random_state=42)
     grid_search = GridSearchCV(estimator=rf, param_grid=param_grid, cv=5, n_jobs=-1, verbose=2)
-    grid_search.fit(X_train, y_train)
+    with lip_profiling.stage("grid_search", n=len(X_train)):
+        grid_search.fit(X_train, y_train)
     print("Meilleurs paramètres trouvés :", grid_search.best_params_)
     return grid_search.best_params_
 
-def ablation_study(X_train, y_train, X_test, y_test, params, class_names, data_path):
-    """Effectue une étude d'ablation."""
+def ablation_study(X_train, y_train, X_test, y_test, params, class_names, data_path, layout):
+    """
+    Effectue une étude d'ablation : une forêt par vue et par signature LIP
+    (groupes déduits de la description des colonnes, voir ablation.py),
+    groupes évalués en parallèle.
+    """
     print("\n=== Début de l'Ablation Study ===")
-    taille_orientation = 30
-    taille_lip = 5
-
-    feature_groups = {
-        'Orientation_principale': slice(0, taille_orientation),
-        'Orientation_secondaire': slice(taille_orientation, 2 * taille_orientation),
-        'Orientation_tertiaire': slice(2 * taille_orientation, 3 * taille_orientation),
-    }
-
-    for i in range(6):
-        indices = np.r_[i*taille_lip:(i+1)*taille_lip,
-                        taille_orientation + i*taille_lip:taille_orientation + (i+1)*taille_lip,
-                        2*taille_orientation + i*taille_lip:2*taille_orientation + (i+1)*taille_lip]
-        feature_groups[f'LIP{i}_all_orientations'] = indices
-
-    results_ablation = {}
-    for name, indices in feature_groups.items():
-        print(f"\nTesting: {name}")
-        model = RandomForestClassifier(**params, random_state=42)
-        model.fit(X_train.iloc[:, indices], y_train)
-        y_pred_subset = model.predict(X_test.iloc[:, indices])
-        report_subset = classification_report(y_test, y_pred_subset, output_dict=True, zero_division=0.0, target_names=class_names)
-        results_ablation[name] = {cls: report_subset[cls]['f1-score'] for cls in class_names}
+    groups = ablation.feature_groups(layout, kinds=("view", "lip"))
+    results = ablation.run_ablation(X_train, y_train, X_test, y_test, groups, params, modes=("keep",),
+                                    class_names=class_names)
+    results_ablation = {r['group']: {cls: r[cls] for cls in class_names} for r in results if r['mode'] == 'keep'}
 
     results_df = pd.DataFrame(results_ablation).T
     print("\nRésultats détaillés de l'Ablation Study (F1-score par classe) :")
@@ -91,14 +90,26 @@ parser = argparse.ArgumentParser(description="Entraînement et ablation avec Ran
 parser.add_argument('-g', '--gridsearch', action='store_true', help="Effectuer le GridSearch pour les hyperparamètres.")
 parser.add_argument('-a', '--ablation', action='store_true', help="Effectuer l'Ablation Study.")
 parser.add_argument('-p', '--params', type=str, help="Fichier JSON contenant les hyperparamètres.")
+parser.add_argument('-s', '--search', type=str, default='grid', choices=['grid', 'halving'],
+                    help="Recherche avec -g : GridSearchCV ou successive halving (rf_search.py, reprise possible).")
+ablation.add_layout_arguments(parser)
+make_custom_feature_file.add_column_arguments(parser)
+lip_profiling.add_arguments(parser)
 args = parser.parse_args()
+lip_profiling.configure_from_args(args)
 
 # Chemins vers les fichiers
 data_path = "/volWork/these/DATA/ModelNet/lipCustom10/EXP/3lipOm/"
-train_features = pd.read_csv(data_path + 'train_caracs.txt', header=None, delimiter=" ")
-train_labels = pd.read_csv(data_path + 'train_labels.txt', header=None, names=['labels'])
-test_features = pd.read_csv(data_path + 'test_caracs.txt', header=None, delimiter=" ")
-test_labels = pd.read_csv(data_path + 'test_labels.txt', header=None, names=['labels'])
+with lip_profiling.stage("read"):
+    # Caracs float32 en mémoire mappée (.npy écrits avec les caracs, sinon fichiers texte)
+    train = lip_store.read_caracs(data_path, 'train')
+    test = lip_store.read_caracs(data_path, 'test')
+train_features, train_labels = train['features'], train['labels']
+test_features, test_labels = test['features'], test['labels']
+# Sélection des colonnes par nom (schéma caracs_schema.json écrit avec les caracs)
+columns, layout = make_custom_feature_file.columns_from_args(args, data_path, train_features.shape[1])
+train_features = train_features[:, columns]
+test_features = test_features[:, columns]
 #class name pour lipCustom10
 class_names = ['airplane', 'bed', 'car', 'cone', 'door', 'glass_box', 'guitar', 'monitor', 'table', 'toilet']
 #class name pour lipC40
@@ -108,10 +119,15 @@ class_names = ['airplane', 'bed', 'car', 'cone', 'door', 'glass_box', 'guitar',
 #               'sofa', 'stairs', 'stool', 'table', 'tent', 'toilet', 'tv_stand', 'vase', 'wardrobe', 'xbox']
 # Chargement ou calcul des hyperparamètres
 params = {}
-if args.params:
+if args.params and os.path.isfile(args.params):
     params = load_hyperparameters(args.params)
-if not params and args.gridsearch:
-    params = perform_grid_search(train_features, train_labels.values.ravel())
+if not params and args.gridsearch and args.search == 'halving':
+    # Progression enregistrée dans le fichier des hyperparamètres
+    with lip_profiling.stage("grid_search", n=len(train_features)):
+        params = rf_search.successive_halving_search(train_features, train_labels,
+                                                     checkpoint=args.params or data_path + 'best_rf_params.json')
+elif not params and args.gridsearch:
+    params = perform_grid_search(train_features, train_labels)
 
 if not params:
     print("Aucun hyperparamètre valide, utilisez l'option -g pour lancer GridSearch.")
@@ -120,9 +136,22 @@ if not params:
 # Entraînement du modèle
 #params.pop('random_state')
 model = RandomForestClassifier(**params, random_state=42)
-model.fit(train_features, train_labels.values.ravel())
+with lip_profiling.stage("fit", n=len(train_features)):
+    model.fit(train_features, train_labels)
+if layout is not None:
+    # Colonnes attendues par le modèle (relues par test_randomForest.py)
+    model.lip_columns_ = [column["name"] for column in layout]
 joblib.dump(model, data_path + 'best_model_rf.joblib')
 
 # Étude d'ablation si demandée
 if args.ablation:
-    ablation_study(train_features, train_labels.values.ravel(), test_features, test_labels.values.ravel(), params, class_names, data_path)
+    if layout is None:
+        layout = ablation.layout_from_args(args)
+    if len(layout) != train_features.shape[1]:
+        print(f"{train_features.shape[1]} colonnes, {len(layout)} attendues : vérifiez --stats, --mode, "
+              "--use_circularity et --use_orientation_merit.")
+        sys.exit(1)
+    ablation_study(train_features, train_labels, test_features, test_labels, params, class_names, data_path,
+                   layout)
+
+lip_profiling.report()
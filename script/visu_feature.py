@@ -5,6 +5,7 @@ import matplotlib.pyplot as plt
 from scipy.signal import find_peaks
 import os
 import sys
+import lip_store
 
 def lip_fft_representatives(lip0, top_n=5):
     fft_values = np.fft.fft(lip0)
@@ -127,11 +128,16 @@ def extract_features_by_indices(lip, indices):
         features.extend(lip[indices, col])
     return np.array(features)
 
-def main(csv_path):
-    base_name = os.path.splitext(os.path.basename(csv_path))[0]
+def main(csv_path, name=None, view="m"):
+    if name is None:
+        base_name = os.path.splitext(os.path.basename(csv_path))[0]
+        lip = pd.read_csv(csv_path, header=None).to_numpy()
+    else:
+        # csv_path est alors un store (voir lip_store.py)
+        base_name = name + "_" + view
+        lip = lip_store.store_lookup(lip_store.read_store(csv_path), name)[lip_store.VIEWS.index(view)]
     save_prefix = base_name
 
-    lip = pd.read_csv(csv_path, header=None).to_numpy()
     lip0 = lip[:, 0]
 
     representative_indices, top_indices, reconstructed, features = select_lip_representative_indices(
@@ -151,9 +157,9 @@ def main(csv_path):
     #return features_vector, representative_indices
 
 if __name__ == "__main__":
-    if len(sys.argv) != 2:
-        print("Usage : python fft_lip_feature_selector.py chemin/vers/fichier_lip.csv")
+    if len(sys.argv) not in (2, 3, 4):
+        print("Usage : python visu_feature.py chemin/vers/fichier_lip.csv")
+        print("        python visu_feature.py chemin/vers/store nom_objet [m|s|t]")
         sys.exit(1)
 
-    csv_path = sys.argv[1]
-    main(csv_path)
\ No newline at end of file
+    main(*sys.argv[1:])
\ No newline at end of file
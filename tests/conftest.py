@@ -0,0 +1,26 @@
+"""
+Les scripts de script/ s'importent entre eux par leur nom de module : les
+tests font de même.
+"""
+
+import glob
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "script"))
+
+EXAMPLES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "examples")
+
+
+@pytest.fixture(scope="session")
+def example_silhouettes():
+    """
+    Silhouettes m, s, t (100 px, comme imProfile) des maillages examples/*.off :
+    profils réels, avec plateaux au maximum. [objets * 3, 100, 100] uint8.
+    """
+    import silhouette
+    paths = sorted(glob.glob(os.path.join(EXAMPLES_DIR, "*.off")))
+    return np.concatenate([silhouette.silhouettes(path, mesh_cache=False) for path in paths])
@@ -0,0 +1,122 @@
+"""
+Cache d'étapes de lip_cache.py : lecture / écriture des entrées, clefs
+invalidées quand une entrée ou un paramètre change, manifest et éviction LRU.
+"""
+
+import json
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+import lip_cache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return lip_cache.LipCache(str(tmp_path / "cache"))
+
+
+def _clock(monkeypatch, now):
+    monkeypatch.setattr(lip_cache.time, "time", lambda: now)
+
+
+def test_get_put(cache, tmp_path):
+    assert cache.get("lip", "k") is None
+    src = tmp_path / "profil.pgm"
+    src.write_bytes(b"P5 1 1 255 \x00")
+    path = cache.put("lip", "k", files={"profil.pgm": str(src)}, data={"a.txt": "1 2 3", "b.npy": b"\x01\x02"})
+    assert cache.get("lip", "k") == path == cache.entry_dir("lip", "k")
+    assert sorted(os.listdir(path)) == ["a.txt", "b.npy", "profil.pgm"]
+    with open(os.path.join(path, "a.txt")) as f:
+        assert f.read() == "1 2 3"
+    with open(os.path.join(path, "b.npy"), "rb") as f:
+        assert f.read() == b"\x01\x02"
+    # Aucun répertoire temporaire laissé dans l'étape
+    assert os.listdir(os.path.dirname(path)) == ["k"]
+
+
+def test_force_replaces_entry(cache):
+    cache.put("features", "k", data={"feature.txt": "ancien", "extra.txt": "x"})
+    forced = lip_cache.LipCache(cache.cache_dir, force=True)
+    assert forced.get("features", "k") is None
+    path = forced.put("features", "k", data={"feature.txt": "nouveau"})
+    assert os.listdir(path) == ["feature.txt"]
+    with open(os.path.join(path, "feature.txt")) as f:
+        assert f.read() == "nouveau"
+    assert os.listdir(os.path.dirname(path)) == ["k"]
+
+
+def test_keys_change_with_inputs(tmp_path):
+    mesh = tmp_path / "objet.off"
+    mesh.write_text("OFF\n3 1 0\n0 0 0\n1 0 0\n0 1 0\n3 0 1 2\n")
+    digest = lip_cache.file_digest(str(mesh))
+    params = {"m": 180, "ANGLE": 180., "radon": "skimage"}
+    key = lip_cache.make_key("lip", [digest], params)
+    assert key == lip_cache.make_key("lip", [digest], dict(reversed(list(params.items()))))
+    assert key != lip_cache.make_key("profiles", [digest], params)
+    assert key != lip_cache.make_key("lip", [digest], dict(params, m=90))
+    assert key != lip_cache.make_key("lip", [digest, digest], params)
+
+    # Maillage modifié : nouvelle empreinte, nouvelles clefs en aval
+    feature_key = lip_cache.make_key("features", [key], {"mode": "default"})
+    mesh.write_text("OFF\n3 1 0\n0 0 0\n2 0 0\n0 1 0\n3 0 1 2\n")
+    new_digest = lip_cache.file_digest(str(mesh))
+    assert new_digest != digest
+    new_key = lip_cache.make_key("lip", [new_digest], params)
+    assert new_key != key
+    assert lip_cache.make_key("features", [new_key], {"mode": "default"}) != feature_key
+
+    img = np.zeros((4, 4), dtype=np.uint8)
+    changed = img.copy()
+    changed[1, 2] = 255
+    assert lip_cache.data_digest(img) == lip_cache.data_digest(img.copy())
+    assert lip_cache.data_digest(img) != lip_cache.data_digest(changed)
+
+
+def test_changed_input_misses(cache, tmp_path):
+    profile = tmp_path / "objet_m.pgm"
+    profile.write_bytes(b"a")
+    key = lip_cache.make_key("lip", [lip_cache.file_digest(str(profile))], {"m": 180})
+    cache.put("lip", key, data={"lips.npy": b"x"})
+    assert cache.get("lip", key) is not None
+    profile.write_bytes(b"b")
+    assert cache.get("lip", lip_cache.make_key("lip", [lip_cache.file_digest(str(profile))], {"m": 180})) is None
+
+
+def test_manifest(cache, monkeypatch):
+    cache.put("lip", "a", data={"lips.npy": b"x" * 10})
+    cache.put("features", "b", data={"feature.txt": "y" * 3, "feature.npy": b"z" * 4})
+    _clock(monkeypatch, 100.)
+    assert cache.update_manifest([("lip", "a"), ("features", "b"), ("lip", "absent")]) == []
+    manifest = cache.load_manifest()
+    assert manifest == {"lip/a": {"stage": "lip", "size": 10, "last_access": 100.},
+                        "features/b": {"stage": "features", "size": 7, "last_access": 100.}}
+    with open(os.path.join(cache.cache_dir, lip_cache.MANIFEST)) as f:
+        assert json.load(f) == manifest
+
+    # Entrée supprimée à la main : retirée du manifest
+    shutil.rmtree(cache.entry_dir("lip", "a"))
+    _clock(monkeypatch, 200.)
+    cache.update_manifest([])
+    assert list(cache.load_manifest()) == ["features/b"]
+    assert cache.load_manifest()["features/b"]["last_access"] == 100.
+
+
+def test_lru_eviction(cache, monkeypatch):
+    for i, key in enumerate("abcd"):
+        cache.put("lip", key, data={"lips.npy": b"x" * 10})
+        _clock(monkeypatch, float(i))
+        cache.update_manifest([("lip", key)])
+    # "a" relu : c'est désormais "b" la moins récemment utilisée
+    _clock(monkeypatch, 10.)
+    cache.update_manifest([("lip", "a")])
+    assert cache.update_manifest([], max_size=40) == []
+    evicted = cache.update_manifest([], max_size=25)
+    assert evicted == ["lip/b", "lip/c"]
+    assert sorted(cache.load_manifest()) == ["lip/a", "lip/d"]
+    assert cache.get("lip", "b") is None and cache.get("lip", "c") is None
+    assert cache.get("lip", "a") is not None and cache.get("lip", "d") is not None
+    assert cache.update_manifest([], max_size=0) == ["lip/d", "lip/a"]
+    assert cache.load_manifest() == {}
@@ -0,0 +1,42 @@
+"""
+Configuration de lip_profiling.py par les variables LIP_PROFILE*.
+"""
+
+import argparse
+
+import pytest
+
+import lip_profiling
+
+
+@pytest.fixture(autouse=True)
+def restore():
+    yield
+    lip_profiling.configure()
+    lip_profiling._env.update(spec=None, sample=0, mode="cprofile", profile_dir=".")
+
+
+@pytest.mark.parametrize("variable, value", [("LIP_PROFILE", "bogus"), ("LIP_PROFILE", "jsonl:"),
+                                             ("LIP_PROFILE_SAMPLE", "x"), ("LIP_PROFILE_MODE", "perf")])
+def test_invalid_environment_disables_profiling(variable, value, monkeypatch, capsys):
+    monkeypatch.setenv("LIP_PROFILE", "table")
+    monkeypatch.setenv(variable, value)
+    lip_profiling.configure_from_env()
+    assert not lip_profiling.enabled()
+    assert "[Warning]" in capsys.readouterr().err
+    # Les options des scripts restent utilisables
+    parser = argparse.ArgumentParser()
+    lip_profiling.add_arguments(parser)
+    lip_profiling.configure_from_args(parser.parse_args([]))
+    assert not lip_profiling.enabled()
+
+
+def test_valid_environment(monkeypatch):
+    monkeypatch.setenv("LIP_PROFILE", "table")
+    monkeypatch.setenv("LIP_PROFILE_SAMPLE", "4")
+    lip_profiling.configure_from_env()
+    assert lip_profiling.enabled()
+    parser = argparse.ArgumentParser()
+    lip_profiling.add_arguments(parser)
+    args = parser.parse_args([])
+    assert (args.profile, args.profile_sample) == ("table", 4)
@@ -0,0 +1,120 @@
+"""
+Micro-lots de lip_service.LipService : une requête invalide ou en échec ne
+doit pas faire échouer les autres requêtes du lot.
+"""
+
+import threading
+
+import cv2
+import joblib
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+import lip_service
+import make_custom_feature_file
+
+
+def _object(size, radius):
+    img = np.zeros((size, size), dtype=np.uint8)
+    cv2.circle(img, (size // 2, size // 2), radius, 255, -1)
+    return [img.tolist()] * 3
+
+
+@pytest.fixture
+def service(tmp_path):
+    n_features = len(make_custom_feature_file.feature_layout())
+    rng = np.random.default_rng(0)
+    model = RandomForestClassifier(n_estimators=5, random_state=0).fit(rng.random((20, n_features)),
+                                                                        np.arange(20) % 2)
+    path = str(tmp_path / "model.joblib")
+    joblib.dump(model, path)
+    return lip_service.LipService(path, classes=["a", "b"], m=30, max_wait=0.2)
+
+
+def _answers(service, requests):
+    futures = [service.submit(request) for request in requests]
+    return [future.result(timeout=60) for future in futures]
+
+
+def test_invalid_requests_fail_alone(service):
+    answers = _answers(service, [
+        {"id": 1, "views": _object(48, 10)},
+        {"id": 2, "views": _object(48, 10)[:2]},
+        {"id": 3, "views": _object(48, 10)[:2] + _object(40, 10)[:1]},
+        {"id": 4, "views": _object(40, 12)},
+        {"id": 5},
+    ])
+    assert [a["id"] for a in answers] == [1, 2, 3, 4, 5]
+    assert [("error" in a) for a in answers] == [False, True, True, False, True]
+    assert all(a["label"] in ("a", "b") for a in answers if "error" not in a)
+
+
+def test_failing_object_does_not_poison_batch(service, monkeypatch):
+    features = service.features
+
+    def failing_features(objects):
+        if any(views[0].max() == 0 for views in objects):
+            raise RuntimeError("objet vide")
+        return features(objects)
+
+    monkeypatch.setattr(service, "features", failing_features)
+    answers = _answers(service, [
+        {"id": 1, "views": _object(48, 10)},
+        {"id": 2, "views": [np.zeros((48, 48)).tolist()] * 3},
+        {"id": 3, "views": _object(48, 14)},
+    ])
+    assert "error" not in answers[0] and "error" not in answers[2]
+    assert answers[1] == {"id": 2, "error": "objet vide"}
+
+
+def test_model_columns_are_selected(tmp_path):
+    layout = make_custom_feature_file.feature_layout()
+    names = [column["name"] for column in layout]
+    columns = [name for name in names if name.startswith("m_")]
+    rng = np.random.default_rng(0)
+    model = RandomForestClassifier(n_estimators=5, random_state=0).fit(rng.random((20, len(columns))),
+                                                                        np.arange(20) % 2)
+    model.lip_columns_ = columns
+    path = str(tmp_path / "model.joblib")
+    joblib.dump(model, path)
+    service = lip_service.LipService(path, m=30)
+    views = [np.asarray(view, dtype=np.uint8) for view in _object(48, 10)]
+    full = service.features([views])
+    expected = model.predict_proba(full[:, [names.index(name) for name in columns]])
+    np.testing.assert_array_equal(service.predict([views]), expected)
+    # Colonne absente des caractéristiques du service
+    model.lip_columns_ = columns + ["m_LIP0_mean"]
+    joblib.dump(model, path)
+    with pytest.raises(ValueError, match="m_LIP0_mean"):
+        lip_service.LipService(path, m=30)
+
+
+def test_micro_batched_results_equal_single_requests(service, example_silhouettes):
+    # Profils réels (plateaux) : un objet micro-batché avec d'autres donne
+    # les mêmes caractéristiques et probabilités que seul
+    objects = list(example_silhouettes.reshape(-1, 3, *example_silhouettes.shape[1:]))
+    answers = _answers(service, [{"id": i, "views": views.tolist()} for i, views in enumerate(objects)])
+    batch = service.features(objects)
+    for i, views in enumerate(objects):
+        single = service.features([views])[0]
+        np.testing.assert_array_equal(batch[i], single)
+        probabilities = service.predict([views])[0]
+        assert [answers[i]["probabilities"][name] for name in ("a", "b")] == list(probabilities)
+
+
+def test_mesh_request_does_not_block_batches(service, monkeypatch):
+    # imProfile (ici bloqué jusqu'au signal) tourne hors du thread des micro-lots
+    release = threading.Event()
+
+    def slow_views(mesh):
+        release.wait(30)
+        return [np.asarray(view, dtype=np.uint8) for view in _object(48, 10)]
+
+    monkeypatch.setattr(service, "views_from_mesh", slow_views)
+    mesh = service.submit({"id": 1, "mesh": "objet.off"})
+    views = service.submit({"id": 2, "views": _object(48, 12)})
+    assert "label" in views.result(timeout=30)
+    assert not mesh.done()
+    release.set()
+    assert "label" in mesh.result(timeout=30)
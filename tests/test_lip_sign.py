@@ -0,0 +1,246 @@
+"""
+Parité de lip_sign.compute_lip_signatures avec la boucle historique
+getFeaturesByProfil, et de normalize_signatures avec max_min et applyShift
+(copies figées ci-dessous, indépendantes de lip_sign.py).
+"""
+
+import argparse
+import math
+import os
+import sys
+import warnings
+
+import cv2
+import numpy as np
+import pytest
+from skimage.transform import radon
+from skimage.util import img_as_float
+
+import lip_sign
+import radon_backend
+
+
+def baseline_features_by_profil(profil):
+    # Copie figée de getFeaturesByProfil (version d'origine de lip_sign.py)
+    maxVal = sys.float_info.min
+    argMaxVal = -1
+    infRho = len(profil) - 1
+    supRho = 0
+    for i, val in enumerate(profil):
+        if val > maxVal:
+            maxVal = val
+            argMaxVal = i
+        if val > 0:
+            infRho = min(infRho, i)
+            supRho = max(supRho, i)
+    m1 = np.mean(profil[infRho:argMaxVal]) if argMaxVal > infRho else 0
+    m2 = np.mean(profil[argMaxVal:supRho+1]) if supRho >= argMaxVal else 0
+    y1 = np.std(profil[infRho:argMaxVal]) if argMaxVal > infRho else 0
+    y2 = np.std(profil[argMaxVal:supRho+1]) if supRho >= argMaxVal else 0
+    profile_length = np.count_nonzero(profil[infRho:supRho+1] > 0)
+    if profile_length == 0:
+        profile_length = 1
+    return (maxVal / profile_length, (argMaxVal-infRho) / profile_length, m1 / profile_length,
+            y1 / profile_length, m2 / profile_length, y2 / profile_length)
+
+
+def baseline_signatures(radon_img):
+    return np.array([baseline_features_by_profil(radon_img[:, i]) for i in range(radon_img.shape[1])])
+
+
+def baseline_max_min(pLip):
+    # Copie figée de max_min (version d'origine de lip_sign.py)
+    max_ind = -1
+    max_value = sys.float_info.min
+    min_ind = -1
+    min_value = sys.float_info.max
+    for i in range(len(pLip)):
+        if pLip[i] > max_value:
+            max_value = pLip[i]
+            max_ind = i
+        if pLip[i] < min_value:
+            min_value = pLip[i]
+            min_ind = i
+    return max_ind, max_value, min_ind, min_value
+
+
+def baseline_apply_shift(arr, shift):
+    # Copie figée d'applyShift (version d'origine de lip_sign.py)
+    return [arr[(i + shift) % len(arr)] for i in range(len(arr))]
+
+
+def baseline_normalize(lip):
+    # Boucle de normalisation d'origine sur une signature [m, 6] ; le seuil
+    # ANGLE//2 y valait m // 2 (ANGLE = m = 180)
+    columns = [list(lip[:, j]) for j in range(lip.shape[1])]
+    do, sdo, minId, _ = baseline_max_min(columns[0])
+    merit = 1 - (math.exp(1 - sdo))
+    columns = [baseline_apply_shift(column, do) for column in columns]
+    flip = minId < len(lip) // 2
+    if flip:
+        columns = [column[::-1] for column in columns]
+    return np.array(columns).T, do, flip, merit
+
+
+def _disc_and_bar(size=64):
+    img = np.zeros((size, size))
+    rr, cc = np.mgrid[0:size, 0:size]
+    img[(rr - size // 2) ** 2 + (cc - size // 3) ** 2 < (size // 5) ** 2] = 255
+    img[size // 4:size // 4 + 6, size // 3:size - 8] = 255
+    return img
+
+
+def test_radon_profiles_match_baseline():
+    radon_img = radon(_disc_and_bar(), np.arange(0.0, 180.0, 1.0), False)
+    np.testing.assert_allclose(lip_sign.compute_lip_signatures(radon_img), baseline_signatures(radon_img),
+                               rtol=0, atol=1e-12)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_random_profiles_match_baseline(seed):
+    rng = np.random.default_rng(seed)
+    # Profils à support borné, avec des zéros intérieurs et des maxima répétés
+    profiles = np.round(rng.random((50, 40)) * 4) * (rng.random((50, 40)) < 0.8)
+    profiles[:5] = 0.
+    profiles[-5:] = 0.
+    profiles[20:23, :] = 3.
+    np.testing.assert_allclose(lip_sign.compute_lip_signatures(profiles), baseline_signatures(profiles),
+                               rtol=0, atol=1e-12)
+
+
+def test_zero_column():
+    radon_img = radon(_disc_and_bar(), np.arange(0.0, 180.0, 10.0), False)
+    radon_img[:, 3] = 0.
+    lips = lip_sign.compute_lip_signatures(radon_img)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        expected = baseline_signatures(radon_img)
+    others = np.arange(radon_img.shape[1]) != 3
+    np.testing.assert_allclose(lips[others], expected[others], rtol=0, atol=1e-12)
+    # Colonne vide : six LIP nuls, là où la boucle d'origine donne un profil
+    # dégénéré (LIP0 = float_info.min, LIP1 = -nRho, LIP4 et LIP5 NaN)
+    np.testing.assert_array_equal(lips[3], np.zeros(6))
+    assert expected[3, 1] == -radon_img.shape[0]
+    assert np.isnan(expected[3, 4:]).all()
+
+
+@pytest.mark.parametrize("backend", ["skimage", "matrix"])
+@pytest.mark.parametrize("coarse", [0, 30])
+def test_blank_images_give_zero_signatures(backend, coarse, monkeypatch, tmp_path):
+    monkeypatch.setitem(radon_backend._instances, "matrix", radon_backend.MatrixRadon(cache_dir=str(tmp_path)))
+    # Paquet entièrement vide : fenêtre rho = axe complet, profils nuls
+    lips, _, _, _ = lip_sign.lip_signatures_batch(np.zeros((3, 64, 64)), m=60, radon_backend=backend, coarse=coarse)
+    np.testing.assert_array_equal(lips, np.zeros((3, 60, 6)))
+
+
+@pytest.mark.parametrize("m", [60, 180])
+def test_coarse_shifts_are_integer_and_invertible(m):
+    imgs = np.stack([_disc_and_bar(64), _disc_and_bar(64)[::-1].T])
+    lips, shifts, flips, _ = lip_sign.lip_signatures_batch(imgs, m=m, coarse=30, fine=180)
+    assert shifts.dtype == np.int64 and flips.dtype == bool
+    # Signature brute retrouvée : l'orientation (LIP0 maximal) est à l'indice du décalage
+    raw = lip_sign.denormalize_signatures(lips, shifts, flips)
+    for lip, shift in zip(raw, shifts):
+        assert lip[shift, 0] == lip[:, 0].max()
+
+
+def _plateau_silhouettes(size=64):
+    """
+    Rectangles à bords droits (profils à plateau à 0 et 90 degrés), de tailles
+    et de positions différentes : chacun a son propre cercle de support.
+    """
+    imgs = np.zeros((4, size, size))
+    imgs[0, 20:40, 24:36] = 255
+    imgs[1, 5:15, 30:60] = 255
+    imgs[2, 28:36, 28:36] = 255
+    imgs[3, 10:54, 18:22] = 255
+    return imgs
+
+
+def _reference_signatures(imgs, backend):
+    # Sinogramme complet de chaque image seule, sans restriction à rho_window
+    THETA = np.arange(0.0, 180.0, 1.0)
+    if backend == "skimage":
+        sinograms = [radon(img, THETA, False) for img in imgs]
+    else:
+        operator = radon_backend.get_radon_backend("matrix").operator(imgs.shape[1:], THETA)
+        sinograms = [(operator @ img_as_float(img).ravel()).reshape(len(THETA), -1).T for img in imgs]
+    return lip_sign.normalize_signatures(np.stack([lip_sign.compute_lip_signatures(s) for s in sinograms]))[0]
+
+
+@pytest.mark.parametrize("backend", ["skimage", "matrix"])
+def test_signatures_match_full_transform(backend, example_silhouettes, monkeypatch, tmp_path):
+    monkeypatch.setitem(radon_backend._instances, "matrix", radon_backend.MatrixRadon(cache_dir=str(tmp_path)))
+    for imgs in (_plateau_silhouettes(), example_silhouettes):
+        expected = _reference_signatures(imgs, backend)
+        lips, _, _, _ = lip_sign.lip_signatures_batch(imgs, radon_backend=backend)
+        np.testing.assert_array_equal(lips, expected)
+        # Image seule : fenêtre rho au plus près de son support
+        for img, lip in zip(imgs, expected):
+            np.testing.assert_array_equal(lip_sign.lip_signatures_batch(img[np.newaxis], radon_backend=backend)[0][0],
+                                          lip)
+
+
+@pytest.mark.parametrize("backend", ["skimage", "matrix"])
+def test_signatures_do_not_depend_on_batch(backend, example_silhouettes, monkeypatch, tmp_path):
+    monkeypatch.setitem(radon_backend._instances, "matrix", radon_backend.MatrixRadon(cache_dir=str(tmp_path)))
+    imgs = np.concatenate([example_silhouettes[:6], _plateau_silhouettes(100)])
+    batch, _, _, _ = lip_sign.lip_signatures_batch(imgs, m=60, radon_backend=backend)
+    for chunk_size in (1, 2, 5):
+        lips, _, _, _ = lip_sign.lip_signatures_batch(imgs, m=60, radon_backend=backend, chunk_size=chunk_size)
+        np.testing.assert_array_equal(lips, batch)
+    # Même image dans un autre lot, à une autre position
+    lips, _, _, _ = lip_sign.lip_signatures_batch(imgs[::-1], m=60, radon_backend=backend)
+    np.testing.assert_array_equal(lips[::-1], batch)
+
+
+def _raw_signatures(m):
+    # [objets, m, 6] : valeurs aléatoires, valeurs quantifiées (maxima et
+    # minima de LIP0 répétés), signatures constantes et vides
+    rng = np.random.default_rng(0)
+    noisy = rng.random((8, m, 6))
+    ties = np.round(rng.random((8, m, 6)) * 3) / 3
+    ties[:4, :, 0] = np.round(rng.random((4, m)))
+    constant = np.broadcast_to(rng.random((2, 1, 6)), (2, m, 6))
+    # Minimum de LIP0 juste avant, sur et juste après la moitié des angles
+    border = rng.random((4, m, 6)) + 1
+    for k, idx in enumerate((m // 2 - 1, m // 2, m // 2 + 1)):
+        border[k, idx, 0] = 0.5
+    return np.concatenate([noisy, ties, constant, border, np.zeros((2, m, 6))])
+
+
+@pytest.mark.parametrize("m", [180, 60])
+def test_normalisation_matches_baseline(m):
+    raw = _raw_signatures(m)
+    lips, shifts, flips, merits = lip_sign.normalize_signatures(raw)
+    for i, lip in enumerate(raw):
+        expected, shift, flip, merit = baseline_normalize(lip)
+        np.testing.assert_array_equal(lips[i], expected)
+        # Signature vide : max_min renvoie -1, décalage sans effet sur des zéros
+        assert shifts[i] == shift or (shift == -1 and not lip[:, 0].any())
+        assert flips[i] == flip and merits[i] == merit
+        assert lip_sign.normalize_signature(lip)[1:] == (shifts[i], flip, merit)
+    # Retour exact aux signatures brutes
+    np.testing.assert_array_equal(lip_sign.denormalize_signatures(lips, shifts, flips), raw)
+    np.testing.assert_array_equal(
+        lip_sign.denormalize_signatures(lips.reshape(2, -1, m, 6), shifts.reshape(2, -1), flips.reshape(2, -1)),
+        raw.reshape(2, -1, m, 6))
+
+
+@pytest.mark.parametrize("plots, expected", [("all", "mst"), ("none", ""), ("sample:0", ""), ("sample:1", "m"),
+                                             ("sample:2", "mt"), ("sample:3", "mst"), ("sample:10", "mst")])
+def test_plots_option(plots, expected, tmp_path):
+    paths = []
+    for view in "mst":
+        paths.append(str(tmp_path / f"obj_{view}.pgm"))
+        cv2.imwrite(paths[-1], _disc_and_bar(32).astype(np.uint8))
+    out = str(tmp_path / "out") + "/"
+    os.makedirs(out)
+    lip_sign.main(paths + [out, "--plots", plots, "--angles", "30"])
+    assert sorted(os.listdir(out)) == sorted([f"obj_{v}.csv" for v in "mst"] + [f"obj_{v}_visu.png" for v in expected])
+
+
+def test_plots_option_rejects_other_forms():
+    for value in ("some", "sample:", "sample:-1", "sample:x"):
+        with pytest.raises(argparse.ArgumentTypeError):
+            lip_sign.parse_plots_option(value)
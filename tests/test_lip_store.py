@@ -0,0 +1,58 @@
+"""
+Relecture des caracs binaires de lip_store.py : le .npy n'est utilisé que
+s'il correspond au fichier texte.
+"""
+
+import os
+
+import numpy as np
+
+import lip_store
+import make_custom_feature_file
+
+
+def _write(tmp_path):
+    features = np.arange(12, dtype=np.float32).reshape(4, 3) / 7
+    make_custom_feature_file.write_feature_files(str(tmp_path), "train", features, list("abcd"), [0, 1, 1, 2])
+    return features
+
+
+def test_fresh_binary_is_memory_mapped(tmp_path):
+    features = _write(tmp_path)
+    caracs = lip_store.read_caracs(str(tmp_path), "train")
+    assert isinstance(caracs["features"], np.memmap)
+    np.testing.assert_array_equal(caracs["features"], features)
+    np.testing.assert_array_equal(caracs["labels"], [0, 1, 1, 2])
+
+
+def test_rewritten_text_takes_precedence(tmp_path):
+    _write(tmp_path)
+    path = os.path.join(str(tmp_path), "train_caracs.txt")
+    with open(path, "w") as f:
+        f.write("1 2 3\n4 5 6\n")
+    features = lip_store.load_feature_matrix(path)
+    assert not isinstance(features, np.memmap)
+    np.testing.assert_array_equal(features, [[1, 2, 3], [4, 5, 6]])
+    # Clé de source absente (binaire d'une version antérieure) : texte
+    _write(tmp_path)
+    os.remove(os.path.join(str(tmp_path), "train_caracs.source.json"))
+    assert not isinstance(lip_store.load_feature_matrix(path), np.memmap)
+
+
+def test_binary_without_text(tmp_path):
+    features = _write(tmp_path)
+    os.remove(os.path.join(str(tmp_path), "train_caracs.txt"))
+    path = os.path.join(str(tmp_path), "train_caracs.txt")
+    np.testing.assert_array_equal(lip_store.load_feature_matrix(path), features)
+
+
+def test_binary_is_not_rounded(tmp_path):
+    # Texte arrondi à 6 décimales, .npy avec les valeurs non arrondies
+    features = np.random.default_rng(0).random((5, 4))
+    make_custom_feature_file.write_feature_files(str(tmp_path), "train", features, list("abcde"), [0, 1, 1, 2, 0])
+    np.testing.assert_array_equal(np.load(os.path.join(str(tmp_path), "train_caracs.npy")),
+                                  features.astype(np.float32))
+    with open(os.path.join(str(tmp_path), "train_caracs.txt")) as f:
+        lines = f.read().splitlines()
+    assert lines == [" ".join(str(v) for v in np.round(row, decimals=6)) for row in features]
+    assert not np.array_equal(np.round(features, 6).astype(np.float32), features.astype(np.float32))
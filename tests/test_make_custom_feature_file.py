@@ -0,0 +1,283 @@
+"""
+Parité de batch_select_lip_representative_indices (mode ref_by_LIP0_fft)
+avec le sélecteur signal par signal, et avec sa version d'origine (copie
+figée ci-dessous). Parité de local_features_batch, re_order_features_batch
+et dataset_feature_matrix avec local_features / re_order_feature /
+orientation_merit d'origine, objet par objet. Parité de circularity_batch et
+crofton_perimeter_batch avec area_closing + regionprops + perimeter_crofton.
+"""
+
+import itertools
+import math
+
+import cv2
+import numpy as np
+import pytest
+from scipy.signal import find_peaks
+from skimage.measure import perimeter_crofton, regionprops
+from skimage.morphology import area_closing
+
+import make_custom_feature_file as mcf
+
+PAIRS = [(1, 4), (3, 3), (5, 6), (10, 10), (20, 7), (40, 12)]
+
+
+def baseline_select(lip0, top_n_freq=10, n_representatives=10):
+    # Copie figée de select_lip_representative_indices et de ses fonctions
+    # (version d'origine de make_custom_feature_file.py)
+    fft_values = np.fft.fft(lip0)
+    amplitudes = np.abs(fft_values)
+    amplitudes[0] = 0
+    top_indices = sorted(np.argsort(amplitudes)[-top_n_freq:])
+    filtered_fft = np.zeros_like(fft_values, dtype=complex)
+    for idx in top_indices:
+        filtered_fft[idx] = fft_values[idx]
+        if idx != 0:
+            filtered_fft[-idx] = fft_values[-idx]
+    reconstructed = np.fft.ifft(filtered_fft).real
+
+    peaks, _ = find_peaks(reconstructed, distance=10)
+    troughs, _ = find_peaks(-reconstructed, distance=10)
+    _, properties = find_peaks(reconstructed, plateau_size=True, distance=10)
+    plateau_indices = [(left + right) // 2 for left, right in zip(properties['left_edges'], properties['right_edges'])]
+
+    per_type_target = n_representatives // 3
+    remaining = n_representatives - 3 * per_type_target
+    selected = []
+    selected.extend(peaks[:per_type_target])
+    selected.extend(troughs[:per_type_target])
+    selected.extend(plateau_indices[:per_type_target + remaining])
+    seen = set(selected)
+    if len(seen) < n_representatives:
+        for idx in np.argsort(-np.abs(reconstructed)):
+            if idx not in seen:
+                selected.append(idx)
+                seen.add(idx)
+            if len(seen) >= n_representatives:
+                break
+    return sorted(selected[:n_representatives])
+
+
+def _signals():
+    rng = np.random.default_rng(0)
+    t = np.arange(180)
+    signals = []
+    # Une seule sinusoïde : égalités entre échantillons voisins de la reconstruction
+    for k in (1, 2, 3, 6):
+        signals.append(1 + 0.3 * np.cos(2 * np.pi * k * t / 180))
+        signals.append(0.5 + 0.2 * np.sin(2 * np.pi * k * t / 180 + 0.25))
+    # Sommes de sinusoïdes et bruit, proches de LIP0 normalisés
+    for _ in range(12):
+        k = rng.integers(1, 12, size=3)
+        signal = sum(rng.random() * np.cos(2 * np.pi * kk * t / 180 + rng.random() * 6) for kk in k)
+        signals.append(1 + 0.2 * signal + 0.02 * rng.random(180))
+    # Signal constant : aucune fréquence non nulle
+    signals.append(np.full(180, 0.7))
+    return np.array(signals)
+
+
+@pytest.mark.parametrize("top_n_freq, n_representatives", PAIRS)
+def test_batch_selector_matches_single_selector(top_n_freq, n_representatives):
+    lip0s = _signals()
+    indices, _, reconstructed = mcf.batch_select_lip_representative_indices(lip0s, top_n_freq, n_representatives)
+    for lip0, batch_indices, batch_reconstructed in zip(lip0s, indices, reconstructed):
+        selected, _, single_reconstructed, _ = mcf.select_lip_representative_indices(lip0, top_n_freq,
+                                                                                     n_representatives)
+        assert list(batch_indices) == [int(i) for i in selected]
+        assert list(batch_indices) == [int(i) for i in baseline_select(lip0, top_n_freq, n_representatives)]
+        np.testing.assert_allclose(batch_reconstructed, single_reconstructed, rtol=0, atol=1e-12)
+
+
+STATS = ("max", "min", "median", "mean", "std")
+
+
+def baseline_local_features(lip, stats, mode):
+    # Copie figée de local_features (version d'origine)
+    local_feature = []
+    if mode == "default":
+        for i in range(lip.shape[1]):
+            signature = lip[:, i]
+            if "max" in stats:
+                local_feature.append(np.max(signature))
+            if "min" in stats:
+                local_feature.append(np.min(signature))
+            if "median" in stats:
+                local_feature.append(np.median(signature))
+            if "mean" in stats:
+                local_feature.append(np.mean(signature))
+            if "std" in stats:
+                local_feature.append(np.std(signature))
+    elif mode == "ref_by_LIP0":
+        lip0 = lip[:, 0]
+        idx_min = np.argmin(lip0)
+        idx_max = np.argmax(lip0)
+        idx_med = np.argsort(lip0)[len(lip0) // 2]
+        for i in range(lip.shape[1]):
+            signature = lip[:, i]
+            if "min" in stats:
+                local_feature.append(signature[idx_min])
+            if "max" in stats:
+                local_feature.append(signature[idx_max])
+            if "median" in stats:
+                local_feature.append(signature[idx_med])
+            if "mean" in stats:
+                local_feature.append(np.mean(signature))
+            if "std" in stats:
+                local_feature.append(np.std(signature))
+    elif mode == "ref_by_LIP0_fft":
+        representative_indices = baseline_select(lip[:, 0], top_n_freq=10, n_representatives=10)
+        for i in range(lip.shape[1]):
+            signature = lip[:, i]
+            for idx in representative_indices:
+                local_feature.append(signature[idx])
+    return np.array(local_feature)
+
+
+def baseline_re_order_feature(lf_m, lf_s, lf_t, ci_m=None, ci_s=None, ci_t=None, om_m=None, om_s=None, om_t=None):
+    # Copie figée de re_order_feature (version d'origine)
+    sizeOfLocalFeature = 3
+    feature_ordered = []
+    assert(len(lf_m) == len(lf_s) == len(lf_t))
+    for i in range(0, len(lf_m), sizeOfLocalFeature):
+        feature_ordered = np.append(feature_ordered, lf_m[i:i+sizeOfLocalFeature])
+        feature_ordered = np.append(feature_ordered, lf_s[i:i+sizeOfLocalFeature])
+        feature_ordered = np.append(feature_ordered, lf_t[i:i+sizeOfLocalFeature])
+    if ci_m is not None and ci_s is not None and ci_t is not None:
+        feature_ordered = np.append(feature_ordered, [ci_m, ci_s, ci_t])
+    if om_m is not None and om_s is not None and om_t is not None:
+        feature_ordered = np.append(feature_ordered, [om_m, om_s, om_t])
+    return feature_ordered
+
+
+def baseline_orientation_merit(lip):
+    # Copie figée d'orientation_merit (version d'origine)
+    return 1 - (math.exp(1 - np.max(lip[:, 0])))
+
+
+def _lips(m):
+    # [objets, 3 vues, m, 6] : valeurs aléatoires, puis valeurs quantifiées
+    # (nombreuses égalités pour argmin / argmax / médiane) et colonnes constantes
+    rng = np.random.default_rng(1)
+    t = np.arange(m)
+    smooth = 1 + 0.3 * np.cos(2 * np.pi * rng.integers(1, 6, size=(4, 3, 1, 6)) * t[:, np.newaxis] / m
+                              + rng.random((4, 3, 1, 6)) * 6)
+    noisy = rng.random((4, 3, m, 6)) * 3
+    ties = np.round(rng.random((4, 3, m, 6)) * 4) / 4
+    constant = np.broadcast_to(rng.random((2, 3, 1, 6)), (2, 3, m, 6))
+    return np.concatenate([smooth, noisy, ties, constant])
+
+
+def _stat_sets():
+    return [subset for k in range(1, len(STATS) + 1) for subset in itertools.combinations(STATS, k)]
+
+
+@pytest.mark.parametrize("m", [180, 31])
+@pytest.mark.parametrize("mode", ["default", "ref_by_LIP0", "ref_by_LIP0_fft"])
+def test_batch_features_match_baseline(mode, m):
+    lips = _lips(m)
+    for stats in (_stat_sets() if mode != "ref_by_LIP0_fft" else [STATS]):
+        lf = mcf.local_features_batch(lips, stats=stats, mode=mode)
+        ordered = mcf.re_order_features_batch(lf)
+        for i, views in enumerate(lips):
+            expected = [baseline_local_features(lip, stats, mode) for lip in views]
+            for v in range(len(views)):
+                np.testing.assert_array_equal(lf[i, v], expected[v])
+                np.testing.assert_array_equal(mcf.local_features(views[v], stats=stats, mode=mode), expected[v])
+            np.testing.assert_array_equal(ordered[i], baseline_re_order_feature(*expected))
+
+
+@pytest.mark.parametrize("use_circularity, use_orientation_merit", [(False, False), (True, False),
+                                                                    (False, True), (True, True)])
+@pytest.mark.parametrize("mode", ["default", "ref_by_LIP0", "ref_by_LIP0_fft"])
+def test_feature_matrix_matches_baseline(mode, use_circularity, use_orientation_merit):
+    lips = _lips(180)
+    circularities = np.random.default_rng(2).random((len(lips), 3))
+    for stats in (("max", "min", "median"), STATS):
+        # chunk_size plus petit que le jeu : plusieurs paquets
+        features = mcf.dataset_feature_matrix(lips, use_circularity=use_circularity,
+                                              use_orientation_merit=use_orientation_merit, stats=stats,
+                                              mode=mode, chunk_size=4, circularities=circularities)
+        for i, views in enumerate(lips):
+            lf = [baseline_local_features(lip, stats, mode) for lip in views]
+            ci = list(circularities[i]) if use_circularity else [None] * 3
+            om = [baseline_orientation_merit(lip) for lip in views] if use_orientation_merit else [None] * 3
+            expected = baseline_re_order_feature(*lf, *ci, *om)
+            np.testing.assert_array_equal(features[i], expected)
+            np.testing.assert_array_equal(mcf.re_order_feature(*lf, *ci, *om), expected)
+            np.testing.assert_array_equal(
+                mcf.object_feature_vector(*views, use_circularity=use_circularity,
+                                          use_orientation_merit=use_orientation_merit, stats=stats, mode=mode,
+                                          circularities=circularities[i] if use_circularity else None),
+                expected)
+
+
+def baseline_circularity(img):
+    # Copie figée de circularity (version d'origine), image déjà lue
+    img = area_closing(img, 128, connectivity=1)
+    regions = regionprops(img)
+    pe = perimeter_crofton(img, directions=2)
+    a = regions[0].area
+    return (4 * math.pi * a) / (pe * pe)
+
+
+def _holed_silhouettes():
+    """
+    Silhouettes 0/255 à trous : trous de part et d'autre du seuil de 128
+    pixels, trou en 8-connexité seulement, fond coupé par la silhouette,
+    plusieurs composantes, silhouette touchant le bord.
+    """
+    imgs = np.zeros((7, 64, 64), dtype=np.uint8)
+    imgs[:, 8:56, 8:56] = 255
+    imgs[0, 20:27, 20:38] = 0             # 126 px : bouché
+    imgs[1, 20:28, 20:36] = 0             # 128 px : conservé
+    imgs[2, 20:30, 20:40] = 0             # 200 px : conservé
+    imgs[2, 40:43, 40:43] = 0             # 9 px : bouché
+    imgs[3, 14:22, 14:22] = 0             # 64 + 72 px reliés par un coin : deux
+    imgs[3, 22:30, 22:31] = 0             # composantes en 4-connexité, bouchées
+    imgs[4, :, 30:34] = 0                 # deux composantes séparées
+    imgs[5] = 0
+    cv2.circle(imgs[5], (10, 10), 20, 255, -1)
+    imgs[6, 0:3, 0:40] = 0                # encoche ouverte sur le fond
+    imgs[6, 8:10, 20:22] = 0
+    return imgs
+
+
+def _circularity_images(example_silhouettes):
+    rng = np.random.default_rng(0)
+    noisy = (rng.random((4, 48, 48)) < 0.7).astype(np.uint8) * 255
+    return [example_silhouettes, _holed_silhouettes(), noisy, _holed_silhouettes() // 255]
+
+
+def test_circularity_batch_matches_regionprops(example_silhouettes):
+    for imgs in _circularity_images(example_silhouettes):
+        expected = [baseline_circularity(img) for img in imgs]
+        np.testing.assert_array_equal(mcf.circularity_batch(imgs), expected)
+        # Chaque image seule : pas d'interaction entre les images du lot
+        for img, value in zip(imgs, expected):
+            assert mcf.circularity(img) == value
+
+
+def test_circularity_special_cases():
+    # Profil vide : nan ; niveaux de gris : ancien calcul
+    imgs = _holed_silhouettes()
+    imgs[1] = 0
+    values = mcf.circularity_batch(imgs)
+    assert np.isnan(values[1]) and not np.isnan(values[[0, 2, 3, 4, 5, 6]]).any()
+    gray = _holed_silhouettes()
+    gray[:, 8:20, 8:56] //= 2
+    np.testing.assert_array_equal(mcf.circularity_batch(gray), [baseline_circularity(img) for img in gray])
+
+
+def test_circularity_from_path(tmp_path, example_silhouettes):
+    path = str(tmp_path / "objet_m.pgm")
+    cv2.imwrite(path, example_silhouettes[0])
+    assert mcf.circularity(path) == baseline_circularity(cv2.imread(path, 0))
+
+
+def test_crofton_perimeter_batch():
+    rng = np.random.default_rng(1)
+    # Images binaires quelconques, pixels allumés sur le bord compris
+    imgs = rng.random((6, 64, 64)) < np.array([0.05, 0.3, 0.5, 0.7, 0.95, 1.])[:, np.newaxis, np.newaxis]
+    imgs = np.concatenate([imgs, np.zeros((1, 64, 64), dtype=bool), _holed_silhouettes() > 0])
+    np.testing.assert_array_equal(mcf.crofton_perimeter_batch(imgs),
+                                  [perimeter_crofton(img, directions=2) for img in imgs])
@@ -0,0 +1,178 @@
+"""
+Lecture des maillages .off par off_reader.py (comparée à une lecture ligne à
+ligne de référence) et cache binaire en mémoire mappée.
+"""
+
+import glob
+import os
+import re
+
+import numpy as np
+import pytest
+
+import off_reader
+from conftest import EXAMPLES_DIR
+
+QUAD_WITH_COMMENTS = """OFF
+# commentaire avant les nombres
+
+5 3 0
+# sommets
+0 0 0
+1 0 0   # fin de ligne commentée
+1 1 0
+
+0 1 0
+0.5 0.5 1
+# faces : un quadrilatère, un triangle, un pentagone dégénéré
+4 0 1 2 3
+3 0 1 4 # commentaire
+5 0 1 2 3 4
+"""
+
+
+def reference_parse(text):
+    # Lecture de référence : commentaires et lignes vides retirés, puis jetons
+    lines = [line.split("#", 1)[0].split() for line in text.splitlines()]
+    lines = [tokens for tokens in lines if tokens]
+    counts = re.match(r"[A-Z4]*OFF(.*)", " ".join(lines[0])).group(1).split()
+    rows = lines[1:]
+    if not counts:
+        counts, rows = rows[0], rows[1:]
+    n_vertices, n_faces = int(counts[0]), int(counts[1])
+    vertices = np.array([[float(v) for v in row[:3]] for row in rows[:n_vertices]]).reshape(-1, 3)
+    faces = [[int(v) for v in row[1:1 + int(row[0])]] for row in rows[n_vertices:n_vertices + n_faces]]
+    return vertices, faces
+
+
+def _check(mesh, text, dtype=np.float32):
+    vertices, faces = reference_parse(text)
+    np.testing.assert_array_equal(mesh["vertices"], vertices.astype(dtype))
+    assert mesh["vertices"].dtype == dtype and mesh["vertices"].shape == (len(vertices), 3)
+    assert mesh["face_sizes"].dtype == np.int32 and mesh["face_indices"].dtype == np.int32
+    assert mesh["face_sizes"].tolist() == [len(face) for face in faces]
+    assert mesh["face_indices"].tolist() == [i for face in faces for i in face]
+
+
+def _write(tmp_path, text, name="objet.off"):
+    path = tmp_path / name
+    path.write_text(text)
+    return str(path)
+
+
+@pytest.mark.parametrize("text", [
+    QUAD_WITH_COMMENTS,
+    # Quadrilatères seulement (toutes les lignes de faces de même longueur)
+    "OFF\n4 2 0\n0 0 0\n1 0 0\n1 1 0\n0 1 0\n4 0 1 2 3\n4 3 2 1 0\n",
+    # Nombres sur la ligne d'en-tête (ModelNet), avec ou sans espace
+    "OFF4 2 0\n0 0 0\n1 0 0\n1 1 0\n0 1 0\n3 0 1 2\n3 0 2 3\n",
+    "OFF 4 1 0\n0 0 0\n1 0 0\n1 1 0\n0 1 0\n4 0 1 2 3\n",
+    # Normales et couleurs ignorées ; couleurs de faces sur des faces mixtes
+    "NOFF\n3 1 0\n0 0 0 0 0 1\n1 0 0 0 0 1\n0 1 0 0 0 1\n3 0 1 2\n",
+    "COFF\n4 2 0\n0 0 0 255 0 0 255\n1 0 0 0 255 0 255\n1 1 0 0 0 255 255\n0 1 0 9 9 9 255\n"
+    "3 0 1 2 255 0 0\n4 0 1 2 3 0 255 0\n",
+    # Faces d'un et deux sommets
+    "OFF\n3 3 0\n0 0 0\n1 0 0\n0 1 0\n1 0\n2 0 1\n3 0 1 2\n",
+    # Maillage sans face
+    "OFF\n2 0 0\n0 0 0\n1 2 3\n",
+])
+def test_parse_off(tmp_path, text):
+    path = _write(tmp_path, text)
+    _check(off_reader.parse_off(path), text)
+    _check(off_reader.parse_off(path, np.float64), text, np.float64)
+
+
+def test_examples_match_reference():
+    for path in sorted(glob.glob(os.path.join(EXAMPLES_DIR, "*.off"))):
+        with open(path) as f:
+            text = f.read()
+        _check(off_reader.parse_off(path, np.float64), text, np.float64)
+
+
+def test_triangles():
+    mesh = {"face_sizes": np.array([4, 3, 1, 2, 5], dtype=np.int32),
+            "face_indices": np.array([0, 1, 2, 3, 0, 1, 4, 9, 0, 1, 0, 1, 2, 3, 4], dtype=np.int32)}
+    assert off_reader.triangles(mesh).tolist() == [[0, 1, 2], [0, 2, 3], [0, 1, 4],
+                                                   [0, 1, 2], [0, 2, 3], [0, 3, 4]]
+
+
+@pytest.mark.parametrize("text, message", [
+    ("PLY\n3 1 0\n", "en-tête OFF"),
+    ("OFF\n# rien\n", "absents"),
+    ("OFF\ntrois 1 0\n", "invalides"),
+    ("OFF\n3 1 0\n0 0 0\n1 0 0\n", "sommets annoncés"),
+    ("OFF\n3 2 0\n0 0 0\n1 0 0\n0 1 0\n3 0 1 2\n", "faces annoncées"),
+    ("OFF\n3 2 0\n0 0 0\n1 0 0\n0 1 0\n3 0 1 2\n4 0 1\n", "incomplète"),
+    ("OFF\n3 1 0\n0 0 0\n1 0 0\n0 1 0\n3 0 1 3\n", "hors du maillage"),
+])
+def test_invalid_files(tmp_path, text, message):
+    with pytest.raises(ValueError, match=message):
+        off_reader.parse_off(_write(tmp_path, text))
+
+
+def test_cache(tmp_path):
+    path = _write(tmp_path, QUAD_WITH_COMMENTS)
+    cached = off_reader.cache_path(path)
+    assert cached == path + ".float32.cache"
+    first = off_reader.read_off(path)
+    assert os.path.isfile(cached)
+    _check(first, QUAD_WITH_COMMENTS)
+    second = off_reader.read_off(path)
+    assert all(isinstance(second[name], np.memmap) for name in second)
+    _check(second, QUAD_WITH_COMMENTS)
+    # Un cache par type de coordonnées
+    _check(off_reader.read_off(path, np.float64), QUAD_WITH_COMMENTS, np.float64)
+    assert os.path.isfile(off_reader.cache_path(path, np.float64))
+
+
+def test_cache_invalidation(tmp_path, monkeypatch):
+    path = _write(tmp_path, QUAD_WITH_COMMENTS)
+    off_reader.read_off(path)
+    # Source modifié (taille et date)
+    changed = QUAD_WITH_COMMENTS.replace("0.5 0.5 1", "0.25 0.5 2")
+    _write(tmp_path, changed)
+    _check(off_reader.read_off(path), changed)
+    _check(off_reader.read_off(path), changed)
+    # Même taille, seule la date change
+    same_size = changed.replace("0.25 0.5 2", "0.75 0.5 2")
+    stat = os.stat(path)
+    _write(tmp_path, same_size)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    _check(off_reader.read_off(path), same_size)
+    # Nouvelle version du format du cache
+    calls = []
+    parse_off = off_reader.parse_off
+    monkeypatch.setattr(off_reader, "parse_off", lambda *args: calls.append(args) or parse_off(*args))
+    off_reader.read_off(path)
+    assert calls == []
+    monkeypatch.setattr(off_reader, "CACHE_VERSION", off_reader.CACHE_VERSION + 1)
+    _check(off_reader.read_off(path), same_size)
+    assert len(calls) == 1
+
+
+def test_damaged_or_unwritable_cache(tmp_path, monkeypatch):
+    path = _write(tmp_path, QUAD_WITH_COMMENTS)
+    cached = off_reader.cache_path(path)
+    off_reader.read_off(path)
+    # Cache tronqué : relu depuis le source puis réécrit
+    with open(cached, "rb") as f:
+        content = f.read()
+    with open(cached, "wb") as f:
+        f.write(content[:len(content) // 2])
+    _check(off_reader.read_off(path), QUAD_WITH_COMMENTS)
+    with open(cached, "rb") as f:
+        assert f.read() == content
+    # Répertoire en lecture seule : lecture sans cache
+    os.remove(cached)
+
+    def unwritable(*args):
+        raise PermissionError("lecture seule")
+    monkeypatch.setattr(off_reader, "_write_arrays", unwritable)
+    _check(off_reader.read_off(path), QUAD_WITH_COMMENTS)
+    assert not os.path.exists(cached)
+
+
+def test_no_cache(tmp_path):
+    path = _write(tmp_path, QUAD_WITH_COMMENTS)
+    _check(off_reader.read_off(path, cache=False), QUAD_WITH_COMMENTS)
+    assert os.listdir(str(tmp_path)) == ["objet.off"]